@@ -0,0 +1,96 @@
+"""
+Stateless JWT authentication support.
+
+simplejwt's ``JWTStatelessUserAuthentication`` builds ``request.user`` from
+the access token alone; with ``TOKEN_USER_CLASS`` set to ``ClaimsUser`` the
+principal also carries the identity claims from accounts.tokens, so
+authenticating and authorizing a typical request runs no queries. The full
+``User`` row is only loaded when a view reads an attribute the claims do
+not carry, and is then cached briefly.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from dayflow.metrics import cache_counters
+
+USER_CACHE_KEY = 'accounts:user:{pk}'
+_hits, _misses = cache_counters('auth_user')
+
+
+def get_cached_user(pk):
+    """The User with ``pk`` from a short-lived cache (see accounts.signals for invalidation)."""
+    from .models import User
+    
+    key = USER_CACHE_KEY.format(pk=pk)
+    user = cache.get(key)
+    if user is None:
+        _misses.inc()
+        user = User.objects.filter(pk=pk).first()
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        cache.set(key, user, settings.AUTH_USER_CACHE_TTL)
+    else:
+        _hits.inc()
+    return user
+
+
+def forget_cached_user(pk):
+    cache.delete(USER_CACHE_KEY.format(pk=pk))
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request principal backed by token claims: id, role, email and employee.
+    Other attributes (first_name, ...) are read from the cached full User;
+    writes such as save() or set_password() need a freshly loaded User.
+    """
+    
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+    
+    @property
+    def role(self):
+        return self.token.get('role') or self.instance.role
+    
+    @property
+    def email(self):
+        return self.token.get('email') or self.instance.email
+    
+    @cached_property
+    def employee_pk(self):
+        if 'employee' in self.token:
+            return self.token['employee']
+        # Tokens issued before the claim existed
+        return self.instance.employee_pk
+    
+    @cached_property
+    def instance(self):
+        """The full User model instance."""
+        return get_cached_user(self.id)
+    
+    def is_admin(self):
+        return self.role == 'admin'
+    
+    def is_hr(self):
+        return self.role == 'hr'
+    
+    def is_admin_or_hr(self):
+        return self.role in ['admin', 'hr']
+    
+    def __getattr__(self, attr):
+        if attr.startswith('_') or attr == 'token':
+            raise AttributeError(attr)
+        return getattr(self.instance, attr)
+    
+    def __eq__(self, other):
+        if isinstance(other, TokenUser) or hasattr(other, '_meta'):
+            return self.id == other.pk
+        return NotImplemented
+    
+    def __hash__(self):
+        return hash(self.id)
+
@@ -0,0 +1,177 @@
+"""
+Refresh token blacklist.
+
+Every refresh rotates the refresh token and revokes the old one, so the
+revoked list grows by one row per refresh. Instead of querying it on every
+refresh, each process keeps a Bloom filter of revoked token ids: a miss
+proves the token was never revoked, and only (rare) hits are confirmed
+against the ``RevokedToken`` table.
+
+The filter is updated in place for revocations made by this process. A
+counter in the shared cache is bumped on every revocation, and a process
+that sees it change loads only the rows added since its last sync. The
+filter is built by a background thread, from the rows that have not expired
+yet (``purge_revoked_tokens`` deletes the others), and rebuilt the same way
+when it holds more ids than it was sized for; until the first build is
+done, lookups go to the table.
+
+The counter only works when every process sees the same ``default`` cache.
+With a per-process one (locmem, dummy) other processes' revocations would
+go unnoticed, so every lookup goes to the (indexed) table instead.
+"""
+import hashlib
+import math
+import os
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from dayflow.caching import shared_cache
+from .models import RevokedToken
+
+GENERATION_KEY = 'accounts:blacklist:generation'
+LOAD_CHUNK_SIZE = 10000
+
+
+class BloomFilter:
+    """Fixed-size set of strings without false negatives; false positives at about ``error_rate``."""
+    
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, value):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(first + i * step) % size for i in range(self.hashes)]
+    
+    def add(self, value):
+        bits = self.bits
+        for position in self._positions(value):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, value):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+def _current_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Restart from a random value so a lost counter cannot come back to one a process already saw
+        cache.add(GENERATION_KEY, random.getrandbits(48), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+class TokenBlacklist:
+    """Revoked refresh token ids: an in-process filter in front of the RevokedToken table."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._last_id = 0
+        self._generation = None
+        self._building = None
+    
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        # A build running in the parent did not come along
+        self._building = None
+    
+    def _sync(self):
+        """The filter, up to date with every revocation; None while there is no usable one."""
+        if not shared_cache():
+            return None
+        generation = _current_generation()
+        bloom = self._filter
+        if bloom is not None and generation == self._generation and bloom.count <= bloom.capacity:
+            return bloom
+        with self._lock:
+            if self._filter is None or self._filter.count > self._filter.capacity:
+                # An overfull filter still has no false negatives, so it serves until replaced
+                self._start_build()
+            if self._filter is not None and generation != self._generation:
+                self._last_id = self._load(self._filter, self._last_id)
+                self._generation = generation
+            return self._filter
+    
+    def _start_build(self):
+        if self._building is None:
+            self._building = threading.Thread(target=self._build, name='token-blacklist-load', daemon=True)
+            self._building.start()
+    
+    def _build(self):
+        try:
+            live = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+            capacity = max(settings.TOKEN_BLACKLIST_FILTER_CAPACITY, 2 * live.count())
+            bloom = BloomFilter(capacity, settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE)
+            last_id = self._load(bloom, 0, live)
+            with self._lock:
+                # The next sync catches up with rows revoked while this was loading
+                self._filter, self._last_id, self._generation = bloom, last_id, None
+        finally:
+            self._building = None
+            connection.close()
+    
+    def _load(self, bloom, after_id, queryset=None):
+        """Add the rows after ``after_id`` to ``bloom``; returns the last id added."""
+        queryset = RevokedToken.objects.all() if queryset is None else queryset
+        rows = queryset.filter(id__gt=after_id).order_by('id').values_list('id', 'jti')
+        for row_id, jti in rows.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            bloom.add(jti)
+            after_id = row_id
+        return after_id
+    
+    def load(self):
+        """Build the filter now and wait for it, e.g. at startup or before a benchmark."""
+        if shared_cache():
+            with self._lock:
+                self._start_build()
+                building = self._building
+            if building is not None:
+                building.join()
+    
+    def is_revoked(self, jti):
+        bloom = self._sync()
+        if bloom is not None and jti not in bloom:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+    
+    def revoke(self, jti, expires_at):
+        RevokedToken.objects.bulk_create([RevokedToken(jti=jti, expires_at=expires_at)], ignore_conflicts=True)
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+        transaction.on_commit(self._announce)
+    
+    def _announce(self):
+        try:
+            generation = cache.incr(GENERATION_KEY)
+        except ValueError:
+            _current_generation()
+            return
+        with self._lock:
+            # Nobody else revoked anything since our last sync, and our own id is already in the filter
+            if self._generation is not None and generation == self._generation + 1:
+                self._generation = generation
+    
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            self._last_id = 0
+            self._generation = None
+
+
+token_blacklist = TokenBlacklist()
+os.register_at_fork(after_in_child=token_blacklist._reset_after_fork)
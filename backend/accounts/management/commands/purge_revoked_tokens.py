@@ -0,0 +1,33 @@
+"""
+Delete revoked refresh tokens that have expired: an expired token is refused
+on its own, so its blacklist row is no longer needed.
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import RevokedToken
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked refresh tokens past their expiry'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Rows deleted per statement, to keep locks short')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted')
+    
+    def handle(self, *args, **options):
+        expired = RevokedToken.objects.filter(expires_at__lte=timezone.now())
+        if options['dry_run']:
+            self.stdout.write(f"Would delete {expired.count()} expired tokens")
+            return
+        
+        deleted = 0
+        while True:
+            ids = list(expired.order_by('expires_at').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(f"Deleted {deleted} expired tokens")
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:09
+
+import re
+
+from django.db import migrations, models
+
+LOGIN_ID_PATTERN = re.compile(r"^(.*?\d{4})(\d{4,})$")
+
+
+def seed_sequences(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+    LoginIdSequence = apps.get_model("accounts", "LoginIdSequence")
+
+    highest = {}
+    login_ids = User.objects.exclude(login_id__isnull=True).values_list(
+        "login_id", flat=True
+    )
+    for login_id in login_ids.iterator():
+        match = LOGIN_ID_PATTERN.match(login_id)
+        if match:
+            prefix, serial = match.group(1), int(match.group(2))
+            highest[prefix] = max(highest.get(prefix, 0), serial)
+    LoginIdSequence.objects.bulk_create(
+        [
+            LoginIdSequence(prefix=prefix, last_value=serial)
+            for prefix, serial in highest.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_user_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoginIdSequence",
+            fields=[
+                (
+                    "prefix",
+                    models.CharField(max_length=16, primary_key=True, serialize=False),
+                ),
+                ("last_value", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_revokedtoken"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="loginidsequence",
+            name="prefix",
+            field=models.CharField(max_length=18, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="login_id",
+            field=models.CharField(blank=True, max_length=24, null=True, unique=True),
+        ),
+    ]
@@ -2,8 +2,11 @@
 Custom User model for Dayflow HRMS with role-based access.
 """
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.utils import timezone
+from django.utils.functional import cached_property
 import secrets
 import string
 
@@ -37,7 +40,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     ]
     
     email = models.EmailField(unique=True)
-    login_id = models.CharField(max_length=20, unique=True, blank=True, null=True)
+    login_id = models.CharField(max_length=24, unique=True, blank=True, null=True)
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='employee')
@@ -53,10 +56,34 @@ class User(AbstractBaseUser, PermissionsMixin):
     
     class Meta:
         ordering = ['-date_joined']
+        indexes = [
+            # Trigram indexes for employee search (see employees.search).
+            # UPPER() matches how icontains/istartswith are compiled on PostgreSQL;
+            # the plain name indexes serve the word-similarity (typo) operator.
+            GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='user_first_name_upper_trgm'),
+            GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='user_last_name_upper_trgm'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='user_email_upper_trgm'),
+            GinIndex(fields=['first_name'], opclasses=['gin_trgm_ops'], name='user_first_name_trgm'),
+            GinIndex(fields=['last_name'], opclasses=['gin_trgm_ops'], name='user_last_name_trgm'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
     
+    # Copied into cached org chart nodes (see employees.orgchart)
+    NAME_FIELDS = ('first_name', 'last_name')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_names = tuple(instance.__dict__.get(f) for f in cls.NAME_FIELDS)
+        return instance
+    
+    def name_changed(self):
+        """Whether this save renames a user that was loaded from the database."""
+        loaded = getattr(self, '_loaded_names', None)
+        return loaded is not None and loaded != tuple(self.__dict__.get(f) for f in self.NAME_FIELDS)
+    
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
@@ -70,12 +97,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     def is_admin_or_hr(self):
         return self.role in ['admin', 'hr']
     
+    @cached_property
+    def employee_pk(self):
+        """Primary key of the user's employee profile, or None (token principals carry it as a claim)."""
+        from employees.models import Employee
+        return Employee.objects.filter(user_id=self.pk).values_list('pk', flat=True).first()
+    
     @staticmethod
-    def generate_login_id(first_name, last_name, company_initials='OI', year=None):
-        """
-        Generate login ID in format: [Company][First 2 of first name][First 2 of last name][Year][Serial]
-        Example: OIJODO20230001
-        """
+    def login_id_prefix(first_name, last_name, company_initials='OI', year=None):
+        """Everything but the serial: [Company][First 2 of first name][First 2 of last name][Year]."""
         if year is None:
             year = timezone.now().year
         
@@ -83,12 +113,19 @@ class User(AbstractBaseUser, PermissionsMixin):
         first_part = first_name[:2].upper() if len(first_name) >= 2 else first_name.upper().ljust(2, 'X')
         last_part = last_name[:2].upper() if len(last_name) >= 2 else last_name.upper().ljust(2, 'X')
         
+        return f"{company_initials}{first_part}{last_part}{year}"
+    
+    @staticmethod
+    def generate_login_id(first_name, last_name, company_initials='OI', year=None):
+        """
+        Generate login ID in format: [Company][First 2 of first name][First 2 of last name][Year][Serial]
+        Example: OIJODO20230001
+        """
         # Get serial number for this year
-        prefix = f"{company_initials}{first_part}{last_part}{year}"
-        existing_count = User.objects.filter(login_id__startswith=prefix).count()
-        serial = str(existing_count + 1).zfill(4)
+        prefix = User.login_id_prefix(first_name, last_name, company_initials, year)
+        serial = LoginIdSequence.reserve(prefix)
         
-        return f"{prefix}{serial}"
+        return LoginIdSequence.format(prefix, serial)
     
     @staticmethod
     def generate_password(length=10):
@@ -103,6 +140,66 @@ class User(AbstractBaseUser, PermissionsMixin):
         super().save(*args, **kwargs)
 
 
+class LoginIdSequence(models.Model):
+    """
+    Last serial handed out per login id prefix (e.g. OIJODO2023).
+    Rows are locked while being incremented, so concurrent sign-ups never
+    share a serial, and bulk imports can reserve a whole block at once.
+    """
+    # Company initials (up to 10) + 2 + 2 letters of the name + the year
+    prefix = models.CharField(max_length=18, primary_key=True)
+    last_value = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.prefix}: {self.last_value}"
+    
+    @staticmethod
+    def format(prefix, serial):
+        return f"{prefix}{str(serial).zfill(4)}"
+    
+    @classmethod
+    def reserve_many(cls, counts):
+        """
+        Reserve ``counts[prefix]`` consecutive serials for every prefix.
+        Returns {prefix: first serial of the block}.
+        """
+        prefixes = sorted(counts)
+        with transaction.atomic():
+            known = set(cls.objects.filter(prefix__in=prefixes).values_list('prefix', flat=True))
+            missing = [prefix for prefix in prefixes if prefix not in known]
+            if missing:
+                # Login ids that predate the counters were seeded by migration 0004
+                cls.objects.bulk_create([cls(prefix=prefix) for prefix in missing], ignore_conflicts=True)
+            # Lock in primary key order so overlapping reservations cannot deadlock
+            sequences = list(cls.objects.select_for_update().filter(prefix__in=prefixes).order_by('prefix'))
+            starts = {}
+            for sequence in sequences:
+                starts[sequence.prefix] = sequence.last_value + 1
+                sequence.last_value += counts[sequence.prefix]
+            cls.objects.bulk_update(sequences, ['last_value'], batch_size=1000)
+        return starts
+    
+    @classmethod
+    def reserve(cls, prefix, count=1):
+        """Reserve ``count`` serials for one prefix; returns the first."""
+        return cls.reserve_many({prefix: count})[prefix]
+
+
+class RevokedToken(models.Model):
+    """
+    Refresh token ids (jti) that may no longer be used: rotated or logged out.
+    Rows are only needed until the token would have expired anyway, so
+    purge_revoked_tokens deletes them after ``expires_at``. Lookups go through
+    the in-process filter in accounts.blacklist first.
+    """
+    id = models.BigAutoField(primary_key=True)
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    
+    def __str__(self):
+        return self.jti
+
+
 class CompanySettings(models.Model):
     """Company-wide settings."""
     company_name = models.CharField(max_length=200, default='Odoo India')
@@ -2,6 +2,7 @@
 Custom permissions for role-based access control.
 """
 from rest_framework import permissions
+from . import policies
 
 
 class IsAdmin(permissions.BasePermission):
@@ -36,17 +37,21 @@ class IsOwnerOrAdminHR(permissions.BasePermission):
     """Allow access to record owner or admin/HR users."""
     
     def has_object_permission(self, request, view, obj):
-        # Admin and HR can access any record
-        if request.user.role in ['admin', 'hr']:
+        # Ids on the record against the token claims (see accounts.policies)
+        return policies.allows(request.user, obj, write=True)
+
+
+class HasRowAccess(permissions.BasePermission):
+    """
+    Object check for views whose queryset already went through
+    ``policies.visible``: reading anything listed is fine, changing a record
+    needs write access to it (managers may only read their reports' rows).
+    """
+    
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS:
             return True
-        
-        # Check if user owns the record
-        if hasattr(obj, 'user'):
-            return obj.user == request.user
-        if hasattr(obj, 'employee') and hasattr(obj.employee, 'user'):
-            return obj.employee.user == request.user
-        
-        return False
+        return policies.allows(request.user, obj, write=True)
 
 
 class ReadOnlyForEmployee(permissions.BasePermission):
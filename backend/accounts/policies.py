@@ -0,0 +1,104 @@
+"""
+Row-level access rules, declared once per model.
+
+A ``RowPolicy`` says how a row belongs to an employee and who besides Admin
+and HR may see it: the employee themselves and, where enabled, their
+manager. The same rules are applied two ways:
+
+* ``visible(queryset, user)`` adds them to a queryset as a filter, so lists
+  and ``get_object()`` only ever load permitted rows;
+* ``allows(user, obj)`` checks one loaded row by comparing ids on the row
+  with the token claims - no related rows are fetched. The only query is the
+  user's direct reports, loaded once per request when a manager rule needs it.
+
+Writes (``write=True``) are limited to Admin/HR and the owner; manager rules
+only grant reading.
+"""
+from django.db.models import Q
+
+ALL_ROWS_ROLES = ('admin', 'hr')
+
+
+class RowPolicy:
+    """
+    ``employee_field`` is the foreign key from the model to Employee, or None
+    when the rows are employees themselves. With ``managers_read`` a user also
+    sees the rows of employees who report to them.
+    """
+    
+    def __init__(self, employee_field='employee', managers_read=False):
+        self.employee_field = employee_field
+        self.managers_read = managers_read
+    
+    def _lookup(self, name):
+        """Path from the row to a field of its Employee."""
+        return name if self.employee_field is None else f'{self.employee_field}__{name}'
+    
+    def _employee_pk(self, obj):
+        return obj.pk if self.employee_field is None else getattr(obj, f'{self.employee_field}_id')
+    
+    def condition(self, user, write=False):
+        """Q for the rows ``user`` may access, or None when that is every row."""
+        if user.role in ALL_ROWS_ROLES:
+            return None
+        if self.employee_field is None:
+            condition = Q(user_id=user.id)
+        elif user.employee_pk is not None:
+            condition = Q(**{f'{self.employee_field}_id': user.employee_pk})
+        else:
+            condition = Q(pk__in=[])
+        if self.managers_read and not write:
+            # Employee.manager points at the manager's User, so this is one join at most
+            condition |= Q(**{self._lookup('manager_id'): user.id})
+        return condition
+    
+    def filter(self, queryset, user, write=False):
+        condition = self.condition(user, write)
+        return queryset if condition is None else queryset.filter(condition)
+    
+    def allows(self, user, obj, write=False):
+        if self.employee_field is None and obj.user_id == user.id:
+            return True
+        return self.allows_employee(user, self._employee_pk(obj), write)
+    
+    def allows_employee(self, user, employee_pk, write=False):
+        """Whether ``user`` may access this model's rows belonging to employee ``employee_pk``."""
+        if user.role in ALL_ROWS_ROLES:
+            return True
+        if employee_pk is not None and employee_pk == user.employee_pk:
+            return True
+        return self.managers_read and not write and employee_pk in direct_report_pks(user)
+
+
+def direct_report_pks(user):
+    """Employee pks reporting directly to ``user``; one query, remembered on the principal."""
+    pks = getattr(user, '_direct_report_pks', None)
+    if pks is None:
+        from employees.models import Employee
+        pks = frozenset(Employee.objects.filter(manager_id=user.id).values_list('pk', flat=True))
+        user._direct_report_pks = pks
+    return pks
+
+
+POLICIES = {
+    'employees.Employee': RowPolicy(employee_field=None),
+    'employees.Document': RowPolicy(),
+    'attendance.Attendance': RowPolicy(managers_read=True),
+    'leaves.LeaveRequest': RowPolicy(managers_read=True),
+    'leaves.LeaveBalance': RowPolicy(),
+    'payroll.SalaryStructure': RowPolicy(),
+    'payroll.PaySlip': RowPolicy(),
+}
+
+
+def policy_for(model):
+    return POLICIES[model._meta.label]
+
+
+def visible(queryset, user, write=False):
+    """``queryset`` narrowed to the rows ``user`` may see (or change, with ``write``)."""
+    return policy_for(queryset.model).filter(queryset, user, write)
+
+
+def allows(user, obj, write=False):
+    return policy_for(type(obj)).allows(user, obj, write)
@@ -0,0 +1,14 @@
+"""
+Signal handlers for accounts.
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from dayflow import refcache  # noqa: F401 - connects the reference data invalidation
+from .authentication import forget_cached_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_cached_user(instance.pk)
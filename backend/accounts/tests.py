@@ -1,3 +1,84 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from dayflow.testing import api_client, make_employee
+from .models import LoginIdSequence, User
+from .tokens import DayflowRefreshToken
+
+
+class RefreshTokenRevocationTests(TestCase):
+
+    def setUp(self):
+        self.user, _ = make_employee('john@example.com', 'John', 'Doe')
+        self.client = APIClient()
+    
+    def refresh(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': token}, format='json')
+    
+    def test_rotated_token_cannot_be_reused(self):
+        token = str(DayflowRefreshToken.for_user(self.user))
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], token)
+        
+        self.assertEqual(self.refresh(token).status_code, 401)
+        # The token it was rotated into still works
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+    
+    def test_logged_out_token_cannot_be_used(self):
+        token = str(DayflowRefreshToken.for_user(self.user))
+        response = api_client(self.user).post('/api/auth/logout/', {'refresh': token}, format='json')
+        self.assertEqual(response.status_code, 200)
+        
+        self.assertEqual(self.refresh(token).status_code, 401)
+
+
+class TokenClaimsTests(TestCase):
+
+    def setUp(self):
+        self.user, _ = make_employee('john@example.com', 'John', 'Doe')
+        self.client = APIClient()
+    
+    def refresh(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': token}, format='json')
+    
+    def test_refresh_reads_current_claims(self):
+        token = str(DayflowRefreshToken.for_user(self.user))
+        User.objects.filter(pk=self.user.pk).update(role='hr')
+        
+        access = DayflowRefreshToken(self.refresh(token).data['refresh']).access_token
+        self.assertEqual(access['role'], 'hr')
+
+
+class LoginIdTests(TestCase):
+
+    def create_user(self, email, first_name='John', last_name='Doe'):
+        return User.objects.create_user(email=email, password=None, first_name=first_name, last_name=last_name)
+    
+    def test_serials_count_up_per_prefix(self):
+        prefix = User.login_id_prefix('John', 'Doe')
+        first = self.create_user('john1@example.com')
+        second = self.create_user('john2@example.com', 'Joanna', 'Dorsey')
+        other = self.create_user('priya@example.com', 'Priya', 'Patel')
+        
+        self.assertEqual(first.login_id, f'{prefix}0001')
+        self.assertEqual(second.login_id, f'{prefix}0002')
+        self.assertEqual(other.login_id, f"{User.login_id_prefix('Priya', 'Patel')}0001")
+    
+    def test_short_names_are_padded(self):
+        self.assertEqual(User.login_id_prefix('Al', 'X', year=2024), 'OIALXX2024')
+    
+    def test_reserve_many_hands_out_blocks(self):
+        LoginIdSequence.objects.create(prefix='OIJODO2024', last_value=7)
+        
+        starts = LoginIdSequence.reserve_many({'OIJODO2024': 3, 'OIPRPA2024': 2})
+        self.assertEqual(starts, {'OIJODO2024': 8, 'OIPRPA2024': 1})
+        self.assertEqual(LoginIdSequence.reserve('OIJODO2024'), 11)
+        self.assertEqual(LoginIdSequence.reserve('OIPRPA2024'), 3)
+    
+    def test_long_company_initials_fit(self):
+        prefix = User.login_id_prefix('John', 'Doe', company_initials='ABCDEFGHIJ')
+        
+        serial = LoginIdSequence.reserve(prefix)
+        self.assertEqual(LoginIdSequence.objects.get(prefix=prefix).last_value, serial)
+        self.assertLessEqual(len(LoginIdSequence.format(prefix, serial)), User._meta.get_field('login_id').max_length)
@@ -0,0 +1,94 @@
+"""
+JWTs carrying the identity claims views need to authorize a request.
+
+Besides the user id, tokens hold the role, email and employee profile
+(pk and employee_id). Access tokens copy these from their refresh token,
+and every refresh re-reads them from the database, so a role change or
+deactivation takes effect within one access token lifetime.
+
+Rotated and logged-out refresh tokens are revoked through accounts.blacklist
+rather than simplejwt's token_blacklist app, which would query two tables on
+every refresh.
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from .blacklist import token_blacklist
+
+
+def identity_claims(user):
+    """Claims describing ``user`` and their employee profile (one query for the profile)."""
+    from employees.models import Employee
+    
+    profile = Employee.objects.filter(user_id=user.pk).values_list('pk', 'employee_id').first()
+    employee_pk, employee_id = profile or (None, None)
+    return {
+        'role': user.role,
+        'email': user.email,
+        'employee': employee_pk,
+        'employee_id': employee_id,
+    }
+
+
+class DayflowRefreshToken(RefreshToken):
+    """Refresh token whose claims (and those of its access tokens) identify the user."""
+    
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.stamp(user)
+        return token
+    
+    def stamp(self, user):
+        for claim, value in identity_claims(user).items():
+            self[claim] = value
+    
+    def verify(self, *args, **kwargs):
+        # Expired tokens are refused before the blacklist is consulted
+        super().verify(*args, **kwargs)
+        self.check_blacklist()
+    
+    def check_blacklist(self):
+        if token_blacklist.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+    
+    def blacklist(self):
+        token_blacklist.revoke(self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(self.payload['exp']))
+    
+    def outstand(self):
+        """Issued tokens are not recorded, only revoked ones."""
+        return None
+
+
+class DayflowTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh that re-checks the user and refreshes their identity claims."""
+    
+    token_class = DayflowRefreshToken
+    
+    def validate(self, attrs):
+        from .models import User
+        
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(pk=refresh.payload.get(api_settings.USER_ID_CLAIM)).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        refresh.stamp(user)
+        
+        data = {'access': str(refresh.access_token)}
+        
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            
+            data['refresh'] = str(refresh)
+        
+        return data
@@ -5,7 +5,9 @@ from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from dayflow.routers import ReplicaReadsMixin
+from dayflow.throttling import RATE_LIMITED
+from .tokens import DayflowRefreshToken
 from .models import User
 from .serializers import (
     UserSerializer, 
@@ -22,6 +24,8 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
     serializer_class = RegisterSerializer
+    throttle_classes = RATE_LIMITED
+    throttle_scope = 'register'
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -29,7 +33,7 @@ class RegisterView(generics.CreateAPIView):
         user = serializer.save()
         
         # Generate tokens for the new user
-        refresh = RefreshToken.for_user(user)
+        refresh = DayflowRefreshToken.for_user(user)
         
         return Response({
             'message': 'Registration successful',
@@ -45,13 +49,16 @@ class LoginView(APIView):
     """User login endpoint."""
     
     permission_classes = [AllowAny]
+    # Every attempt runs the password hasher, so bursts are refused before it
+    throttle_classes = RATE_LIMITED
+    throttle_scope = 'login'
     
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         user = serializer.validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        refresh = DayflowRefreshToken.for_user(user)
         
         return Response({
             'message': 'Login successful',
@@ -72,7 +79,7 @@ class LogoutView(APIView):
         try:
             refresh_token = request.data.get('refresh')
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = DayflowRefreshToken(refresh_token)
                 token.blacklist()
             return Response({'message': 'Logout successful'})
         except Exception:
@@ -86,7 +93,8 @@ class ProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     
     def get_object(self):
-        return self.request.user
+        # Token principals only carry claims; updates need the model instance
+        return User.objects.get(pk=self.request.user.id)
 
 
 class ChangePasswordView(APIView):
@@ -95,16 +103,17 @@ class ChangePasswordView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
+        user = User.objects.get(pk=request.user.id)
+        serializer = ChangePasswordSerializer(data=request.data, context={'request': request, 'user': user})
         serializer.is_valid(raise_exception=True)
         
-        request.user.set_password(serializer.validated_data['new_password'])
-        request.user.save()
+        user.set_password(serializer.validated_data['new_password'])
+        user.save()
         
         return Response({'message': 'Password changed successfully'})
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(ReplicaReadsMixin, generics.ListAPIView):
     """List all users - Admin/HR only."""
     
     queryset = User.objects.all()
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0001_initial"),
+        ("leaves", "0002_leaverequest_attachment_leavetype_category_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="attendance",
+            name="leave_request",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Approved leave this row was materialized from",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="attendance_records",
+                to="leaves.leaverequest",
+            ),
+        ),
+    ]
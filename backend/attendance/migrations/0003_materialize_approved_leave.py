@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:52
+
+from datetime import timedelta
+
+from django.db import migrations
+
+
+def materialize_approved_leave(apps, schema_editor):
+    Attendance = apps.get_model("attendance", "Attendance")
+    LeaveRequest = apps.get_model("leaves", "LeaveRequest")
+
+    for leave in LeaveRequest.objects.filter(status="approved").iterator():
+        Attendance.objects.filter(
+            employee_id=leave.employee_id,
+            date__gte=leave.start_date,
+            date__lte=leave.end_date,
+            check_in__isnull=True,
+        ).update(status="on_leave", leave_request=leave)
+
+        rows = []
+        current = leave.start_date
+        while current <= leave.end_date:
+            if current.weekday() < 5:
+                rows.append(
+                    Attendance(
+                        employee_id=leave.employee_id,
+                        date=current,
+                        status="on_leave",
+                        leave_request=leave,
+                    )
+                )
+            current += timedelta(days=1)
+        Attendance.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def remove_materialized_leave(apps, schema_editor):
+    Attendance = apps.get_model("attendance", "Attendance")
+    Attendance.objects.filter(
+        leave_request__isnull=False, check_in__isnull=True
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0002_attendance_leave_request"),
+    ]
+
+    operations = [
+        migrations.RunPython(materialize_approved_leave, remove_materialized_leave),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0003_materialize_approved_leave"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="attendance",
+            name="status_before_leave",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("present", "Present"),
+                    ("absent", "Absent"),
+                    ("late", "Late"),
+                    ("half_day", "Half Day"),
+                    ("on_leave", "On Leave"),
+                ],
+                max_length=20,
+            ),
+        ),
+    ]
@@ -22,6 +22,17 @@ class Attendance(models.Model):
     check_in = models.DateTimeField(null=True, blank=True)
     check_out = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='present')
+    leave_request = models.ForeignKey(
+        'leaves.LeaveRequest',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='attendance_records',
+        help_text="Approved leave this row was materialized from"
+    )
+    # Status of an existing row before leave covered it, restored if the leave is cancelled;
+    # blank for rows the leave created
+    status_before_leave = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -41,9 +52,14 @@ class Attendance(models.Model):
             return round(duration.total_seconds() / 3600, 2)
         return 0
     
+    def status_for_check_in(self):
+        """Status earned by the check-in time: after 9:30 AM is late."""
+        if self.check_in.hour > 9 or (self.check_in.hour == 9 and self.check_in.minute > 30):
+            return 'late'
+        return 'present'
+    
     def save(self, *args, **kwargs):
-        # Auto-set status based on check-in time (after 9:30 AM = late)
+        # Auto-set status based on check-in time
         if self.check_in and self.status == 'present':
-            if self.check_in.hour > 9 or (self.check_in.hour == 9 and self.check_in.minute > 30):
-                self.status = 'late'
+            self.status = self.status_for_check_in()
         super().save(*args, **kwargs)
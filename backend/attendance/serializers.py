@@ -2,10 +2,11 @@
 Serializers for attendance management.
 """
 from rest_framework import serializers
+from dayflow.serializers import SparseFieldsetsMixin
 from .models import Attendance
 
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for attendance records."""
     
     employee_name = serializers.SerializerMethodField()
@@ -20,6 +21,12 @@ class AttendanceSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'work_hours']
+        expandable_fields = {
+            'employee': ('employees.serializers.EmployeeDirectorySerializer', {'read_only': True}),
+        }
+        related_fields = {
+            'employee__user': ['employee', 'employee_id', 'employee_name'],
+        }
     
     def get_employee_name(self, obj):
         return obj.employee.user.full_name
@@ -1,3 +1,87 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
 
-# Create your tests here.
+from django.test import AsyncRequestFactory, TestCase
+from django.utils import timezone
+
+from accounts.tokens import DayflowRefreshToken
+from dayflow.testing import api_client, assert_query_budget, make_employee
+from .models import Attendance
+from .views import TodayAttendanceAsyncView, WeeklyAttendanceAsyncView
+
+
+class AttendanceQueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr, _ = make_employee('hr@example.com', 'Sarah', 'Johnson', role='hr', department='hr')
+        cls.user, employee = make_employee('john@example.com', 'John', 'Doe', manager=cls.hr)
+        employees = [employee] + [
+            make_employee(f'dev{index}@example.com', 'Dev', f'Number{index}', manager=cls.user)[1]
+            for index in range(5)
+        ]
+        today = timezone.localdate()
+        for employee in employees:
+            for days_ago in range(10):
+                day = today - timedelta(days=days_ago)
+                check_in = timezone.make_aware(datetime.combine(day, datetime.min.time()) + timedelta(hours=9))
+                Attendance.objects.create(
+                    employee=employee, date=day, check_in=check_in, check_out=check_in + timedelta(hours=8)
+                )
+    
+    def test_employee_views(self):
+        client = api_client(self.user)
+        for path in ('/api/attendance/today/', '/api/attendance/weekly/', '/api/attendance/summary/'):
+            with self.subTest(path=path):
+                response = client.get(path)
+                self.assertEqual(response.status_code, 200)
+                assert_query_budget(response)
+    
+    def test_list(self):
+        for user in (self.hr, self.user):
+            response = api_client(user).get('/api/attendance/')
+            self.assertEqual(response.status_code, 200)
+            assert_query_budget(response)
+    
+    def test_all_employees_today(self):
+        response = api_client(self.hr).get('/api/attendance/all/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 6)
+        assert_query_budget(response)
+
+
+class SparseFieldsetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, employee = make_employee('john@example.com', 'John', 'Doe')
+        check_in = timezone.now().replace(microsecond=0)
+        Attendance.objects.create(employee=employee, date=timezone.localdate(), check_in=check_in)
+        cls.token = str(DayflowRefreshToken.for_user(cls.user).access_token)
+    
+    def test_today(self):
+        response = api_client(self.user).get('/api/attendance/today/', {'fields': 'date'})
+        self.assertEqual(response.data, {'date': str(timezone.localdate())})
+    
+    async def test_async_views(self):
+        for view, path in ((TodayAttendanceAsyncView, '/api/attendance/today/'), (WeeklyAttendanceAsyncView, '/api/attendance/weekly/')):
+            with self.subTest(path=path):
+                request = AsyncRequestFactory().get(path, {'fields': 'date'}, headers={'Authorization': f'Bearer {self.token}'})
+                response = await view.as_view()(request)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(f'{{"date":"{timezone.localdate()}"}}', response.content.decode())
+
+
+class CheckInStatusTests(TestCase):
+
+    def setUp(self):
+        _, self.employee = make_employee('john@example.com', 'John', 'Doe')
+    
+    def check_in_at(self, hour, minute):
+        check_in = timezone.make_aware(datetime(2026, 3, 2, hour, minute))
+        return Attendance.objects.create(employee=self.employee, date=check_in.date(), check_in=check_in)
+    
+    def test_on_time(self):
+        self.assertEqual(self.check_in_at(9, 30).status, 'present')
+    
+    def test_late(self):
+        self.assertEqual(self.check_in_at(9, 31).status, 'late')
@@ -1,22 +1,29 @@
 """
 URL patterns for attendance module.
 """
+from django.conf import settings
 from django.urls import path
 from .views import (
     CheckInView,
     CheckOutView,
     TodayAttendanceView,
+    TodayAttendanceAsyncView,
     AttendanceListView,
     WeeklyAttendanceView,
+    WeeklyAttendanceAsyncView,
     AttendanceSummaryView,
     AllEmployeesAttendanceView,
 )
 
+# Async versions under ASGI (see dayflow.async_views)
+today_view = TodayAttendanceAsyncView if settings.ASYNC_READ_VIEWS else TodayAttendanceView
+weekly_view = WeeklyAttendanceAsyncView if settings.ASYNC_READ_VIEWS else WeeklyAttendanceView
+
 urlpatterns = [
     path('check-in/', CheckInView.as_view(), name='check_in'),
     path('check-out/', CheckOutView.as_view(), name='check_out'),
-    path('today/', TodayAttendanceView.as_view(), name='today_attendance'),
-    path('weekly/', WeeklyAttendanceView.as_view(), name='weekly_attendance'),
+    path('today/', today_view.as_view(), name='today_attendance'),
+    path('weekly/', weekly_view.as_view(), name='weekly_attendance'),
     path('summary/', AttendanceSummaryView.as_view(), name='attendance_summary'),
     path('all/', AllEmployeesAttendanceView.as_view(), name='all_attendance'),
     path('', AttendanceListView.as_view(), name='attendance_list'),
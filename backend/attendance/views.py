@@ -3,12 +3,18 @@ Views for attendance management.
 """
 from datetime import datetime, timedelta
 from django.utils import timezone
-from django.db.models import Sum, Count, Q
+from django.db.models import Sum, Count, Q, F, ExpressionWrapper, DurationField
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from accounts.permissions import IsAdminOrHR
+from accounts.policies import policy_for, visible
+from dayflow import metrics
+from dayflow.async_views import AsyncReadView, json_response
+from dayflow.routers import ReplicaReadsMixin
+from dayflow.throttling import RATE_LIMITED
+from employees.current import CurrentEmployeeMixin
 from employees.models import Employee
 from .models import Attendance
 from .serializers import (
@@ -19,25 +25,21 @@ from .serializers import (
 )
 
 
-class CheckInView(APIView):
+class CheckInView(CurrentEmployeeMixin, APIView):
     """Clock in for the day."""
     
     permission_classes = [IsAuthenticated]
+    throttle_classes = RATE_LIMITED
+    throttle_scope = 'check_in'
     
     def post(self, request):
-        try:
-            employee = Employee.objects.get(user=request.user)
-        except Employee.DoesNotExist:
-            return Response(
-                {'error': 'Employee profile not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        employee_pk = self.get_current_employee_pk()
         
         today = timezone.now().date()
         
         # Check if already checked in today
         attendance, created = Attendance.objects.get_or_create(
-            employee=employee,
+            employee_id=employee_pk,
             date=today,
             defaults={'check_in': timezone.now()}
         )
@@ -55,30 +57,25 @@ class CheckInView(APIView):
                 attendance.notes = serializer.validated_data.get('notes', '')
             attendance.save()
         
+        metrics.check_ins.inc()
         return Response({
             'message': 'Check-in successful',
             'attendance': AttendanceSerializer(attendance).data
         })
 
 
-class CheckOutView(APIView):
+class CheckOutView(CurrentEmployeeMixin, APIView):
     """Clock out for the day."""
     
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
-        try:
-            employee = Employee.objects.get(user=request.user)
-        except Employee.DoesNotExist:
-            return Response(
-                {'error': 'Employee profile not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        employee_pk = self.get_current_employee_pk()
         
         today = timezone.now().date()
         
         try:
-            attendance = Attendance.objects.get(employee=employee, date=today)
+            attendance = Attendance.objects.get(employee_id=employee_pk, date=today)
         except Attendance.DoesNotExist:
             return Response(
                 {'error': 'No check-in found for today'},
@@ -98,57 +95,76 @@ class CheckOutView(APIView):
                 attendance.notes += f"\n{serializer.validated_data['notes']}"
         attendance.save()
         
+        metrics.check_outs.inc()
         return Response({
             'message': 'Check-out successful',
             'attendance': AttendanceSerializer(attendance).data
         })
 
 
-class TodayAttendanceView(APIView):
+class TodayAttendanceView(CurrentEmployeeMixin, APIView):
     """Get today's attendance status."""
     
     permission_classes = [IsAuthenticated]
+    query_budget = 1
     
     def get(self, request):
+        employee_pk = self.get_current_employee_pk()
+        
+        today = timezone.now().date()
+        
         try:
-            employee = Employee.objects.get(user=request.user)
-        except Employee.DoesNotExist:
-            return Response(
-                {'error': 'Employee profile not found'},
-                status=status.HTTP_404_NOT_FOUND
+            attendance = AttendanceSerializer.select_related_for(request, Attendance.objects).get(
+                employee_id=employee_pk, date=today
             )
+            return Response(AttendanceSerializer(attendance, context={'request': request}).data)
+        except Attendance.DoesNotExist:
+            return Response({
+                'message': 'Not checked in yet',
+                'date': today,
+                'checked_in': False
+            })
+
+
+class TodayAttendanceAsyncView(AsyncReadView):
+    """Async version of TodayAttendanceView."""
+    
+    query_budget = 1
+    
+    async def get(self, request):
+        employee_pk = request.user.employee_pk
+        if employee_pk is None:
+            return json_response({'error': 'Employee profile not found'}, status=status.HTTP_404_NOT_FOUND)
         
         today = timezone.now().date()
         
         try:
-            attendance = Attendance.objects.get(employee=employee, date=today)
-            return Response(AttendanceSerializer(attendance).data)
+            attendance = await AttendanceSerializer.select_related_for(request, Attendance.objects).aget(
+                employee_id=employee_pk, date=today
+            )
+            return json_response(AttendanceSerializer(attendance, context={'request': request}).data)
         except Attendance.DoesNotExist:
-            return Response({
+            return json_response({
                 'message': 'Not checked in yet',
                 'date': today,
                 'checked_in': False
             })
 
 
-class AttendanceListView(generics.ListAPIView):
+class AttendanceListView(ReplicaReadsMixin, generics.ListAPIView):
     """List attendance records."""
     
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 1
     pagination_class = None
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Attendance.objects.select_related('employee__user')
+        queryset = AttendanceSerializer.select_related_for(self.request, Attendance.objects.all())
         
-        # Admin/HR see all, employees see only their own
-        if user.role not in ['admin', 'hr']:
-            try:
-                employee = Employee.objects.get(user=user)
-                queryset = queryset.filter(employee=employee)
-            except Employee.DoesNotExist:
-                return Attendance.objects.none()
+        # Admin/HR see all, managers also their direct reports, employees only their own
+        queryset = visible(queryset, user)
         
         # Apply filters
         employee_id = self.request.query_params.get('employee_id')
@@ -157,9 +173,9 @@ class AttendanceListView(generics.ListAPIView):
         end_date = self.request.query_params.get('end_date')
         status_filter = self.request.query_params.get('status')
         
-        if employee_id and user.role in ['admin', 'hr']:
+        if employee_id:
             queryset = queryset.filter(employee__employee_id=employee_id)
-        if employee_pk and user.role in ['admin', 'hr']:
+        if employee_pk:
             queryset = queryset.filter(employee__id=employee_pk)
         if start_date:
             queryset = queryset.filter(date__gte=start_date)
@@ -171,15 +187,15 @@ class AttendanceListView(generics.ListAPIView):
         return queryset
 
 
-class WeeklyAttendanceView(APIView):
+class WeeklyAttendanceView(ReplicaReadsMixin, APIView):
     """Get weekly attendance summary."""
     
     permission_classes = [IsAuthenticated]
+    query_budget = 1
     
     def get(self, request):
-        try:
-            employee = Employee.objects.get(user=request.user)
-        except Employee.DoesNotExist:
+        employee_pk = request.user.employee_pk
+        if employee_pk is None:
             # If admin/HR without profile, return empty structure (Admin view)
             today = timezone.now().date()
             start_of_week = today - timedelta(days=today.weekday())
@@ -195,8 +211,8 @@ class WeeklyAttendanceView(APIView):
         start_of_week = today - timedelta(days=today.weekday())
         end_of_week = start_of_week + timedelta(days=6)
         
-        records = Attendance.objects.filter(
-            employee=employee,
+        records = AttendanceSerializer.select_related_for(request, Attendance.objects).filter(
+            employee_id=employee_pk,
             date__gte=start_of_week,
             date__lte=end_of_week
         ).order_by('date')
@@ -204,14 +220,44 @@ class WeeklyAttendanceView(APIView):
         return Response({
             'week_start': start_of_week,
             'week_end': end_of_week,
-            'records': AttendanceSerializer(records, many=True).data
+            'records': AttendanceSerializer(records, many=True, context={'request': request}).data
         })
 
 
-class AttendanceSummaryView(APIView):
+class WeeklyAttendanceAsyncView(AsyncReadView):
+    """Async version of WeeklyAttendanceView."""
+    
+    use_replica = True
+    query_budget = 1
+    
+    async def get(self, request):
+        today = timezone.now().date()
+        start_of_week = today - timedelta(days=today.weekday())
+        end_of_week = start_of_week + timedelta(days=6)
+        
+        employee_pk = request.user.employee_pk
+        records = []
+        if employee_pk is not None:
+            records = [
+                record async for record in AttendanceSerializer.select_related_for(request, Attendance.objects).filter(
+                    employee_id=employee_pk,
+                    date__gte=start_of_week,
+                    date__lte=end_of_week
+                ).order_by('date')
+            ]
+        
+        return json_response({
+            'week_start': start_of_week,
+            'week_end': end_of_week,
+            'records': AttendanceSerializer(records, many=True, context={'request': request}).data
+        })
+
+
+class AttendanceSummaryView(ReplicaReadsMixin, CurrentEmployeeMixin, APIView):
     """Get attendance summary for a date range."""
     
     permission_classes = [IsAuthenticated]
+    query_budget = 1
     
     def get(self, request):
         employee_id = request.query_params.get('employee_id')
@@ -225,38 +271,39 @@ class AttendanceSummaryView(APIView):
         if not end_date:
             end_date = timezone.now().date()
         
-        # Get employee
-        if request.user.role in ['admin', 'hr'] and employee_id:
-            try:
-                employee = Employee.objects.get(employee_id=employee_id)
-            except Employee.DoesNotExist:
+        # Get employee: Admin/HR may pick anyone, managers their direct reports
+        if employee_id:
+            employee_pk = Employee.objects.filter(employee_id=employee_id).values_list('pk', flat=True).first()
+            if employee_pk is None or not policy_for(Attendance).allows_employee(request.user, employee_pk):
                 return Response(
                     {'error': 'Employee not found'},
                     status=status.HTTP_404_NOT_FOUND
                 )
         else:
-            try:
-                employee = Employee.objects.get(user=request.user)
-            except Employee.DoesNotExist:
-                return Response(
-                    {'error': 'Employee profile not found'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
+            employee_pk = self.get_current_employee_pk()
         
-        records = Attendance.objects.filter(
-            employee=employee,
+        # Leave is materialized into attendance, so one aggregate covers everything
+        totals = Attendance.objects.filter(
+            employee_id=employee_pk,
             date__gte=start_date,
             date__lte=end_date
+        ).aggregate(
+            total_days=Count('id'),
+            present_days=Count('id', filter=Q(status='present')),
+            absent_days=Count('id', filter=Q(status='absent')),
+            late_days=Count('id', filter=Q(status='late')),
+            half_days=Count('id', filter=Q(status='half_day')),
+            leave_days=Count('id', filter=Q(status='on_leave')),
+            work_time=Sum(
+                ExpressionWrapper(F('check_out') - F('check_in'), output_field=DurationField()),
+                filter=Q(check_in__isnull=False, check_out__isnull=False)
+            ),
         )
+        work_time = totals.pop('work_time')
         
         summary = {
-            'total_days': records.count(),
-            'present_days': records.filter(status='present').count(),
-            'absent_days': records.filter(status='absent').count(),
-            'late_days': records.filter(status='late').count(),
-            'half_days': records.filter(status='half_day').count(),
-            'leave_days': records.filter(status='on_leave').count(),
-            'total_work_hours': sum(r.work_hours for r in records),
+            **totals,
+            'total_work_hours': round(work_time.total_seconds() / 3600, 2) if work_time else 0,
             'average_work_hours': 0
         }
         
@@ -268,12 +315,13 @@ class AttendanceSummaryView(APIView):
         return Response(summary)
 
 
-class AllEmployeesAttendanceView(generics.ListAPIView):
+class AllEmployeesAttendanceView(ReplicaReadsMixin, generics.ListAPIView):
     """Get today's attendance for all employees - Admin/HR only."""
     
     serializer_class = AttendanceSerializer
     permission_classes = [IsAuthenticated, IsAdminOrHR]
+    query_budget = 2
     
     def get_queryset(self):
         date = self.request.query_params.get('date', timezone.now().date())
-        return Attendance.objects.filter(date=date).select_related('employee__user')
+        return AttendanceSerializer.select_related_for(self.request, Attendance.objects.filter(date=date))
@@ -0,0 +1,22 @@
+"""
+Admin configuration for audit module.
+"""
+from django.contrib import admin
+from .models import AuditEntry
+
+
+@admin.register(AuditEntry)
+class AuditEntryAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'model', 'object_id', 'action', 'actor_email']
+    list_filter = ['model', 'action']
+    search_fields = ['object_id', 'actor_email']
+    
+    # The trail is append-only
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,91 @@
+"""
+Retention for the audit trail: delete entries past AUDIT_RETENTION_DAYS and,
+with --compact, fold each record's older updates into a single entry per
+run of consecutive updates by the same actor.
+"""
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from audit.models import AuditEntry
+
+BATCH_SIZE = 1000
+
+
+def compact_changes(entries):
+    """Merge consecutive update diffs into {field: [first old, last new]}, dropping no-ops."""
+    merged = {}
+    for entry in entries:
+        for field, (old, new) in entry.changes.items():
+            merged[field] = [merged[field][0] if field in merged else old, new]
+    return {field: values for field, values in merged.items() if values[0] != values[1]}
+
+
+class Command(BaseCommand):
+    help = 'Delete audit entries past retention and optionally compact old updates'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.AUDIT_RETENTION_DAYS,
+                            help='Delete entries older than this many days')
+        parser.add_argument('--compact', action='store_true',
+                            help='Fold updates older than --compact-after days into one entry per record')
+        parser.add_argument('--compact-after', type=int, default=settings.AUDIT_COMPACT_AFTER_DAYS)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change')
+    
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = AuditEntry.objects.filter(created_at__lt=now - timedelta(days=options['days']))
+        if options['dry_run']:
+            self.stdout.write(f"Would delete {expired.count()} expired entries")
+        else:
+            deleted, _ = expired.purge()
+            self.stdout.write(f"Deleted {deleted} expired entries")
+        
+        if options['compact']:
+            cutoff = now - timedelta(days=options['compact_after'])
+            folded, written = self.compact(cutoff, options['dry_run'])
+            verb = 'Would fold' if options['dry_run'] else 'Folded'
+            self.stdout.write(f"{verb} {folded} updates into {written} entries")
+    
+    def compact(self, cutoff, dry_run):
+        updates = AuditEntry.objects.filter(action='update', created_at__lt=cutoff).order_by(
+            'model', 'object_id', 'created_at', 'id'
+        )
+        folded = written = 0
+        pending_new, pending_old = [], []
+        for _, record in groupby(updates.iterator(chunk_size=BATCH_SIZE), key=lambda e: (e.model, e.object_id)):
+            # Only one actor's consecutive updates are folded, so the trail still says who changed what
+            for (actor_id, actor_email), group in groupby(record, key=lambda e: (e.actor_id, e.actor_email)):
+                group = list(group)
+                if len(group) < 2:
+                    continue
+                folded += len(group)
+                written += 1
+                last = group[-1]
+                pending_new.append(AuditEntry(
+                    model=last.model,
+                    object_id=last.object_id,
+                    action='update',
+                    changes=compact_changes(group),
+                    actor_id=actor_id,
+                    actor_email=actor_email,
+                    compacted=sum(entry.compacted or 1 for entry in group),
+                    created_at=last.created_at,
+                ))
+                pending_old.extend(entry.id for entry in group)
+            if len(pending_old) >= BATCH_SIZE:
+                self._replace(pending_new, pending_old, dry_run)
+                pending_new, pending_old = [], []
+        self._replace(pending_new, pending_old, dry_run)
+        return folded, written
+    
+    def _replace(self, new_entries, old_ids, dry_run):
+        if dry_run or not old_ids:
+            return
+        with transaction.atomic():
+            AuditEntry.objects.filter(id__in=old_ids).purge()
+            AuditEntry.objects.bulk_create(new_entries)
@@ -0,0 +1,47 @@
+"""
+Makes the current request available to audit signal handlers, so entries
+record who made a change without threading the user through every save.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+_current_request = ContextVar('audit_request', default=None)
+
+
+class AuditActorMiddleware:
+    """Remember the request for the duration of the view."""
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+    
+    async def __acall__(self, request):
+        token = _current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+
+def get_actor():
+    """(user id, email) of the authenticated user making the change, or (None, '')."""
+    request = _current_request.get()
+    # DRF authenticates inside the view and copies the user onto the Django request
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None, ''
+    return user.pk, user.email
@@ -0,0 +1,66 @@
+"""
+Models for the append-only audit trail.
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class AuditQuerySet(models.QuerySet):
+    """Entries are never edited; they only leave through retention (see prune_audit)."""
+    
+    def update(self, **kwargs):
+        raise TypeError('Audit entries are append-only')
+    
+    def delete(self):
+        raise TypeError('Audit entries are append-only; use purge() for retention')
+    
+    def purge(self):
+        """Delete the matching entries - for the retention command only."""
+        return super().delete()
+    
+    def for_object(self, instance):
+        return self.filter(model=instance._meta.label_lower, object_id=str(instance.pk))
+
+
+class AuditEntry(models.Model):
+    """One create, update or delete of an audited record, with its field changes."""
+    
+    ACTION_CHOICES = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ]
+    
+    model = models.CharField(max_length=100, help_text="app_label.model, e.g. employees.employee")
+    object_id = models.CharField(max_length=64)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # {field: [old, new]}
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # Plain columns rather than a foreign key, so history survives the actor's deletion untouched
+    actor_id = models.BigIntegerField(null=True, blank=True)
+    actor_email = models.CharField(max_length=254, blank=True)
+    # Number of original entries folded into this one by compaction
+    compacted = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    objects = AuditQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name_plural = 'Audit entries'
+        indexes = [
+            models.Index(fields=['model', 'object_id', 'created_at'], name='audit_object_time_idx'),
+            models.Index(fields=['created_at'], name='audit_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.action} {self.model}#{self.object_id} at {self.created_at:%Y-%m-%d %H:%M}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise TypeError('Audit entries are append-only')
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise TypeError('Audit entries are append-only')
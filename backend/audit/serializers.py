@@ -0,0 +1,14 @@
+"""
+Serializers for the audit trail.
+"""
+from rest_framework import serializers
+from .models import AuditEntry
+
+
+class AuditEntrySerializer(serializers.ModelSerializer):
+    """Serializer for audit entries."""
+    
+    class Meta:
+        model = AuditEntry
+        fields = ['id', 'model', 'object_id', 'action', 'changes', 'actor_id', 'actor_email', 'compacted', 'created_at']
+        read_only_fields = fields
@@ -0,0 +1,116 @@
+"""
+Signal handlers that turn saves and deletes of audited models into entries.
+
+An update reads the row's tracked fields just before it is written and diffs
+them against the instance. That costs a query per save, but loading audited
+models (far more common) costs nothing extra. Entries are queued once the
+transaction commits; rolled back changes are never recorded.
+"""
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.fields.files import FieldFile, FileField
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+from . import writer
+from .middleware import get_actor
+
+# model class -> {'fields': [(name, attname)], 'masked': names, 'files': file field names}
+registry = {}
+
+
+def register(model, exclude=(), masked=()):
+    """Audit ``model``; ``masked`` fields are recorded with all but the last four characters hidden."""
+    fields = [
+        (field.name, field.attname) for field in model._meta.concrete_fields
+        if not field.primary_key and field.name not in exclude
+    ]
+    files = {field.name for field in model._meta.concrete_fields if isinstance(field, FileField)}
+    registry[model] = {'fields': fields, 'masked': set(masked), 'files': files}
+    uid = f'audit:{model._meta.label_lower}'
+    pre_save.connect(read_row, sender=model, dispatch_uid=uid)
+    post_save.connect(record_save, sender=model, dispatch_uid=uid)
+    post_delete.connect(record_delete, sender=model, dispatch_uid=uid)
+
+
+def connect_audited_models():
+    for label, options in settings.AUDIT_MODELS.items():
+        register(apps.get_model(label), **options)
+
+
+def _values(instance):
+    values = {}
+    for name, attname in registry[type(instance)]['fields']:
+        # Deferred fields are not in __dict__; reading them would cost a query
+        if attname in instance.__dict__:
+            value = instance.__dict__[attname]
+            if isinstance(value, FieldFile):
+                value = value.name or None
+            elif value == '' and name in registry[type(instance)]['files']:
+                # Unset file fields load as '' but read back as an empty FieldFile
+                value = None
+            values[name] = value
+    return values
+
+
+def _row_values(instance):
+    """The tracked fields as stored, or {} if the row is gone."""
+    options = registry[type(instance)]
+    row = type(instance)._base_manager.filter(pk=instance.pk).values(
+        *(attname for _, attname in options['fields'])
+    ).first()
+    if row is None:
+        return {}
+    return {
+        name: None if row[attname] == '' and name in options['files'] else row[attname]
+        for name, attname in options['fields']
+    }
+
+
+def _mask(value):
+    value = str(value)
+    return '*' * max(len(value) - 4, 0) + value[-4:]
+
+
+def read_row(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._audit_before = _row_values(instance)
+
+
+def _queue_entry(instance, action, changes):
+    masked = registry[type(instance)]['masked']
+    for name in masked.intersection(changes):
+        changes[name] = [_mask(value) if value not in (None, '') else value for value in changes[name]]
+    actor_id, actor_email = get_actor()
+    entry = {
+        'model': instance._meta.label_lower,
+        'object_id': str(instance.pk),
+        'action': action,
+        'changes': changes,
+        'actor_id': actor_id,
+        'actor_email': actor_email,
+        'created_at': timezone.now(),
+    }
+    transaction.on_commit(lambda: writer.enqueue(entry))
+
+
+def record_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    current = _values(instance)
+    if created:
+        changes = {name: [None, value] for name, value in current.items() if value not in (None, '', [], {})}
+        _queue_entry(instance, 'create', changes)
+    else:
+        before = instance.__dict__.pop('_audit_before', {})
+        changes = {
+            name: [before[name], value] for name, value in current.items()
+            if name in before and before[name] != value
+        }
+        if changes:
+            _queue_entry(instance, 'update', changes)
+
+
+def record_delete(sender, instance, **kwargs):
+    _queue_entry(instance, 'delete', {name: [value, None] for name, value in _values(instance).items()})
@@ -0,0 +1,40 @@
+from django.test import TestCase, override_settings
+
+from dayflow.testing import api_client, make_employee
+from employees.models import Employee
+from .models import AuditEntry
+
+
+@override_settings(AUDIT_ASYNC=False)
+class AuditTrailTests(TestCase):
+
+    def setUp(self):
+        self.hr, _ = make_employee('hr@example.com', 'Sarah', 'Johnson', role='hr', department='hr')
+        self.user, self.employee = make_employee('john@example.com', 'John', 'Doe', skills=['python'])
+    
+    def history(self):
+        return AuditEntry.objects.filter(model='employees.employee', object_id=str(self.employee.pk))
+    
+    def test_update_records_changed_fields(self):
+        employee = Employee.objects.get(pk=self.employee.pk)
+        employee.position = 'Lead'
+        employee.skills.append('go')
+        with self.captureOnCommitCallbacks(execute=True):
+            employee.save()
+        
+        entry = self.history().get(action='update')
+        self.assertEqual(entry.changes, {'position': ['Engineer', 'Lead'], 'skills': [['python'], ['python', 'go']]})
+    
+    def test_unchanged_save_records_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Employee.objects.get(pk=self.employee.pk).save()
+        self.assertFalse(self.history().filter(action='update').exists())
+    
+    def test_malformed_dates_are_rejected(self):
+        client = api_client(self.hr)
+        self.assertEqual(client.get('/api/audit/', {'since': '2026-03-01T00:00'}).status_code, 200)
+        for since in ('2024-13-45T00:00', 'yesterday'):
+            with self.subTest(since=since):
+                response = client.get('/api/audit/', {'since': since})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
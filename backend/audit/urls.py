@@ -0,0 +1,10 @@
+"""
+URL patterns for audit module.
+"""
+from django.urls import path
+from .views import AuditEntryListView, ObjectHistoryView
+
+urlpatterns = [
+    path('', AuditEntryListView.as_view(), name='audit_entries'),
+    path('<str:model>/<str:object_id>/', ObjectHistoryView.as_view(), name='audit_object_history'),
+]
@@ -0,0 +1,58 @@
+"""
+Views for querying the audit trail.
+"""
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import generics
+from rest_framework.exceptions import ParseError
+from rest_framework.permissions import IsAuthenticated
+from accounts.permissions import IsAdminOrHR
+from dayflow.routers import ReplicaReadsMixin
+from .models import AuditEntry
+from .serializers import AuditEntrySerializer
+
+
+class AuditEntryListView(ReplicaReadsMixin, generics.ListAPIView):
+    """
+    Audit entries, newest first - Admin/HR only.
+    Filters: model (e.g. employees.employee), object_id, action, actor, since, until.
+    """
+    
+    serializer_class = AuditEntrySerializer
+    permission_classes = [IsAuthenticated, IsAdminOrHR]
+    
+    def get_queryset(self):
+        queryset = AuditEntry.objects.all()
+        params = self.request.query_params
+        model = self.kwargs.get('model') or params.get('model')
+        object_id = self.kwargs.get('object_id') or params.get('object_id')
+        
+        if model:
+            queryset = queryset.filter(model=model.lower())
+        if object_id:
+            queryset = queryset.filter(object_id=object_id)
+        if params.get('action'):
+            queryset = queryset.filter(action=params['action'])
+        if params.get('actor'):
+            if not params['actor'].isdigit():
+                raise ParseError({'error': 'actor must be a user id'})
+            queryset = queryset.filter(actor_id=params['actor'])
+        for param, lookup in (('since', 'created_at__gte'), ('until', 'created_at__lt')):
+            if params.get(param):
+                queryset = queryset.filter(**{lookup: self.parse_datetime_param(param)})
+        
+        return queryset
+    
+    def parse_datetime_param(self, param):
+        try:
+            value = parse_datetime(self.request.query_params[param])
+        except ValueError:
+            # Well formed but out of range, e.g. month 13
+            value = None
+        if value is None:
+            raise ParseError({'error': f'{param} must be an ISO 8601 datetime'})
+        return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+class ObjectHistoryView(AuditEntryListView):
+    """History of a single record: /api/audit/<model>/<object_id>/ - Admin/HR only."""
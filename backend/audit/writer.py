@@ -0,0 +1,92 @@
+"""
+Background writer for audit entries.
+
+Signal handlers only put entries on an in-process queue; a daemon thread
+drains it and inserts them with ``bulk_create`` in batches of up to
+``AUDIT_BATCH_SIZE``, at most ``AUDIT_FLUSH_INTERVAL`` seconds after the
+first entry of a batch arrived.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_queue = queue.SimpleQueue()
+_lock = threading.Lock()
+_thread = None
+_pid = None
+
+
+def write(entries):
+    """Insert a batch of entry dicts right away."""
+    from .models import AuditEntry
+    
+    try:
+        AuditEntry.objects.bulk_create([AuditEntry(**entry) for entry in entries])
+    except Exception:
+        logger.exception("Could not write %d audit entries", len(entries))
+
+
+def _run():
+    while True:
+        item = _queue.get()
+        batch, waiters = [], []
+        deadline = time.monotonic() + settings.AUDIT_FLUSH_INTERVAL
+        while True:
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            else:
+                batch.append(item)
+            if waiters or len(batch) >= settings.AUDIT_BATCH_SIZE:
+                break
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = _queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+        try:
+            if batch:
+                write(batch)
+        finally:
+            close_old_connections()
+            for waiter in waiters:
+                waiter.set()
+
+
+def _ensure_thread():
+    global _thread, _pid
+    with _lock:
+        # Threads do not survive a fork (e.g. preforking servers), so start one per process
+        if _thread is None or _pid != os.getpid() or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name='audit-writer', daemon=True)
+            _thread.start()
+            _pid = os.getpid()
+
+
+def enqueue(entry):
+    if not settings.AUDIT_ASYNC:
+        write([entry])
+        return
+    _ensure_thread()
+    _queue.put(entry)
+
+
+def flush(timeout=5):
+    """Block until everything queued so far is written (or ``timeout`` passes)."""
+    if _thread is None or _pid != os.getpid():
+        return True
+    done = threading.Event()
+    _queue.put(done)
+    return done.wait(timeout)
+
+
+atexit.register(flush)
@@ -0,0 +1,6 @@
+"""
+Benchmarks for Dayflow HRMS.
+
+Each module is runnable on its own and works against a throwaway test
+database, e.g. ``python -m benchmarks.employee_list``.
+"""
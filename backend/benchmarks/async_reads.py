@@ -0,0 +1,262 @@
+"""
+Async read benchmark: serves today's attendance, the profile, the weekly
+attendance and leave balances to many concurrent clients, once through the
+WSGI handler on a pool of worker threads (like gunicorn --threads) and once
+through the ASGI handler on one event loop (like a single uvicorn worker)
+with the async views, and compares throughput and tail latency.
+
+Each deployment runs in its own process (the URL confs pick the views at
+import), against its own throwaway test database. ``--db-latency`` adds a
+delay to every query to stand in for the network round trip to a database
+server, which is where the two deployments differ: a WSGI thread waits it
+out, an async request only gives up its turn.
+
+Run with: python -m benchmarks.async_reads [--employees N] [--requests N]
+          [--concurrency N] [--threads N] [--db-latency MS]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = [
+    '/api/attendance/today/',
+    '/api/attendance/weekly/',
+    '/api/employees/me/',
+    '/api/leaves/balance/',
+]
+RESULT_PREFIX = 'RESULT '
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(server, latencies, statuses, seconds):
+    latencies = sorted(latencies)
+    return {
+        'server': server,
+        'requests': len(latencies),
+        'errors': sum(1 for code in statuses if code != 200),
+        'throughput': len(latencies) / seconds,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': latencies[-1] * 1000,
+    }
+
+
+def build_data(employee_count):
+    from django.utils import timezone
+    from accounts.tokens import DayflowRefreshToken
+    from benchmarks.employee_list import build_employees
+    from employees.models import Employee
+    from leaves.models import LeaveBalance, LeaveType
+    
+    build_employees(employee_count)
+    leave_types = [
+        LeaveType.objects.create(name='Bench Paid', days_allowed=20),
+        LeaveType.objects.create(name='Bench Sick', days_allowed=10),
+    ]
+    employees = list(Employee.objects.select_related('user'))
+    year = timezone.now().year
+    LeaveBalance.objects.bulk_create([
+        LeaveBalance(employee=employee, leave_type=leave_type, year=year, total_days=leave_type.days_allowed)
+        for employee in employees for leave_type in leave_types
+    ])
+    return [str(DayflowRefreshToken.for_user(employee.user).access_token) for employee in employees]
+
+
+def add_query_latency(seconds):
+    """Delay every query run on connections opened from now on by ``seconds``."""
+    from django.db.backends.signals import connection_created
+    
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+    
+    def install(sender, connection, **kwargs):
+        connection.execute_wrappers.append(delay)
+    
+    connection_created.connect(install, weak=False)
+
+
+def workload(tokens, count):
+    """``count`` (path, token) pairs cycling through the endpoints and users."""
+    return [(ENDPOINTS[i % len(ENDPOINTS)], tokens[i % len(tokens)]) for i in range(count)]
+
+
+def wsgi_request(app, path, token):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'HTTP_HOST': 'testserver',
+        'HTTP_AUTHORIZATION': f'Bearer {token}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    status = []
+    
+    def start_response(status_line, headers, exc_info=None):
+        status.append(int(status_line.split()[0]))
+    
+    response = app(environ, start_response)
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return status[0]
+
+
+async def asgi_request(app, path, token):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+    body_sent = False
+    status = []
+    
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects; Django cancels this wait once it has responded
+        await asyncio.Event().wait()
+    
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+    
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def run_clients(requests, concurrency, call):
+    """``concurrency`` clients sending ``requests`` back to back; returns latencies and statuses."""
+    queue = list(reversed(requests))
+    latencies, statuses = [], []
+    
+    async def client():
+        while queue:
+            path, token = queue.pop()
+            started = time.perf_counter()
+            statuses.append(await call(path, token))
+            latencies.append(time.perf_counter() - started)
+    
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses
+
+
+def serve(args):
+    """Child process: run the workload against one deployment and print its result."""
+    from benchmarks.harness import test_database
+    
+    with test_database():
+        tokens = build_data(args.employees)
+        requests = workload(tokens, args.requests)
+        warmup = workload(tokens, len(ENDPOINTS) * 10)
+        if args.db_latency:
+            add_query_latency(args.db_latency / 1000)
+        
+        if args.server == 'wsgi':
+            from django.core.handlers.wsgi import WSGIHandler
+            
+            app = WSGIHandler()
+            pool = ThreadPoolExecutor(max_workers=args.threads)
+            
+            async def call(path, token):
+                return await asyncio.get_running_loop().run_in_executor(pool, wsgi_request, app, path, token)
+        else:
+            from django.core.handlers.asgi import ASGIHandler
+            
+            app = ASGIHandler()
+            
+            async def call(path, token):
+                return await asgi_request(app, path, token)
+        
+        async def run():
+            await run_clients(warmup, args.concurrency, call)
+            started = time.perf_counter()
+            latencies, statuses = await run_clients(requests, args.concurrency, call)
+            return latencies, statuses, time.perf_counter() - started
+        
+        latencies, statuses, seconds = asyncio.run(run())
+    print(RESULT_PREFIX + json.dumps(summarize(args.server, latencies, statuses, seconds)))
+
+
+def compare(args):
+    """Parent process: run both deployments and print them side by side."""
+    results = []
+    for server in ('wsgi', 'asgi'):
+        env = dict(os.environ)
+        env.pop('DAYFLOW_ASGI', None)
+        if server == 'asgi':
+            env['DAYFLOW_ASGI'] = '1'
+        command = [
+            sys.executable, '-m', 'benchmarks.async_reads', '--server', server,
+            '--employees', str(args.employees), '--requests', str(args.requests),
+            '--concurrency', str(args.concurrency), '--threads', str(args.threads),
+            '--db-latency', str(args.db_latency),
+        ]
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        lines = [line for line in completed.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+        if completed.returncode or not lines:
+            print(completed.stdout + completed.stderr)
+            sys.exit(f'{server} run failed')
+        results.append(json.loads(lines[-1][len(RESULT_PREFIX):]))
+    
+    print(f"{args.requests} requests from {args.concurrency} concurrent clients, {args.db_latency} ms per query "
+          f"(WSGI on {args.threads} threads, ASGI on one event loop)")
+    print(f"{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}")
+    for result in results:
+        print(f"{result['server']:<8}{result['throughput']:>10.0f}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}{result['errors']:>8}")
+    ok = all(result['errors'] == 0 for result in results)
+    print(f"{'ok  ' if ok else 'FAIL'} every request answered 200")
+    sys.exit(0 if ok else 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--employees', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=4000)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+    parser.add_argument('--db-latency', type=float, default=2.0, help='milliseconds added to every query')
+    parser.add_argument('--server', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.server:
+        serve(args)
+    else:
+        compare(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Bulk import benchmark: onboards a 5,000-row CSV through the import endpoint
+and checks it stays well under a minute with a constant number of queries.
+
+Run with: python -m benchmarks.employee_import [--rows N]
+"""
+import argparse
+
+from benchmarks.harness import check_budget, check_time, exit_with, measure, test_database
+
+# Existing emails, login id prefixes, bulk inserts in batches of 1,000 and savepoints
+QUERY_BUDGET = 20
+TIME_BUDGET = 60
+
+
+def build_csv(rows):
+    lines = ['email,first_name,last_name,department,position,hire_date,manager_email']
+    for i in range(rows):
+        # Every tenth hire reports to the first one, who is in the same file
+        manager = 'hire0@dayflow.test' if i and i % 10 == 0 else ''
+        lines.append(f'hire{i}@dayflow.test,First{i % 97},Last{i % 89},engineering,Engineer,2024-01-01,{manager}')
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000)
+    args = parser.parse_args()
+    
+    with test_database():
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from rest_framework.test import APIClient
+        from accounts.models import User
+        
+        admin = User.objects.create_user(
+            email='bench-admin@dayflow.test', password=None,
+            first_name='Bench', last_name='Admin', role='admin'
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = SimpleUploadedFile('hires.csv', build_csv(args.rows), content_type='text/csv')
+        
+        with measure() as result:
+            response = client.post('/api/employees/import/', {'file': upload}, format='multipart')
+        assert response.status_code == 201, response.data
+        assert response.data['created'] == args.rows, response.data
+        print(f"employee import: {response.data['created']} hires in {result['seconds']:.1f} s")
+        ok = check_time('employee import', result['seconds'], TIME_BUDGET)
+        ok = check_budget('employee import', result['queries'], QUERY_BUDGET) and ok
+        exit_with(ok)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Employee list benchmark: pins the number of queries needed to render a
+1,000-employee page, so per-row lookups cannot creep back in.
+
+Run with: python -m benchmarks.employee_list [--employees N]
+"""
+import argparse
+from datetime import date
+
+from benchmarks.harness import check_budget, exit_with, measure, test_database
+
+# Page query, COUNT(*) for pagination and the documents prefetch
+QUERY_BUDGET = 3
+
+
+def build_employees(count):
+    from accounts.models import User
+    from attendance.models import Attendance
+    from employees.models import Employee
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+    
+    password = make_password(None)
+    users = User.objects.bulk_create([
+        User(
+            email=f'bench{i}@dayflow.test',
+            login_id=f'BENCH{i:08d}',
+            first_name='Bench',
+            last_name=f'User{i}',
+            password=password,
+        )
+        for i in range(count)
+    ])
+    managers = users[:max(1, count // 20)]
+    employees = Employee.objects.bulk_create([
+        Employee(
+            user=user,
+            employee_id=user.login_id,
+            department='engineering',
+            position='Engineer',
+            hire_date=date(2023, 1, 1),
+            manager=managers[i % len(managers)],
+        )
+        for i, user in enumerate(users)
+    ])
+    today = timezone.now().date()
+    Attendance.objects.bulk_create([
+        Attendance(
+            employee=employee,
+            date=today,
+            check_in=timezone.now(),
+            status='on_leave' if i % 10 == 0 else 'present',
+        )
+        for i, employee in enumerate(employees) if i % 3
+    ])
+    admin = User.objects.create_user(
+        email='bench-admin@dayflow.test', password=None,
+        first_name='Bench', last_name='Admin', role='admin'
+    )
+    return admin
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--employees', type=int, default=1000)
+    args = parser.parse_args()
+    
+    with test_database():
+        from rest_framework.pagination import PageNumberPagination
+        from rest_framework.test import APIClient
+        from employees.views import EmployeeViewSet
+        
+        admin = build_employees(args.employees)
+        
+        class SinglePage(PageNumberPagination):
+            page_size = args.employees
+        
+        EmployeeViewSet.pagination_class = SinglePage
+        client = APIClient()
+        client.force_authenticate(admin)
+        
+        with measure() as result:
+            response = client.get('/api/employees/')
+        assert response.status_code == 200, response.status_code
+        rows = len(response.data['results'])
+        print(f"employee list: {rows} rows in {result['seconds'] * 1000:.1f} ms")
+        exit_with(check_budget('employee list', result['queries'], QUERY_BUDGET))
+
+
+if __name__ == '__main__':
+    main()
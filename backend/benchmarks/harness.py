@@ -0,0 +1,70 @@
+"""
+Shared setup for benchmark scripts: Django bootstrap, a throwaway test
+database and helpers for timing and counting queries.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dayflow.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from audit import writer as audit_writer  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    CaptureQueriesContext,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+
+@contextmanager
+def test_database(verbosity=0):
+    """Run the block against freshly migrated test databases, dropped afterwards."""
+    setup_test_environment()
+    # The test client talks to 'testserver'
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    old_config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        # Queued audit entries belong in the test database; once it is torn down
+        # the atexit flush would write them to the real one
+        audit_writer.flush()
+        teardown_databases(old_config, verbosity=verbosity)
+        teardown_test_environment()
+
+
+@contextmanager
+def measure():
+    """Collect wall time and executed queries for the block."""
+    result = {}
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        yield result
+        result['seconds'] = time.perf_counter() - start
+    result['queries'] = len(queries)
+
+
+def check_budget(label, actual, budget):
+    """Print a budget line and return False when it is exceeded."""
+    ok = actual <= budget
+    print(f"{'ok  ' if ok else 'FAIL'} {label}: {actual} queries (budget {budget})")
+    return ok
+
+
+def check_time(label, seconds, budget):
+    """Print a wall-time line and return False when it exceeds ``budget`` seconds."""
+    ok = seconds <= budget
+    print(f"{'ok  ' if ok else 'FAIL'} {label}: {seconds:.1f} s (budget {budget} s)")
+    return ok
+
+
+def exit_with(ok):
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,273 @@
+"""
+Endpoint benchmark suite: builds a synthetic organization (dayflow.datagen)
+and measures latency, throughput and queries per request for the API
+routes - sign-in, check-in/out, lists, summaries, leave approval and
+payroll generation - as each kind of user would call them.
+
+Results are written as JSON (``--output``); ``--compare`` checks a run
+against an earlier results file and fails on regressions, so runs can be
+compared before a deploy:
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --compare before.json --output after.json
+
+Run with: python -m benchmarks.suite [--employees N] [--days N] [--repeat N]
+          [--only NAME,...] [--output FILE] [--compare FILE] [--tolerance F]
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from benchmarks.harness import exit_with, test_database
+
+# A scenario regresses when its median is this much slower (and by at least
+# MIN_REGRESSION_MS, to ignore noise on fast endpoints) or it runs more queries
+REGRESSION_TOLERANCE = 0.25
+MIN_REGRESSION_MS = 2.0
+
+
+@dataclass
+class Scenario:
+    """``request(i)`` gives the (user, path, data) for the i-th run."""
+    
+    name: str
+    method: str
+    route: str
+    request: object
+    repeat: int = None
+    expect: int = 200
+
+
+def scenarios(org, tokens):
+    from django.utils import timezone
+    
+    today = timezone.localdate()
+    week_ago = (today - timedelta(days=7)).isoformat()
+    staff = org.employees
+    
+    def as_employee(path, data=None):
+        return lambda i: (staff[i % len(staff)].user, path, data)
+    
+    def as_hr(path, data=None):
+        return lambda i: (org.hr, path, data)
+    
+    def refresh(i):
+        user = staff[i % len(staff)].user
+        return None, '/api/auth/token/refresh/', {'refresh': tokens.refresh(user)}
+    
+    def pay_period(i):
+        # A different past month each run, so every run generates a full payroll
+        end = today.replace(day=1) - timedelta(days=1)
+        for _ in range(i):
+            end = end.replace(day=1) - timedelta(days=1)
+        return org.hr, '/api/payroll/generate/', {
+            'pay_period_start': end.replace(day=1).isoformat(), 'pay_period_end': end.isoformat(),
+        }
+    
+    return [
+        Scenario('token refresh', 'POST', '/api/auth/token/refresh/', refresh),
+        Scenario('profile', 'GET', '/api/auth/profile/', as_employee('/api/auth/profile/')),
+        Scenario('user list (hr)', 'GET', '/api/auth/users/', as_hr('/api/auth/users/')),
+        
+        Scenario('check-in', 'POST', '/api/attendance/check-in/',
+                 lambda i: (org.not_checked_in[i].user, '/api/attendance/check-in/', {})),
+        Scenario('check-out', 'POST', '/api/attendance/check-out/',
+                 lambda i: (org.checked_in[i].user, '/api/attendance/check-out/', {})),
+        Scenario('attendance today', 'GET', '/api/attendance/today/', as_employee('/api/attendance/today/')),
+        Scenario('attendance weekly', 'GET', '/api/attendance/weekly/', as_employee('/api/attendance/weekly/')),
+        Scenario('attendance summary', 'GET', '/api/attendance/summary/', as_employee('/api/attendance/summary/')),
+        Scenario('attendance list (own)', 'GET', '/api/attendance/', as_employee('/api/attendance/')),
+        Scenario('attendance list (hr, last week)', 'GET', '/api/attendance/',
+                 as_hr(f'/api/attendance/?start_date={week_ago}')),
+        Scenario('attendance all today (hr)', 'GET', '/api/attendance/all/', as_hr('/api/attendance/all/')),
+        
+        Scenario('employee list (hr)', 'GET', '/api/employees/', as_hr('/api/employees/')),
+        Scenario('employee directory', 'GET', '/api/employees/directory/', as_hr('/api/employees/directory/')),
+        Scenario('employee me', 'GET', '/api/employees/me/', as_employee('/api/employees/me/')),
+        Scenario('employee detail (hr)', 'GET', '/api/employees/{id}/',
+                 lambda i: (org.hr, f'/api/employees/{staff[i % len(staff)].pk}/', None)),
+        Scenario('employee autocomplete', 'GET', '/api/employees/autocomplete/',
+                 as_hr('/api/employees/autocomplete/?q=Pri')),
+        Scenario('skill facets', 'GET', '/api/employees/skills/facets/', as_hr('/api/employees/skills/facets/')),
+        Scenario('org chart (hr)', 'GET', '/api/employees/org-chart/', as_hr('/api/employees/org-chart/')),
+        
+        Scenario('leave types', 'GET', '/api/leaves/types/', as_employee('/api/leaves/types/')),
+        Scenario('leave balance', 'GET', '/api/leaves/balance/', as_employee('/api/leaves/balance/')),
+        Scenario('leave requests (own)', 'GET', '/api/leaves/requests/', as_employee('/api/leaves/requests/')),
+        Scenario('leave requests (hr)', 'GET', '/api/leaves/requests/', as_hr('/api/leaves/requests/?status=pending')),
+        Scenario('pending queue (hr)', 'GET', '/api/leaves/pending/queue/', as_hr('/api/leaves/pending/queue/')),
+        Scenario('pending counts (hr)', 'GET', '/api/leaves/pending/counts/', as_hr('/api/leaves/pending/counts/')),
+        Scenario('leave approval (hr)', 'POST', '/api/leaves/requests/{id}/approve/',
+                 lambda i: (org.hr, f'/api/leaves/requests/{org.pending[i]}/approve/', {'review_notes': 'ok'})),
+        
+        Scenario('payroll generation (hr)', 'POST', '/api/payroll/generate/', pay_period, repeat=2),
+        Scenario('payslip list (hr)', 'GET', '/api/payroll/payslips/', as_hr('/api/payroll/payslips/')),
+        Scenario('my payslips', 'GET', '/api/payroll/payslips/my_payslips/',
+                 as_employee('/api/payroll/payslips/my_payslips/')),
+        Scenario('salary list (hr)', 'GET', '/api/payroll/salaries/', as_hr('/api/payroll/salaries/')),
+        
+        Scenario('audit trail (hr)', 'GET', '/api/audit/', as_hr('/api/audit/')),
+    ]
+
+
+class Tokens:
+    """Access and refresh tokens per user, issued once."""
+    
+    def __init__(self):
+        self._access = {}
+    
+    def access(self, user):
+        if user.pk not in self._access:
+            from accounts.tokens import DayflowRefreshToken
+            self._access[user.pk] = str(DayflowRefreshToken.for_user(user).access_token)
+        return self._access[user.pk]
+    
+    def refresh(self, user):
+        # Refresh tokens rotate, so each run gets a fresh one
+        from accounts.tokens import DayflowRefreshToken
+        return str(DayflowRefreshToken.for_user(user))
+
+
+def run_scenario(client, tokens, scenario, repeat):
+    latencies, queries, budget = [], [], None
+    # Reads get one untimed call first; writes change state, so every call counts
+    warmup = 1 if scenario.method == 'GET' else 0
+    for i in range(warmup + repeat):
+        user, path, data = scenario.request(i)
+        if user is None:
+            client.credentials()
+        else:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens.access(user)}')
+        started = time.perf_counter()
+        if scenario.method == 'GET':
+            response = client.get(path)
+        else:
+            response = client.generic(scenario.method, path, json.dumps(data or {}), content_type='application/json')
+        elapsed = time.perf_counter() - started
+        if response.status_code != scenario.expect:
+            raise AssertionError(f'{scenario.name}: {path} answered {response.status_code}: {response.content[:300]!r}')
+        if i >= warmup:
+            latencies.append(elapsed * 1000)
+            queries.append(response.query_stats.count)
+            budget = response.query_stats.budget
+    
+    latencies.sort()
+    return {
+        'name': scenario.name,
+        'method': scenario.method,
+        'route': scenario.route,
+        'runs': repeat,
+        'mean_ms': round(statistics.fmean(latencies), 2),
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        'max_ms': round(latencies[-1], 2),
+        'throughput_rps': round(1000 * len(latencies) / sum(latencies), 1),
+        'queries': max(queries),
+        'query_budget': budget,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance=REGRESSION_TOLERANCE):
+    """Print deltas against an earlier run; returns False when any scenario regressed."""
+    with open(baseline_path) as f:
+        baseline = {row['name']: row for row in json.load(f)['results']}
+    ok = True
+    print(f"\ncompared with {baseline_path}:")
+    for row in results:
+        before = baseline.get(row['name'])
+        if before is None:
+            print(f"  new  {row['name']}")
+            continue
+        slower = row['p50_ms'] - before['p50_ms']
+        regressed = (
+            (slower > MIN_REGRESSION_MS and row['p50_ms'] > before['p50_ms'] * (1 + tolerance))
+            or row['queries'] > before['queries']
+        )
+        ok = ok and not regressed
+        print(f"  {'FAIL' if regressed else 'ok  '} {row['name']}: p50 {before['p50_ms']} -> {row['p50_ms']} ms, "
+              f"queries {before['queries']} -> {row['queries']}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--employees', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=730, help='days of attendance history')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', help='comma separated scenario names')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='results file of an earlier run')
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                        help='allowed relative slowdown of the median before --compare fails')
+    args = parser.parse_args()
+    
+    with test_database():
+        from django.conf import settings
+        from django.db import connection
+        from django.test import override_settings
+        from rest_framework.test import APIClient
+        from dayflow.datagen import generate
+        
+        started = time.perf_counter()
+        org = generate(employees=args.employees, days=args.days, pending=args.repeat, seed=args.seed)
+        print(f"built {args.employees} employees with {args.days} days of history "
+              f"in {time.perf_counter() - started:.1f} s")
+        
+        tokens = Tokens()
+        client = APIClient()
+        selected = set(args.only.split(',')) if args.only else None
+        results = []
+        # Measure the endpoints, not the rate limits
+        with override_settings(RATE_LIMITS={}):
+            for scenario in scenarios(org, tokens):
+                if selected and scenario.name not in selected:
+                    continue
+                row = run_scenario(client, tokens, scenario, min(scenario.repeat or args.repeat, args.repeat))
+                results.append(row)
+                over = row['query_budget'] is not None and row['queries'] > row['query_budget']
+                print(f"{'FAIL' if over else 'ok  '} {row['name']:<32} p50 {row['p50_ms']:>9.1f} ms  "
+                      f"p95 {row['p95_ms']:>9.1f} ms  {row['throughput_rps']:>8.1f} req/s  {row['queries']:>5} queries"
+                      + (f" (budget {row['query_budget']})" if row['query_budget'] is not None else ''))
+        
+        report = {
+            'meta': {
+                'date': date.today().isoformat(),
+                'commit': git_commit(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'debug': settings.DEBUG,
+                'employees': args.employees,
+                'days': args.days,
+                'repeat': args.repeat,
+                'seed': args.seed,
+            },
+            'results': results,
+        }
+    
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+    
+    ok = all(row['query_budget'] is None or row['queries'] <= row['query_budget'] for row in results)
+    if args.compare:
+        ok = compare(results, args.compare, args.tolerance) and ok
+    exit_with(ok)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Token refresh benchmark: rotates a refresh token repeatedly against a
+blacklist already holding millions of revoked ids, and checks that the
+blacklist adds no lookup query to a refresh (only the insert of the token
+being rotated out) and that a rotated token cannot be reused.
+
+Run with: python -m benchmarks.token_refresh [--revoked N] [--refreshes N]
+"""
+import argparse
+import math
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+
+from benchmarks.harness import check_budget, exit_with, measure, test_database
+
+# The user, their employee claims and the revoked-token insert, which bulk_create
+# wraps in a transaction (BEGIN/COMMIT are logged as queries on some backends)
+QUERY_BUDGET = 5
+SEED_BATCH_SIZE = 10000
+
+
+def seed_revoked(count):
+    from django.utils import timezone
+    from accounts.models import RevokedToken
+    
+    expires_at = timezone.now() + timedelta(days=7)
+    for start in range(0, count, SEED_BATCH_SIZE):
+        RevokedToken.objects.bulk_create([
+            RevokedToken(jti=uuid.uuid4().hex, expires_at=expires_at)
+            for _ in range(min(SEED_BATCH_SIZE, count - start))
+        ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--revoked', type=int, default=2_000_000)
+    parser.add_argument('--refreshes', type=int, default=1000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as cache_dir, test_database():
+        from django.conf import settings
+        from django.test import override_settings
+        from rest_framework.test import APIClient
+        from accounts.blacklist import token_blacklist
+        from accounts.models import User
+        from accounts.tokens import DayflowRefreshToken
+        
+        started = time.perf_counter()
+        seed_revoked(args.revoked)
+        print(f"seeded {args.revoked} revoked tokens in {time.perf_counter() - started:.1f} s")
+        
+        user = User.objects.create_user(
+            email='bench-refresh@dayflow.test', password=None,
+            first_name='Bench', last_name='Refresh'
+        )
+        client = APIClient()
+        refresh = str(DayflowRefreshToken.for_user(user))
+        
+        # The filter is only trusted with a cache every process shares (see accounts.blacklist)
+        shared = override_settings(CACHES={
+            **settings.CACHES,
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir},
+        })
+        with shared:
+            started = time.perf_counter()
+            token_blacklist.clear()
+            token_blacklist.load()
+            print(f"filter built in {time.perf_counter() - started:.1f} s")
+            response = client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+            assert response.status_code == 200, response.data
+            rotated_out, refresh = refresh, response.data['refresh']
+            
+            with measure() as result:
+                for _ in range(args.refreshes):
+                    response = client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+                    assert response.status_code == 200, response.data
+                    refresh = response.data['refresh']
+            print(f"token refresh: {args.refreshes / result['seconds']:.0f} refreshes/s")
+            
+            reused = client.post('/api/auth/token/refresh/', {'refresh': rotated_out}, format='json')
+        ok = reused.status_code == 401
+        print(f"{'ok  ' if ok else 'FAIL'} rotated token refused: HTTP {reused.status_code}")
+        ok = check_budget('token refresh', math.ceil(result['queries'] / args.refreshes), QUERY_BUDGET) and ok
+        exit_with(ok)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "dayflow.settings")
+# Serve the async read views (see dayflow.async_views)
+os.environ.setdefault("DAYFLOW_ASGI", "1")
 
 application = get_asgi_application()
@@ -0,0 +1,66 @@
+"""
+Async read endpoints.
+
+DRF views are synchronous: under ASGI each one holds a thread for the
+whole request. The hottest reads (today's attendance, the profile, the
+weekly attendance and leave balances) also have async versions built on
+``AsyncReadView``, which use the async ORM so a request waiting on the
+database costs a coroutine rather than a worker thread.
+
+They authenticate with the same stateless JWT authentication as the API
+(no query) and render with DRF's JSON renderer, so clients get the same
+responses as from the DRF views. The URL confs serve them when
+``settings.ASYNC_READ_VIEWS`` is on, which ``dayflow.asgi`` turns on;
+under WSGI the synchronous views are cheaper and stay in place.
+"""
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+
+from .routers import ais_pinned, replica_reads
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    response = HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+class AsyncReadView(View):
+    """
+    Base for async GET endpoints. ``request.user`` is the token principal;
+    ``get()`` returns a response, usually ``json_response(data)``. With
+    ``use_replica`` the reads go to the read replica, as with
+    ``ReplicaReadsMixin``. API exceptions are rendered like DRF does.
+    """
+    
+    http_method_names = ['get', 'head', 'options']
+    authentication = JWTStatelessUserAuthentication()
+    use_replica = False
+    
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user = self.authenticate(request)
+            if self.use_replica and not await ais_pinned(request.user.id):
+                with replica_reads():
+                    return await super().dispatch(request, *args, **kwargs)
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(request, exc)
+    
+    def authenticate(self, request):
+        result = self.authentication.authenticate(request)
+        if result is None:
+            raise NotAuthenticated()
+        return result[0]
+    
+    def handle_exception(self, request, exc):
+        headers = {}
+        if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+            headers['WWW-Authenticate'] = self.authentication.authenticate_header(request)
+        detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return json_response(detail, status=exc.status_code, headers=headers)
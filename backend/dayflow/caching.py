@@ -0,0 +1,11 @@
+"""
+Helpers for state that several worker processes must agree on.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def shared_cache(alias='default'):
+    """Whether the ``alias`` cache is shared between processes, so a change written to it reaches them all."""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
@@ -0,0 +1,307 @@
+"""
+Synthetic organization of any size: employees in departments under
+managers, ``days`` of weekday attendance history, leave types with
+balances, past and pending leave requests, salary structures and today's
+check-ins. About a ``leave_density`` share of the history is approved leave:
+its working days are ``on_leave`` attendance linked to the request and its
+days are counted in the balances, as approving it through the API does. Everything is derived
+from ``seed``, so the same arguments give the same data.
+
+Rows are built in memory and written in batches: attendance, by far the
+largest table, goes through ``COPY`` on PostgreSQL and ``executemany``
+elsewhere, skipping model instances altogether. Like any bulk write this
+bypasses ``save()`` and signals, so nothing is audited.
+
+    org = generate(employees=10000, days=730)
+    org.hr, org.admin            # users with those roles
+    org.employees                # Employee rows, with .user
+    org.checked_in, org.not_checked_in   # today's check-in state, for check-in/out runs
+    org.pending                  # pending leave request ids, none overlapping
+
+Used by ``manage.py generate_data`` and the benchmarks.
+"""
+import io
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from attendance.models import Attendance
+from employees.importer import allocate_login_ids
+from employees.models import Employee
+from leaves.models import LeaveBalance, LeaveRequest, LeaveType
+from payroll.models import SalaryStructure, SalaryTemplate
+
+BATCH_SIZE = 5000
+DEPARTMENTS = ['engineering', 'hr', 'finance', 'marketing', 'sales', 'operations']
+POSITIONS = ['Engineer', 'Senior Engineer', 'Analyst', 'Associate', 'Specialist', 'Team Lead']
+SKILLS = ['python', 'sql', 'excel', 'aws', 'django', 'react', 'figma', 'sap', 'seo', 'recruitment']
+FIRST_NAMES = [
+    'Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Neha', 'Arjun', 'Kavya', 'Rahul', 'Isha',
+    'Karan', 'Meera', 'Aditya', 'Sneha', 'Siddharth', 'Pooja', 'Nikhil', 'Divya', 'Manish', 'Tara',
+]
+LAST_NAMES = [
+    'Sharma', 'Patel', 'Kumar', 'Singh', 'Reddy', 'Iyer', 'Gupta', 'Nair', 'Das', 'Mehta',
+    'Joshi', 'Rao', 'Bose', 'Khan', 'Menon', 'Verma', 'Pillai', 'Chopra', 'Shah', 'Kapoor',
+]
+EMPLOYEES_PER_MANAGER = 10
+ATTENDANCE_FIELDS = [
+    'employee_id', 'date', 'check_in', 'check_out', 'status', 'status_before_leave', 'leave_request', 'notes',
+    'created_at', 'updated_at',
+]
+LEAVE_TYPES = [
+    {'name': 'Paid Time Off', 'category': 'paid', 'days_allowed': 24},
+    {'name': 'Sick Time Off', 'category': 'sick', 'days_allowed': 7},
+    {'name': 'Unpaid Leave', 'category': 'unpaid', 'days_allowed': 0, 'is_paid': False},
+]
+
+
+@dataclass
+class Org:
+    admin: object
+    hr: object
+    employees: list
+    checked_in: list = field(default_factory=list)
+    not_checked_in: list = field(default_factory=list)
+    pending: list = field(default_factory=list)
+    attendance_rows: int = 0
+
+
+def weekdays(start, end):
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def leave_spans(employee_ids, start, end, leave_density=0.03, rng=None):
+    """
+    (employee_id, first day, last day) of leave of one to three working days
+    between ``start`` and ``end``, covering about ``leave_density`` of them.
+    An employee's spans never overlap or touch.
+    """
+    rng = rng or random.Random(0)
+    days = list(weekdays(start, end))
+    # Spans average two days, so start one on half the density
+    chance = leave_density / 2
+    for employee_id in employee_ids:
+        index = 0
+        while index < len(days):
+            if rng.random() < chance:
+                span = days[index:index + rng.randint(1, 3)]
+                yield employee_id, span[0], span[-1]
+                index += len(span) + 1
+            else:
+                index += 1
+
+
+def attendance_rows(employee_ids, start, end, leave_days=None, rng=None):
+    """
+    Tuples of ``ATTENDANCE_FIELDS`` for every employee on every weekday from
+    ``start`` to ``end``: on leave where ``leave_days`` maps (employee_id,
+    day) to the approved leave request's id, otherwise checked in around
+    nine (late after half past) and out about eight hours later.
+    """
+    rng = rng or random.Random(0)
+    leave_days = leave_days or {}
+    tz = timezone.get_current_timezone()
+    now = timezone.now()
+    late_after = time(9, 30)
+    # Offsets are drawn from small precomputed tables; timedelta arithmetic dominates otherwise
+    arrivals = [timedelta(minutes=minutes) for minutes in range(-20, 60)]
+    shifts = [timedelta(hours=8, minutes=minutes) for minutes in range(90)]
+    for day in weekdays(start, end):
+        nine = datetime.combine(day, time(9, 0), tz)
+        for employee_id in employee_ids:
+            leave_request_id = leave_days.get((employee_id, day))
+            if leave_request_id is not None:
+                yield employee_id, day, None, None, 'on_leave', '', leave_request_id, '', now, now
+                continue
+            check_in = nine + arrivals[int(rng.random() * len(arrivals))]
+            status = 'late' if check_in.time() > late_after else 'present'
+            check_out = check_in + shifts[int(rng.random() * len(shifts))]
+            yield employee_id, day, check_in, check_out, status, '', None, '', now, now
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return str(value)
+
+
+def _memoized(convert):
+    """``convert`` with a cache: generated columns repeat few distinct values (days, minutes, ids)."""
+    cache = {}
+    
+    def converted(value):
+        try:
+            return cache[value]
+        except KeyError:
+            result = cache[value] = convert(value)
+            return result
+    return converted
+
+
+def write_rows(model, fields, rows, batch_size=BATCH_SIZE):
+    """
+    Insert ``rows`` (tuples of ``fields`` values) into ``model``'s table in
+    batches, with ``COPY`` on PostgreSQL. Returns the number of rows written.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    model_fields = [model._meta.get_field(name) for name in fields]
+    columns = ', '.join(connection.ops.quote_name(f.column) for f in model_fields)
+    copy = connection.vendor == 'postgresql'
+    if copy:
+        converters = [_memoized(_copy_value) for _ in model_fields]
+    else:
+        converters = [_memoized(partial(f.get_db_prep_save, connection=connection)) for f in model_fields]
+    written = 0
+    batch = []
+    
+    def flush(cursor):
+        if not batch:
+            return
+        values = [[convert(value) for convert, value in zip(converters, row)] for row in batch]
+        if copy:
+            buffer = io.StringIO()
+            buffer.writelines('\t'.join(row) + '\n' for row in values)
+            buffer.seek(0)
+            cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN', buffer)
+        else:
+            placeholders = ', '.join(['%s'] * len(fields))
+            cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', values)
+        batch.clear()
+    
+    with connection.cursor() as cursor:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                written += len(batch)
+                flush(cursor)
+        written += len(batch)
+        flush(cursor)
+    return written
+
+
+@transaction.atomic
+def generate(employees=1000, days=90, leave_density=0.03, pending=50, seed=0, password=None,
+             batch_size=BATCH_SIZE):
+    """
+    Create the organization in the default database and return an ``Org``.
+    Users get ``password``, or an unusable one. ``pending`` employees get a
+    leave request awaiting review.
+    """
+    rng = random.Random(seed)
+    # Hashing is deliberately slow; every generated user shares one hash
+    password = make_password(password)
+    today = timezone.localdate()
+    now = timezone.now()
+    
+    names = [(rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)) for _ in range(employees + 2)]
+    login_ids = allocate_login_ids(names)
+    people = [
+        User(email=f'{first.lower()}.{last.lower()}.{login_id.lower()}@example.com', login_id=login_id,
+             first_name=first, last_name=last, password=password)
+        for (first, last), login_id in zip(names, login_ids)
+    ]
+    people[0].role, people[0].is_staff = 'admin', True
+    people[1].role = 'hr'
+    admin, hr, *users = User.objects.bulk_create(people, batch_size=batch_size)
+    
+    managers = [hr] + users[:max(1, employees // EMPLOYEES_PER_MANAGER)]
+    staff = Employee.objects.bulk_create([
+        Employee(
+            user=user,
+            employee_id=user.login_id,
+            department=DEPARTMENTS[i % len(DEPARTMENTS)],
+            position=rng.choice(POSITIONS),
+            hire_date=today - timedelta(days=days + rng.randrange(365)),
+            manager=managers[i // EMPLOYEES_PER_MANAGER % len(managers)] if i else hr,
+            skills=rng.sample(SKILLS, 2),
+        )
+        for i, user in enumerate(users)
+    ], batch_size=batch_size)
+    for employee, user in zip(staff, users):
+        employee.user = user
+    
+    # Past approved leave, one to three days at a time
+    history_start = today - timedelta(days=days)
+    leave_types = [
+        LeaveType.objects.get_or_create(name=values['name'], defaults=values)[0] for values in LEAVE_TYPES
+    ]
+    approved = LeaveRequest.objects.bulk_create([
+        LeaveRequest(
+            employee_id=employee_id, leave_type=rng.choice(leave_types[:2]), status='approved',
+            start_date=first, end_date=last, reviewed_by=hr, reviewed_at=now,
+        )
+        for employee_id, first, last in leave_spans(
+            [employee.pk for employee in staff], history_start, today - timedelta(days=1), leave_density, rng
+        )
+    ], batch_size=batch_size)
+    leave_days = {
+        (leave_request.employee_id, day): leave_request.pk
+        for leave_request in approved for day in leave_request.working_dates()
+    }
+    
+    # Balances for every year of history, with the approved days used
+    used_days = Counter()
+    for leave_request in approved:
+        used_days[leave_request.employee_id, leave_request.leave_type_id, leave_request.start_date.year] += (
+            leave_request.total_days
+        )
+    LeaveBalance.objects.bulk_create([
+        LeaveBalance(
+            employee=employee, leave_type=leave_type, year=year, total_days=leave_type.days_allowed,
+            used_days=used_days[employee.pk, leave_type.pk, year],
+        )
+        for employee in staff for leave_type in leave_types for year in range(history_start.year, today.year + 1)
+    ], batch_size=batch_size)
+    
+    # Attendance history up to yesterday, and today's check-ins for half the staff
+    org = Org(admin=admin, hr=hr, employees=staff, checked_in=staff[::2], not_checked_in=staff[1::2])
+    org.attendance_rows = write_rows(
+        Attendance, ATTENDANCE_FIELDS,
+        attendance_rows([employee.pk for employee in staff], history_start, today - timedelta(days=1),
+                        leave_days, rng),
+        batch_size,
+    )
+    org.attendance_rows += write_rows(
+        Attendance, ATTENDANCE_FIELDS,
+        (
+            (employee.pk, today, now - timedelta(hours=1), None, 'present', '', None, '', now, now)
+            for employee in org.checked_in
+        ),
+        batch_size,
+    )
+    
+    # Pending requests in the future (one per employee, no overlaps)
+    start = today + timedelta(days=30)
+    org.pending = [leave_request.pk for leave_request in LeaveRequest.objects.bulk_create([
+        LeaveRequest(
+            employee=employee, leave_type=leave_types[0], reason='Family vacation',
+            start_date=start, end_date=start + timedelta(days=1),
+        )
+        for employee in staff[1:pending + 1]
+    ])]
+    
+    # Salary structures on one template
+    template, _ = SalaryTemplate.objects.get_or_create(name='Standard Grade')
+    SalaryStructure.objects.bulk_create([
+        SalaryStructure(
+            employee=employee, template=template,
+            monthly_wage=Decimal(30000 + 1000 * rng.randrange(50)),
+            effective_from=employee.hire_date,
+        )
+        for employee in staff
+    ], batch_size=batch_size)
+    return org
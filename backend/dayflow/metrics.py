@@ -0,0 +1,445 @@
+"""
+Prometheus metrics, served in the text exposition format from /metrics.
+
+Recording is built for the hot path. A metric child (one combination of
+label values) is bound once to a precomputed sample key, and every thread
+writes to a shard of its own, so an increment is a dict lookup and a float
+update with no lock and no allocation. When a thread exits, its shard (values
+and all) goes to the next new thread, so a server that starts a thread per
+request, as Django does for sync views under ASGI, keeps one shard per
+concurrent thread. Bind children where they are used rather than calling
+``labels()`` per request::
+
+    check_ins.inc()
+    request_seconds.labels('employee-list', 'GET').observe(0.012)
+
+Shards live in memory by default. Servers with several worker processes
+(gunicorn, several uvicorn workers) must set ``METRICS_DIR``: each shard is
+then a memory-mapped file in that directory and /metrics sums the files of
+every process, including workers that have exited, so counters never go
+backwards. Empty the directory when the service starts.
+"""
+import glob
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.crypto import constant_time_compare
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SHARD_SIZE = 64 * 1024
+
+# Shard layout: an 8-byte header holding the bytes in use, then entries of
+# [key length (4 bytes), key, padding to 8, value (double)]. An entry is
+# written in full before the header moves past it, so readers never see half.
+_HEADER = struct.Struct('Q')
+_LENGTH = struct.Struct('I')
+_VALUE = struct.Struct('d')
+
+
+class _Shard:
+    """Sample values written by one thread; nothing else writes to it."""
+    
+    def __init__(self, directory=None):
+        self.indexes = {}
+        self.used = _HEADER.size
+        self._file = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            fd, _ = tempfile.mkstemp(dir=directory, prefix=f'{os.getpid()}-', suffix='.db')
+            self._file = os.fdopen(fd, 'r+b')
+            self._file.truncate(SHARD_SIZE)
+            self.buffer = mmap.mmap(self._file.fileno(), SHARD_SIZE)
+        else:
+            self.buffer = bytearray(SHARD_SIZE)
+        _HEADER.pack_into(self.buffer, 0, self.used)
+        # Values are 8-byte aligned, so the buffer doubles as an array of them
+        self.values = memoryview(self.buffer).cast('d')
+    
+    def add(self, key, amount):
+        index = self.indexes.get(key)
+        if index is None:
+            index = self._append(key)
+        self.values[index] += amount
+    
+    def _append(self, key):
+        encoded = key.encode()
+        offset = (self.used + _LENGTH.size + len(encoded) + 7) & ~7
+        end = offset + _VALUE.size
+        if end > len(self.buffer):
+            self._grow(max(2 * len(self.buffer), end))
+        _LENGTH.pack_into(self.buffer, self.used, len(encoded))
+        self.buffer[self.used + _LENGTH.size:self.used + _LENGTH.size + len(encoded)] = encoded
+        _VALUE.pack_into(self.buffer, offset, 0.0)
+        self.used = end
+        _HEADER.pack_into(self.buffer, 0, end)
+        self.indexes[key] = offset // _VALUE.size
+        return self.indexes[key]
+    
+    def _grow(self, size):
+        self.values.release()
+        if self._file is None:
+            self.buffer.extend(bytes(size - len(self.buffer)))
+        else:
+            self._file.truncate(size)
+            self.buffer.close()
+            self.buffer = mmap.mmap(self._file.fileno(), size)
+        self.values = memoryview(self.buffer).cast('d')
+
+
+def _entries(data):
+    """(key, value) pairs stored in shard bytes."""
+    if len(data) < _HEADER.size:
+        return
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    position = _HEADER.size
+    while position < used:
+        length = _LENGTH.unpack_from(data, position)[0]
+        start = position + _LENGTH.size
+        offset = (start + length + 7) & ~7
+        yield bytes(data[start:start + length]).decode(), _VALUE.unpack_from(data, offset)[0]
+        position = offset + _VALUE.size
+
+
+_local = threading.local()
+_shards = []
+_idle = []  # shards of exited threads, for the next new ones
+_shards_lock = threading.Lock()
+
+
+class _Lease:
+    """Kept in a thread's locals, which are dropped when it exits: the shard then goes back to ``_idle``."""
+    
+    __slots__ = ('shard', 'pid')
+    
+    def __init__(self, shard):
+        self.shard = shard
+        self.pid = os.getpid()
+    
+    def __del__(self):
+        # Runs as the thread is torn down, so no lock: list.append is atomic
+        if self.pid == os.getpid():
+            _idle.append(self.shard)
+
+
+def _shard():
+    try:
+        return _local.shard
+    except AttributeError:
+        # Only taken once per thread
+        try:
+            shard = _idle.pop()
+        except IndexError:
+            with _shards_lock:
+                shard = _Shard(settings.METRICS_DIR)
+                _shards.append(shard)
+        _local.lease = _Lease(shard)
+        _local.shard = shard
+        return shard
+
+
+def _forget_shards():
+    # A forked worker must not write into its parent's shards
+    global _local
+    _local = threading.local()
+    _shards.clear()
+    _idle.clear()
+
+
+os.register_at_fork(after_in_child=_forget_shards)
+
+
+def _totals():
+    """Sample key -> value summed over every shard (every process with METRICS_DIR)."""
+    totals = defaultdict(float)
+    if settings.METRICS_DIR:
+        for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.db')):
+            with open(path, 'rb') as f:
+                data = f.read()
+            for key, value in _entries(data):
+                totals[key] += value
+    else:
+        with _shards_lock:
+            buffers = [shard.buffer for shard in _shards]
+        for buffer in buffers:
+            for key, value in _entries(buffer):
+                totals[key] += value
+    return totals
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _sample(name, labels, value):
+    return f'{name}{{{labels}}} {value!r}' if labels else f'{name} {value!r}'
+
+
+_registry = []
+
+
+class _Metric:
+    kind = None
+    
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        _registry.append(self)
+        if not self.labelnames:
+            self._default = self.labels()
+    
+    def labels(self, *values):
+        """The child for these label values; bind it once and reuse it."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} takes labels {self.labelnames}')
+            child = self._children[values] = self._child(_label_text(self.labelnames, values))
+        return child
+    
+    def _key(self, suffix, labels, le=''):
+        return f'{self.name}\t{suffix}\t{labels}\t{le}'
+    
+    def expose(self, samples):
+        """Exposition lines from {(suffix, labels, le): value} of this metric."""
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('key',)
+    
+    def __init__(self, key):
+        self.key = key
+    
+    def inc(self, amount=1):
+        _shard().add(self.key, amount)
+
+
+class Counter(_Metric):
+    """A total that only goes up; name it ``..._total``."""
+    
+    kind = 'counter'
+    
+    def _child(self, labels):
+        return _CounterChild(self._key('', labels))
+    
+    def inc(self, amount=1):
+        self._default.inc(amount)
+    
+    def expose(self, samples):
+        for (_, labels, _), value in sorted(samples.items()):
+            yield _sample(self.name, labels, value)
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'bucket_keys', 'sum_key', 'count_key')
+    
+    def __init__(self, bounds, bucket_keys, sum_key, count_key):
+        self.bounds = bounds
+        self.bucket_keys = bucket_keys
+        self.sum_key = sum_key
+        self.count_key = count_key
+    
+    def observe(self, value):
+        shard = _shard()
+        # Buckets are stored non-cumulative (one write); exposition adds them up
+        shard.add(self.bucket_keys[bisect_left(self.bounds, value)], 1)
+        shard.add(self.sum_key, value)
+        shard.add(self.count_key, 1)
+
+
+class Histogram(_Metric):
+    """Observations counted into ``buckets`` (upper bounds), with their sum and count."""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(float(bound) for bound in buckets)
+        super().__init__(name, documentation, labelnames)
+    
+    def _child(self, labels):
+        les = [repr(bound) for bound in self.bounds] + ['+Inf']
+        return _HistogramChild(
+            self.bounds,
+            [self._key('_bucket', labels, le) for le in les],
+            self._key('_sum', labels),
+            self._key('_count', labels),
+        )
+    
+    def observe(self, value):
+        self._default.observe(value)
+    
+    def expose(self, samples):
+        series = defaultdict(dict)
+        for (suffix, labels, le), value in samples.items():
+            series[labels][le or suffix] = value
+        for labels, values in sorted(series.items()):
+            prefix = f'{labels},' if labels else ''
+            cumulative = 0.0
+            for bound in self.bounds:
+                cumulative += values.get(repr(bound), 0.0)
+                yield _sample(f'{self.name}_bucket', f'{prefix}le="{bound!r}"', cumulative)
+            yield _sample(f'{self.name}_bucket', f'{prefix}le="+Inf"', values.get('_count', 0.0))
+            yield _sample(f'{self.name}_sum', labels, values.get('_sum', 0.0))
+            yield _sample(f'{self.name}_count', labels, values.get('_count', 0.0))
+
+
+class GaugeFunction(_Metric):
+    """
+    A value read when /metrics is scraped, such as a queue depth: ``function``
+    returns a number, or (label values, number) pairs.
+    """
+    
+    kind = 'gauge'
+    
+    def __init__(self, name, documentation, function, labelnames=()):
+        self.function = function
+        super().__init__(name, documentation, labelnames)
+    
+    def _child(self, labels):
+        return None
+    
+    def expose(self, samples):
+        result = self.function()
+        if not self.labelnames:
+            yield _sample(self.name, '', float(result))
+            return
+        for values, value in result:
+            yield _sample(self.name, _label_text(self.labelnames, values), float(value))
+
+
+def render():
+    """Every registered metric in the Prometheus text format."""
+    samples = defaultdict(dict)
+    for key, value in _totals().items():
+        name, suffix, labels, le = key.split('\t')
+        samples[name][suffix, labels, le] = value
+    lines = []
+    for metric in _registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.expose(samples.get(metric.name, {})))
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    """/metrics for Prometheus, behind ``Authorization: Bearer <METRICS_TOKEN>``."""
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return JsonResponse({'error': 'Metrics are disabled; set METRICS_TOKEN'}, status=404)
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return JsonResponse({'error': 'Invalid metrics token'}, status=401)
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+# Metrics recorded across the apps
+
+request_seconds = Histogram(
+    'dayflow_http_request_duration_seconds', 'Time to respond, by route', ['route', 'method']
+)
+responses = Counter(
+    'dayflow_http_responses_total', 'Responses by route and status class', ['route', 'method', 'status']
+)
+db_queries = Counter('dayflow_db_queries_total', 'SQL queries run by requests, by route', ['route'])
+db_query_seconds = Counter('dayflow_db_query_seconds_total', 'Time requests spent in SQL, by route', ['route'])
+cache_lookups = Counter('dayflow_cache_lookups_total', 'Cache reads by cache and hit or miss', ['cache', 'result'])
+check_ins = Counter('dayflow_attendance_check_ins_total', 'Successful check-ins')
+check_outs = Counter('dayflow_attendance_check_outs_total', 'Successful check-outs')
+payroll_run_seconds = Histogram(
+    'dayflow_payroll_run_duration_seconds', 'Time to generate a pay period\'s payslips',
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600),
+)
+payslips_generated = Counter('dayflow_payslips_generated_total', 'Payslips created by payroll runs')
+export_bytes = Counter('dayflow_export_bytes_total', 'Bytes of files and reports sent for download', ['kind'])
+
+
+def _pending_by_department():
+    from leaves.queue import get_pending_counts
+    return [((department,), count) for department, count in get_pending_counts()['by_department'].items()]
+
+
+pending_leave_requests = GaugeFunction(
+    'dayflow_leave_pending_requests', 'Leave requests awaiting review, by department',
+    _pending_by_department, ['department'],
+)
+
+
+def cache_counters(name):
+    """(hit, miss) counter children for the cache called ``name``."""
+    return cache_lookups.labels(name, 'hit'), cache_lookups.labels(name, 'miss')
+
+
+STATUS_CLASSES = ('1xx', '2xx', '3xx', '4xx', '5xx')
+METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'])
+
+
+class _RouteMetrics:
+    """The children one (route, method) records into, bound on its first request."""
+    
+    __slots__ = ('seconds', 'statuses', 'queries', 'query_seconds')
+    
+    def __init__(self, route, method):
+        self.seconds = request_seconds.labels(route, method)
+        self.statuses = [responses.labels(route, method, status) for status in STATUS_CLASSES]
+        self.queries = db_queries.labels(route)
+        self.query_seconds = db_query_seconds.labels(route)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status and SQL work per route. Routes are URL pattern
+    names (``employee-list``), so the label set stays as small as the URL conf.
+    Goes first in MIDDLEWARE so the time covers the whole stack.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._routes = {}
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+    
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started)
+        return response
+    
+    def record(self, request, response, seconds):
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match is not None else 'unmatched'
+        method = request.method if request.method in METHODS else 'other'
+        metrics = self._routes.get((route, method))
+        if metrics is None:
+            metrics = self._routes[route, method] = _RouteMetrics(route, method)
+        metrics.seconds.observe(seconds)
+        metrics.statuses[min(max(response.status_code // 100, 1), 5) - 1].inc()
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None and stats.count:
+            metrics.queries.inc(stats.count)
+            metrics.query_seconds.inc(stats.seconds)
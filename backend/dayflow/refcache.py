@@ -0,0 +1,172 @@
+"""
+Cached reference data: leave types, salary templates and company settings.
+
+These tables change a few times a year but are read on nearly every leave,
+payroll and validation call. Each one is cached whole, as a list of model
+instances, in the ``settings.REFERENCE_CACHE_ALIAS`` cache under a key that
+embeds the table's current version. Saving or deleting a row replaces the
+version (after the transaction commits) and stale entries simply expire.
+
+With a cache shared by every process (e.g. Redis) they all move to the new
+version at once. The configured per-process locmem cache only sees its own
+process's changes; other processes keep serving the old rows until they
+expire, so ``REFERENCE_CACHE_TTL`` bounds how stale they can get. Looking
+up a row they have not seen yet (e.g. a new leave type) checks the database
+and re-reads the rows instead of failing.
+
+Reads return fresh (unpickled) instances, so callers may hold on to them,
+but writes must still go through the ORM.
+"""
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .metrics import cache_counters
+
+
+def _cache():
+    return caches[settings.REFERENCE_CACHE_ALIAS]
+
+
+class ReferenceCache:
+    """All rows of one model, cached under a versioned key and dropped on any change."""
+    
+    def __init__(self, label):
+        self.label = label
+        self.version_key = f'ref:{label}:version'
+        self._hits, self._misses = cache_counters(label)
+        # String senders are resolved once the model is loaded
+        post_save.connect(self._changed, sender=label, dispatch_uid=f'refcache-save-{label}')
+        post_delete.connect(self._changed, sender=label, dispatch_uid=f'refcache-delete-{label}')
+    
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+    
+    def _version(self):
+        cache = _cache()
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, None)
+            version = cache.get(self.version_key)
+        return version
+    
+    def all(self):
+        """Every row, in the model's default ordering."""
+        cache = _cache()
+        key = f'ref:{self.label}:{self._version()}'
+        rows = cache.get(key)
+        if rows is None:
+            self._misses.inc()
+            # Always from the primary: a lagging replica could cache the rows we just replaced
+            model = self.model
+            rows = list(model._default_manager.using(router.db_for_write(model)))
+            cache.set(key, rows, settings.REFERENCE_CACHE_TTL)
+        else:
+            self._hits.inc()
+        return rows
+    
+    def _find(self, pk):
+        for row in self.all():
+            if str(row.pk) == str(pk):
+                return row
+        return None
+    
+    def _stored(self, pk):
+        model = self.model
+        try:
+            return model._default_manager.using(router.db_for_write(model)).filter(pk=pk).exists()
+        except (TypeError, ValueError, ValidationError):
+            return False
+    
+    def get(self, pk):
+        """
+        The row with primary key ``pk``; raises the model's DoesNotExist. A row
+        missing from the cached ones may have been added by a process whose
+        change this cache has not seen, so a miss is checked in the database
+        and the rows re-read if it is there.
+        """
+        row = self._find(pk)
+        if row is None and self._stored(pk):
+            self.invalidate()
+            row = self._find(pk)
+        if row is None:
+            raise self.model.DoesNotExist(f'{self.model.__name__} {pk} does not exist')
+        return row
+    
+    def first(self):
+        rows = self.all()
+        return rows[0] if rows else None
+    
+    def invalidate(self):
+        # A fresh random version rather than a counter: a lost counter could repeat an old version
+        _cache().set(self.version_key, uuid.uuid4().hex, None)
+    
+    def _changed(self, sender, **kwargs):
+        transaction.on_commit(self.invalidate)
+
+
+leave_types = ReferenceCache('leaves.LeaveType')
+salary_templates = ReferenceCache('payroll.SalaryTemplate')
+company_settings = ReferenceCache('accounts.CompanySettings')
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    A primary key field that validates against a ReferenceCache instead of
+    querying, e.g. ``CachedPrimaryKeyRelatedField(reference=leave_types)``.
+    """
+    
+    def __init__(self, reference, **kwargs):
+        self.reference = reference
+        kwargs.setdefault('queryset', reference.model._default_manager.all())
+        super().__init__(**kwargs)
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.reference.get(data)
+        except self.reference.model.DoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class ReferenceViewSetMixin:
+    """
+    Serves list and retrieve from ``reference`` (a ReferenceCache); writes
+    still load the row from the database. ``reference_rows()`` can narrow
+    the cached rows, the way ``get_queryset()`` would.
+    """
+    
+    reference = None
+    
+    def reference_rows(self):
+        return self.reference.all()
+    
+    def list(self, request, *args, **kwargs):
+        rows = self.reference_rows()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(rows, many=True).data)
+    
+    def get_object(self):
+        if self.request.method not in SAFE_METHODS:
+            return super().get_object()
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        for row in self.reference_rows():
+            if str(getattr(row, self.lookup_field)) == str(lookup):
+                self.check_object_permissions(self.request, row)
+                return row
+        # Possibly added by a process whose change this cache has not seen (404 if not)
+        row = super().get_object()
+        self.reference.invalidate()
+        return row
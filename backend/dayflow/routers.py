@@ -0,0 +1,150 @@
+"""
+Read replica routing.
+
+Writes and most reads go to ``default``. Views that only list, summarize or
+export data opt in with ``ReplicaReadsMixin``; while such a view handles a
+safe request its reads go to ``settings.REPLICA_DATABASE``, which keeps the
+heavy report queries off the connection check-ins use.
+
+A replica lags the primary a little, so after a user's own write (any
+unsafe request) their reads stay on the primary for
+``settings.REPLICA_STICKY_SECONDS``; they never see a list that is missing
+what they just saved. Reads inside a transaction also stay on the primary.
+
+The pin is kept in the ``default`` cache, so every process must see the
+same one: with a per-process cache (locmem, dummy) a user's next request
+could land on a worker that never saw their write. Without a shared cache,
+or without a ``replica`` entry in ``DATABASES``, everything reads from
+``default`` and the mixin does nothing.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .caching import shared_cache
+
+PINNED_KEY = 'db:pinned:{user_id}'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_configured():
+    return settings.REPLICA_DATABASE in settings.DATABASES and shared_cache()
+
+
+class ReplicaRouter:
+    """Sends reads to the replica while ``replica_reads()`` is active, everything else to default."""
+    
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return settings.REPLICA_DATABASE
+        return DEFAULT_DB_ALIAS
+    
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same rows
+        aliases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+
+@contextmanager
+def replica_reads():
+    """Read from the replica (when one is configured) inside the block."""
+    token = _replica_reads.set(replica_configured())
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def pin_to_primary(user_id):
+    """Keep ``user_id``'s reads on the primary until the replica has caught up with their write."""
+    cache.set(PINNED_KEY.format(user_id=user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+async def apin_to_primary(user_id):
+    await cache.aset(PINNED_KEY.format(user_id=user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(cache.get(PINNED_KEY.format(user_id=user_id)))
+
+
+async def ais_pinned(user_id):
+    return bool(await cache.aget(PINNED_KEY.format(user_id=user_id)))
+
+
+def _writer_id(request):
+    """Id of the signed-in user behind an unsafe request, or None."""
+    if request.method in SAFE_METHODS or not replica_configured():
+        return None
+    # DRF authenticates inside the view and copies the user onto the Django request
+    user = getattr(request, 'user', None)
+    return user.id if user is not None and user.is_authenticated else None
+
+
+class ReadYourWritesMiddleware:
+    """Pin the user to the primary after every unsafe request they make."""
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        user_id = _writer_id(request)
+        if user_id is not None:
+            pin_to_primary(user_id)
+        return response
+    
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        user_id = _writer_id(request)
+        if user_id is not None:
+            await apin_to_primary(user_id)
+        return response
+
+
+class ReplicaReadsMixin:
+    """
+    Serve safe requests to this view from the replica. On viewsets only the
+    actions in ``replica_actions`` are routed; plain views route every GET.
+    """
+    
+    replica_actions = ('list',)
+    
+    def uses_replica(self, request):
+        if request.method not in SAFE_METHODS or not replica_configured():
+            return False
+        action = getattr(self, 'action', None)
+        if action is not None and action not in self.replica_actions:
+            return False
+        return not (request.user and request.user.is_authenticated and is_pinned(request.user.id))
+    
+    def initial(self, request, *args, **kwargs):
+        # Authentication and permission checks read from the primary
+        super().initial(request, *args, **kwargs)
+        if self.uses_replica(request):
+            self._replica_token = _replica_reads.set(True)
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
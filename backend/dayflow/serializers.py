@@ -0,0 +1,85 @@
+"""
+Shared serializer building blocks for Dayflow HRMS.
+"""
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _split(value):
+    if not value:
+        return set()
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class SparseFieldsetsMixin:
+    """
+    Serializer mixin adding ``?fields=`` and ``?expand=`` support.
+    
+    ``?fields=id,full_name`` limits the output to the listed fields, and
+    ``?expand=employee`` replaces a primary-key field with the nested
+    serializer declared in ``Meta.expandable_fields``::
+    
+        expandable_fields = {
+            'employee': ('employees.serializers.EmployeeDirectorySerializer', {'read_only': True}),
+        }
+    
+    Only the top-level serializer of a read request reads the query string;
+    ``fields``/``expand`` can also be passed as keyword arguments.
+    
+    ``Meta.related_fields`` maps a ``select_related`` path to the output
+    fields that need it, so views can skip joins nobody asked for::
+    
+        related_fields = {'employee__user': ['employee_id', 'employee_name', 'employee']}
+    """
+    
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None)
+        super().__init__(*args, **kwargs)
+        
+        request = self.context.get('request')
+        if request is not None and request.method in SAFE_METHODS:
+            requested_fields, requested_expand = self.requested(request)
+            fields = requested_fields if fields is None else fields
+            expand = requested_expand if expand is None else expand
+        
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand or ():
+            if name in expandable:
+                serializer_path, options = expandable[name]
+                self.fields[name] = import_string(serializer_path)(**options)
+        
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+    
+    @staticmethod
+    def requested(request):
+        """The (fields, expand) sets asked for by ``request``; empty ``fields`` means all."""
+        params = getattr(request, 'query_params', request.GET)
+        return _split(params.get('fields')), _split(params.get('expand'))
+    
+    @classmethod
+    def includes(cls, request, *names):
+        """Whether any of ``names`` will be rendered for ``request`` - used to trim joins."""
+        if request is None or request.method not in SAFE_METHODS:
+            return True
+        fields, _ = cls.requested(request)
+        return not fields or any(name in fields for name in names)
+    
+    @classmethod
+    def expands(cls, request, name):
+        """Whether ``request`` asked for ``name`` to be expanded."""
+        if request is None or request.method not in SAFE_METHODS:
+            return False
+        fields, expand = cls.requested(request)
+        return name in expand and (not fields or name in fields)
+    
+    @classmethod
+    def select_related_for(cls, request, queryset):
+        """Apply the ``Meta.related_fields`` joins needed by the fields ``request`` renders."""
+        related = [
+            path for path, names in getattr(cls.Meta, 'related_fields', {}).items()
+            if cls.includes(request, *names)
+        ]
+        return queryset.select_related(*related) if related else queryset
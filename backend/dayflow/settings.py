@@ -25,6 +25,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third party
     'rest_framework',
     'rest_framework_simplejwt',
@@ -35,15 +36,23 @@ INSTALLED_APPS = [
     'attendance',
     'leaves',
     'payroll',
+    'filestore',
+    'audit',
+    'profiling',
 ]
 
 MIDDLEWARE = [
+    'dayflow.metrics.MetricsMiddleware',
+    'dayflow.sqlstats.QueryStatsMiddleware',
+    'profiling.middleware.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'audit.middleware.AuditActorMiddleware',
+    'dayflow.routers.ReadYourWritesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -67,7 +76,16 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'dayflow.wsgi.application'
 
+# dayflow.asgi sets DAYFLOW_ASGI=1. Under ASGI the hot read endpoints are served by their
+# async versions (dayflow.async_views); under WSGI the synchronous views are cheaper.
+SERVED_BY_ASGI = os.environ.get('DAYFLOW_ASGI') == '1'
+ASYNC_READ_VIEWS = SERVED_BY_ASGI
+
 # Database - SQLite for development, PostgreSQL-ready
+# Under WSGI connections are persistent: each worker keeps its connection for CONN_MAX_AGE
+# seconds and checks it is still usable before reusing it, instead of connecting per
+# request. Async requests run their queries on per-request threads whose connections
+# would never be reused, so ASGI deployments close them and pool with PgBouncer instead.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -76,9 +94,29 @@ DATABASES = {
         'PASSWORD': '',  # No password required for local development
         'HOST': 'localhost',
         'PORT': '5432',
+        'CONN_MAX_AGE': 0 if SERVED_BY_ASGI else 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Optional read replica for list, summary and export views (dayflow.routers). Set
+# DAYFLOW_REPLICA_NAME (and DAYFLOW_REPLICA_HOST / _PORT) to enable it; to try it locally,
+# point it at a second database and load it with `migrate --database=replica`. Tests
+# mirror it onto the default test database. Users are kept on the primary after a write
+# through the default cache, so the replica is only used once CACHES['default'] is shared.
+REPLICA_DATABASE = 'replica'
+if os.environ.get('DAYFLOW_REPLICA_NAME'):
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': os.environ['DAYFLOW_REPLICA_NAME'],
+        'HOST': os.environ.get('DAYFLOW_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.environ.get('DAYFLOW_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['dayflow.routers.ReplicaRouter']
+# Seconds a user's reads stay on the primary after they write, covering replication lag
+REPLICA_STICKY_SECONDS = 10
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -112,13 +150,115 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads stream to disk in chunks while being hashed; oversized requests are refused up front
+FILE_UPLOAD_HANDLERS = ['filestore.uploadhandler.HashingUploadHandler']
+FILESTORE_MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10 MB
+FILESTORE_CHUNK_SIZE = 64 * 1024
+
+# Cache - per-process memory by default; point 'default' at a cache shared by every worker (e.g.
+# Redis) when running several. Invalidations only reach other processes through a shared cache:
+# the token blacklist filter and the current-employee LRU are skipped without one, and the org
+# chart, skill facets and token users are served from each process's copy until their TTL runs out.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dayflow',
+    },
+    # Leave types, salary templates and company settings (see dayflow.refcache)
+    'reference': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dayflow-reference',
+    },
+}
+REFERENCE_CACHE_ALIAS = 'reference'
+# Seconds a process may serve reference rows changed by another process. Entries are replaced at
+# once in the process that made the change; with a shared 'reference' backend (e.g. Redis) every
+# process sees changes at once and this can be raised to hours.
+REFERENCE_CACHE_TTL = 60
+
+# Seconds the pending-leave badge counts stay cached (they are also refreshed on every state change)
+LEAVE_QUEUE_COUNTS_TTL = 300
+
+# Seconds a serialized org chart stays cached. It is invalidated when a reporting line or a name
+# changes, but only in the process that made the change unless the default cache is shared.
+ORG_CHART_CACHE_TTL = 60
+
+# Seconds skill/certification facet counts stay cached. They are invalidated when a profile's skills
+# change, but only in the process that made the change unless the default cache is shared.
+SKILL_FACETS_CACHE_TTL = 60
+
+# Audit trail (see the audit app): models to track, fields to skip, and fields whose
+# values are recorded masked. Entries are written in batches by a background thread.
+AUDIT_MODELS = {
+    'employees.Employee': {
+        'exclude': ['created_at', 'updated_at', 'profile_image_variants'],
+        'masked': ['bank_account', 'pan_number', 'uan_number'],
+    },
+    'payroll.SalaryStructure': {'exclude': ['created_at', 'updated_at']},
+    'leaves.LeaveRequest': {'exclude': ['created_at', 'updated_at']},
+}
+AUDIT_ASYNC = True
+AUDIT_BATCH_SIZE = 200
+AUDIT_FLUSH_INTERVAL = 1.0  # seconds
+AUDIT_RETENTION_DAYS = 7 * 365  # prune_audit deletes older entries
+AUDIT_COMPACT_AFTER_DAYS = 365  # prune_audit --compact folds older updates per record
+
+# Square profile image variants (label: edge in pixels), rendered as WebP and JPEG.
+# Variant names are content hashes, so the web server may serve media/profiles/variants/
+# as immutable (see "Serving Media in Production" in the README).
+PROFILE_IMAGE_VARIANTS = {'thumb': 64, 'card': 256}
+THUMBNAIL_WORKERS = 2
+
+# Bulk employee import (employees.importer). Generated passwords are long and random and
+# must be changed on first login, so they are hashed with fewer PBKDF2 iterations; Django
+# upgrades the hash to the full work factor when the user first signs in.
+EMPLOYEE_IMPORT_MAX_ROWS = 10000
+EMPLOYEE_IMPORT_PASSWORD_LENGTH = 16
+EMPLOYEE_IMPORT_HASH_ITERATIONS = 10000
+# Hashing processes per web worker, kept small so an import does not take over the host's CPUs
+EMPLOYEE_IMPORT_WORKERS = 2
+
+# Token-bucket rate limits (dayflow.throttling): per scope, buckets per client 'ip', signed-in
+# 'user', 'account' signed in to and the whole 'endpoint'. '10/min' allows bursts of 10 and
+# refills them evenly over a minute. Use LocalBucketStore for tests or a single process.
+RATE_LIMITS = {
+    'login': {'ip': '10/min', 'account': '5/min', 'endpoint': '1200/min'},
+    'register': {'ip': '5/hour'},
+    'check_in': {'user': '10/min'},
+    'payslip_generation': {'user': '5/min', 'endpoint': '20/min'},
+    'employee_import': {'user': '10/hour'},
+    'export': {'user': '60/min'},
+}
+RATE_LIMIT_BACKEND = 'dayflow.throttling.CacheBucketStore'
+
+# Per-request SQL instrumentation (dayflow.sqlstats): Server-Timing and X-DB-* headers, and
+# warnings for query shapes repeated this many times (a likely N+1) or views over their budget
+SQL_TIMING_HEADERS = DEBUG
+SQL_N_PLUS_ONE_LOG = DEBUG
+SQL_N_PLUS_ONE_THRESHOLD = 5
+
+# Prometheus metrics (dayflow.metrics), scraped from /metrics with "Authorization: Bearer
+# <METRICS_TOKEN>" (open without a token only under DEBUG). Multi-process servers need
+# METRICS_DIR: a directory shared by the workers, emptied when the service starts.
+METRICS_TOKEN = os.environ.get('DAYFLOW_METRICS_TOKEN', '')
+METRICS_DIR = os.environ.get('DAYFLOW_METRICS_DIR') or None
+
+# On-demand request profiling for admins (profiling.middleware): requests carrying a token from
+# /api/profiling/token/ are sampled every PROFILING_SAMPLE_INTERVAL seconds and stored with their
+# SQL timeline, keeping the latest PROFILING_MAX_STORED. DAYFLOW_PROFILING=0 unloads it entirely.
+PROFILING_ENABLED = os.environ.get('DAYFLOW_PROFILING', '1') == '1'
+PROFILING_SAMPLE_INTERVAL = 0.001
+PROFILING_TOKEN_MAX_AGE = 600  # seconds
+PROFILING_MAX_STORED = 200
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Django REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # request.user is built from token claims, without a User query (see accounts.authentication)
+        'rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -128,14 +268,35 @@ REST_FRAMEWORK = {
 }
 
 # Simple JWT settings
+# Access tokens are not checked against the database, so keep them short-lived: role
+# changes and deactivations apply at the next refresh, which re-reads the user.
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(hours=12),
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    'TOKEN_USER_CLASS': 'accounts.authentication.ClaimsUser',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.tokens.DayflowTokenRefreshSerializer',
 }
 
+# Revoked refresh tokens (accounts.blacklist): each process screens refreshes with a Bloom
+# filter sized for this many token ids, rebuilt larger when it fills up. The filter needs a
+# default cache shared by all processes (e.g. Redis); with the per-process locmem cache above
+# every refresh looks the token up in the table instead. Run purge_revoked_tokens periodically
+# (e.g. daily) to delete rows past their expiry.
+TOKEN_BLACKLIST_FILTER_CAPACITY = 1_000_000
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = 0.001
+
+# Seconds the full User behind a token principal stays cached (dropped whenever the user is saved)
+AUTH_USER_CACHE_TTL = 60
+
+# Per-process LRU of the requesting user's employee profile (see employees.current). Changes
+# reach other processes through the default cache, so with the per-process locmem cache above
+# the LRU is not used and every request reads the profile from the database.
+CURRENT_EMPLOYEE_CACHE_SIZE = 1024
+CURRENT_EMPLOYEE_CACHE_TTL = 300  # seconds
+
 # CORS settings for React frontend
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:5173',
@@ -0,0 +1,180 @@
+"""
+Per-request SQL instrumentation.
+
+``QueryStatsMiddleware`` counts the queries each request runs, their total
+time and how often each query shape (the SQL with literals and ``IN``
+lists folded, see ``fingerprint``) repeats. A shape repeated
+``SQL_N_PLUS_ONE_THRESHOLD`` times is the mark of an N+1: one query per row
+of a list, such as a serializer reading ``employee.user`` that was never
+joined.
+
+* With ``SQL_TIMING_HEADERS`` responses carry ``Server-Timing`` (shown by
+  browser dev tools) and ``X-DB-Queries`` / ``X-DB-Duplicates`` headers.
+* With ``SQL_N_PLUS_ONE_LOG`` repeated shapes, and requests over their
+  view's query budget, are logged as warnings.
+
+Views declare a budget with ``query_budget``, a number or a dict per
+viewset action::
+
+    query_budget = {'list': 3, 'retrieve': 2}
+
+``dayflow.testing.assert_query_budget(response)`` fails a test when the
+request behind ``response`` went over it.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('sql_stats', default=None)
+
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+def fingerprint(sql):
+    """``sql`` with literals replaced by ``?`` and ``IN`` lists folded, so repeats compare equal."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class QueryStats:
+    """Queries run while this is the current recorder (see ``record``)."""
+    
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+        self.budget = None
+        # (perf_counter at start, seconds, sql) per query once set to a list (see profiling.middleware)
+        self.timeline = None
+    
+    def add(self, sql, seconds, started=None):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[sql] += 1
+        if self.timeline is not None:
+            self.timeline.append((started, seconds, sql))
+    
+    def repeated(self, threshold=2):
+        """(fingerprint, count) for the shapes run at least ``threshold`` times, most frequent first."""
+        shapes = Counter()
+        for sql, count in self.statements.items():
+            shapes[fingerprint(sql)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+    
+    @property
+    def duplicates(self):
+        """Queries beyond the first of each shape."""
+        return sum(count - 1 for _, count in self.repeated())
+    
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.count > self.budget
+
+
+def _record(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add(sql, time.perf_counter() - started, started)
+
+
+def _install(sender, connection, **kwargs):
+    if _record not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record)
+
+
+def install():
+    """Record on every database connection, including those already open in this thread."""
+    connection_created.connect(_install, dispatch_uid='dayflow-sqlstats')
+    for connection in connections.all(initialized_only=True):
+        _install(None, connection)
+
+
+class record:
+    """Context manager making a fresh ``QueryStats`` current for the block (``as stats``)."""
+    
+    def __enter__(self):
+        self.stats = QueryStats()
+        self._token = _current.set(self.stats)
+        return self.stats
+    
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+
+
+def view_budget(view_func, method):
+    """The ``query_budget`` declared by the view behind ``view_func`` for ``method``, or None."""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        # Viewsets: DRF keeps the method -> action mapping on the view function
+        action = getattr(view_func, 'actions', {}).get(method.lower())
+        budget = budget.get(action)
+    return budget
+
+
+class QueryStatsMiddleware:
+    """Record the queries of each request; report them in headers and logs (see module docs)."""
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with record() as stats:
+            request.query_stats = stats
+            started = time.perf_counter()
+            response = self.get_response(request)
+        return self.report(request, response, stats, time.perf_counter() - started)
+    
+    async def __acall__(self, request):
+        # Context variables follow the request into the threads its queries run on
+        with record() as stats:
+            request.query_stats = stats
+            started = time.perf_counter()
+            response = await self.get_response(request)
+        return self.report(request, response, stats, time.perf_counter() - started)
+    
+    def report(self, request, response, stats, seconds):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            stats.budget = view_budget(match.func, request.method)
+        response.query_stats = stats
+        if settings.SQL_TIMING_HEADERS:
+            db_ms = stats.seconds * 1000
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.1f};desc="{stats.count} queries", '
+                f'app;dur={seconds * 1000 - db_ms:.1f}'
+            )
+            response['X-DB-Queries'] = str(stats.count)
+            response['X-DB-Duplicates'] = str(stats.duplicates)
+        if settings.SQL_N_PLUS_ONE_LOG:
+            where = f'{request.method} {request.path}'
+            for shape, count in stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD):
+                logger.warning('Possible N+1 on %s: %d x %s', where, count, shape)
+            if stats.over_budget:
+                logger.warning('%s ran %d queries, over its budget of %d', where, stats.count, stats.budget)
+        return response
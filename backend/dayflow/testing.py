@@ -0,0 +1,73 @@
+"""
+Test helpers for query budgets (see dayflow.sqlstats).
+
+    client = api_client(user)
+    response = client.get('/api/employees/')
+    assert_query_budget(response)           # the view's declared query_budget
+    assert_query_budget(response, 3)        # or an explicit one
+    
+    with max_queries(2):
+        payslip.recalculate()
+"""
+from contextlib import contextmanager
+from datetime import date
+
+from .sqlstats import install, record
+
+
+def make_employee(email, first_name, last_name, role='employee', **fields):
+    """A user with an employee profile; ``fields`` go to the profile."""
+    from accounts.models import User
+    from employees.models import Employee
+    
+    user = User.objects.create_user(
+        email=email, password=None, first_name=first_name, last_name=last_name, role=role
+    )
+    fields.setdefault('department', 'engineering')
+    fields.setdefault('position', 'Engineer')
+    fields.setdefault('hire_date', date(2023, 1, 1))
+    employee = Employee.objects.create(user=user, **fields)
+    return user, employee
+
+
+def api_client(user):
+    """A test client sending an access token for ``user``, as the frontend does."""
+    from rest_framework.test import APIClient
+    from accounts.tokens import DayflowRefreshToken
+    
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {DayflowRefreshToken.for_user(user).access_token}')
+    return client
+
+
+def _failure(stats, budget):
+    message = f'{stats.count} queries, over the budget of {budget}'
+    repeated = stats.repeated()
+    if repeated:
+        message += '; repeated:\n' + '\n'.join(f'  {count} x {shape}' for shape, count in repeated)
+    return AssertionError(message)
+
+
+def assert_query_budget(response, budget=None):
+    """
+    Fail when the request behind a test client ``response`` ran more queries
+    than ``budget`` or, by default, than its view's ``query_budget``.
+    """
+    stats = getattr(response, 'query_stats', None)
+    if stats is None:
+        raise AssertionError('No query stats on the response; is QueryStatsMiddleware installed?')
+    budget = stats.budget if budget is None else budget
+    if budget is None:
+        raise AssertionError('The view declares no query_budget')
+    if stats.count > budget:
+        raise _failure(stats, budget)
+
+
+@contextmanager
+def max_queries(budget):
+    """Fail when the block runs more than ``budget`` queries."""
+    install()
+    with record() as stats:
+        yield stats
+    if stats.count > budget:
+        raise _failure(stats, budget)
@@ -0,0 +1,219 @@
+import asyncio
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+
+from django.core.cache import cache, caches
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished
+from django.db import close_old_connections
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from attendance.models import Attendance
+from leaves.models import LeaveBalance, LeaveRequest, LeaveType
+from . import metrics
+from .datagen import generate
+from .refcache import leave_types
+from .routers import is_pinned, pin_to_primary, replica_configured
+from .sqlstats import fingerprint, view_budget
+from .testing import api_client, assert_query_budget, make_employee, max_queries
+from .throttling import CacheBucketStore, LocalBucketStore, get_store
+
+
+class QueryBudgetHelperTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.leave_types = [LeaveType.objects.create(name=name, days_allowed=10) for name in ('PTO', 'Sick', 'Unpaid')]
+    
+    def test_max_queries_counts_the_block(self):
+        with max_queries(1) as stats:
+            list(LeaveType.objects.all())
+        self.assertEqual(stats.count, 1)
+    
+    def test_max_queries_names_repeated_shapes(self):
+        with self.assertRaisesRegex(AssertionError, r'3 queries, over the budget of 1; repeated:\n  3 x SELECT'):
+            with max_queries(1):
+                for leave_type in self.leave_types:
+                    LeaveType.objects.get(pk=leave_type.pk)
+    
+    def test_fingerprint_folds_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'x' AND b IN (%s, %s, %s) LIMIT 21"),
+            'SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?',
+        )
+    
+    def test_assert_query_budget_needs_stats(self):
+        with self.assertRaisesRegex(AssertionError, 'QueryStatsMiddleware'):
+            assert_query_budget(HttpResponse())
+    
+    def test_view_budget_per_action(self):
+        from leaves.views import LeaveRequestViewSet
+        
+        view = LeaveRequestViewSet.as_view({'get': 'list', 'post': 'create'})
+        self.assertEqual(view_budget(view, 'GET'), 1)
+        self.assertIsNone(view_budget(view, 'POST'))
+
+
+class RateLimitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        get_store().clear()
+        self.addCleanup(get_store().clear)
+    
+    def test_stores_take_from_all_buckets_or_none(self):
+        for store in (LocalBucketStore(), CacheBucketStore()):
+            with self.subTest(store=type(store).__name__):
+                small, large = ('small', 1, 1 / 60), ('large', 5, 5 / 60)
+                self.assertEqual(store.take([small, large]), 0)
+                self.assertAlmostEqual(store.take([small, large]), 60, delta=1)
+                # The refusal left the large bucket alone
+                self.assertEqual([store.take([large]) for _ in range(4)], [0] * 4)
+                self.assertGreater(store.take([large]), 0)
+    
+    @override_settings(RATE_LIMITS={'login': {'ip': '2/min', 'endpoint': '3/min'}})
+    def test_refused_requests_leave_the_endpoint_bucket(self):
+        def login(client):
+            return client.post('/api/auth/login/', {'email': 'john@example.com', 'password': 'x'}, format='json')
+        
+        noisy = APIClient(REMOTE_ADDR='10.0.0.1')
+        self.assertEqual([login(noisy).status_code == 429 for _ in range(5)], [False, False, True, True, True])
+        self.assertIn('Retry-After', login(noisy))
+        self.assertNotEqual(login(APIClient(REMOTE_ADDR='10.0.0.2')).status_code, 429)
+
+
+class ReferenceCacheTests(TestCase):
+
+    def setUp(self):
+        caches['reference'].clear()
+        self.pto = LeaveType.objects.create(name='PTO', days_allowed=10)
+        leave_types.all()
+        # Added by another process: this one's cache does not hear about it
+        [self.sick] = LeaveType.objects.bulk_create([LeaveType(name='Sick', days_allowed=5)])
+    
+    def test_get_rereads_rows_added_elsewhere(self):
+        self.assertEqual(leave_types.get(self.sick.pk).name, 'Sick')
+        self.assertIn(self.sick, leave_types.all())
+    
+    def test_get_of_a_missing_row_raises(self):
+        for pk in (self.sick.pk + 1, 'x'):
+            with self.subTest(pk=pk):
+                with self.assertRaises(LeaveType.DoesNotExist):
+                    leave_types.get(pk)
+        with self.assertNumQueries(0):
+            leave_types.get(self.pto.pk)
+    
+    def test_retrieve_and_leave_request_see_rows_added_elsewhere(self):
+        user, _ = make_employee('john@example.com', 'John', 'Doe')
+        client = api_client(user)
+        self.assertEqual(client.get(f'/api/leaves/types/{self.sick.pk}/').status_code, 200)
+        
+        caches['reference'].clear()
+        leave_types.all()
+        [unpaid] = LeaveType.objects.bulk_create([LeaveType(name='Unpaid', days_allowed=0)])
+        start = timezone.localdate() + timedelta(days=7)
+        response = client.post('/api/leaves/requests/', {
+            'leave_type': unpaid.pk, 'start_date': start, 'end_date': start,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+
+# The test database stands in for the replica
+@override_settings(REPLICA_DATABASE='default')
+class ReplicaRoutingTests(TestCase):
+
+    def shared_cache(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        return override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }})
+    
+    def test_replica_needs_a_shared_cache(self):
+        self.assertFalse(replica_configured())
+        with self.shared_cache():
+            self.assertTrue(replica_configured())
+    
+    def test_pin_round_trips_through_the_shared_cache(self):
+        with self.shared_cache():
+            pin_to_primary(1)
+            self.assertTrue(is_pinned(1))
+            self.assertFalse(is_pinned(2))
+
+
+class GenerateDataTests(TestCase):
+
+    def test_approved_leave_is_in_attendance_and_balances(self):
+        org = generate(employees=20, days=60, leave_density=0.1, pending=5)
+        approved = LeaveRequest.objects.filter(status='approved')
+        self.assertTrue(approved.exists())
+        
+        for leave_request in approved:
+            self.assertEqual(
+                set(leave_request.attendance_records.values_list('date', flat=True)),
+                set(leave_request.working_dates()),
+            )
+        self.assertFalse(Attendance.objects.filter(status='on_leave', leave_request__isnull=True).exists())
+        self.assertEqual(
+            LeaveBalance.objects.aggregate(used=Sum('used_days'))['used'],
+            sum(leave_request.total_days for leave_request in approved),
+        )
+        self.assertEqual(Attendance.objects.count(), org.attendance_rows)
+        self.assertEqual(len(org.pending), 5)
+
+
+@override_settings(METRICS_DIR=None)
+class MetricsShardTests(SimpleTestCase):
+
+    def setUp(self):
+        # As the test client does: the test database must outlive each request
+        request_finished.disconnect(close_old_connections)
+        self.addCleanup(request_finished.connect, close_old_connections)
+    
+    async def get(self, handler, path):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+            'headers': [(b'host', b'testserver')],
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }
+        messages, requests, sent = [], [{'type': 'http.request', 'body': b'', 'more_body': False}], asyncio.Event()
+        
+        async def receive():
+            if requests:
+                return requests.pop()
+            await sent.wait()
+            return {'type': 'http.disconnect'}
+        
+        async def send(message):
+            messages.append(message)
+            if message['type'] == 'http.response.body' and not message.get('more_body'):
+                sent.set()
+        
+        await handler(scope, receive, send)
+        return messages[0]['status']
+    
+    def test_threads_per_request_reuse_shards(self):
+        def responses():
+            return sum(value for key, value in metrics._totals().items() if key.startswith(metrics.responses.name))
+        
+        handler, statuses = ASGIHandler(), []
+        
+        def serve():
+            statuses.append(asyncio.run(self.get(handler, '/api/employees/')))
+        
+        before, shards = responses(), len(metrics._shards)
+        # As under a server that hands each request to a short-lived thread
+        for _ in range(50):
+            thread = threading.Thread(target=serve)
+            thread.start()
+            thread.join()
+        self.assertEqual(statuses, [401] * 50)
+        self.assertLessEqual(len(metrics._shards) - shards, 3)
+        self.assertEqual(responses() - before, 50)
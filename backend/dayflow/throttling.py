@@ -0,0 +1,194 @@
+"""
+Token-bucket rate limiting for expensive endpoints.
+
+Views opt in with ``throttle_classes = RATE_LIMITED`` and a
+``throttle_scope`` naming an entry of ``settings.RATE_LIMITS``::
+
+    RATE_LIMITS = {
+        'login': {'ip': '10/min', 'account': '5/min', 'endpoint': '300/min'},
+    }
+
+Each entry can limit requests per client IP, per signed-in user, per
+account being signed in to (the submitted email) and for the endpoint as a
+whole. ``'10/min'`` is a bucket of 10 requests refilled evenly over a
+minute, so short bursts pass while sustained load is held to the rate.
+Buckets a scope does not configure are not checked. A request takes a
+token from every bucket its scope configures, or from none of them when any
+is empty, so refused requests do not drain the others (above all the shared
+endpoint bucket). Refused requests get a 429 with ``Retry-After`` set to the
+seconds until every bucket has a token.
+
+Bucket state lives in the store named by ``settings.RATE_LIMIT_BACKEND``:
+``CacheBucketStore`` shares it between processes through the default cache,
+``LocalBucketStore`` keeps it in process memory (tests, single process).
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refill of 10/60 tokens per second)."""
+    try:
+        count, period = rate.split('/')
+        capacity = int(count)
+        seconds = PERIODS[period.strip()]
+    except (ValueError, KeyError):
+        raise ImproperlyConfigured(f'Invalid rate {rate!r}; expected e.g. "10/min"')
+    return capacity, capacity / seconds
+
+
+def refill(state, capacity, per_second, now):
+    """Tokens in a bucket last left at ``state`` = (tokens, timestamp)."""
+    if state is None:
+        return capacity
+    tokens, stamp = state
+    return min(capacity, tokens + (now - stamp) * per_second)
+
+
+def shortfall(levels, buckets):
+    """Seconds until every bucket holds a token again; 0 if they all do now."""
+    return max(
+        ((1 - tokens) / per_second for tokens, (_, _, per_second) in zip(levels, buckets) if tokens < 1),
+        default=0,
+    )
+
+
+class LocalBucketStore:
+    """Buckets in this process's memory, least recently used dropped beyond ``max_entries``."""
+    
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def take(self, buckets):
+        """
+        Take one token from each of ``buckets`` ((key, capacity, per_second)
+        triples) or from none; returns 0 if granted, else seconds until all have one.
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = [refill(self._buckets.get(key), capacity, per_second, now) for key, capacity, per_second in buckets]
+            wait = shortfall(levels, buckets)
+            if wait:
+                return wait
+            for (key, _, _), tokens in zip(buckets, levels):
+                self._buckets[key] = (tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return 0
+    
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in the default cache, shared by every process using it. Reads and
+    writes are not atomic, so concurrent requests for one key can occasionally
+    both spend the same token; limits hold to within that.
+    """
+    
+    key_prefix = 'ratelimit:'
+    
+    def take(self, buckets):
+        now = time.time()
+        states = cache.get_many([self.key_prefix + key for key, _, _ in buckets])
+        levels = [
+            refill(states.get(self.key_prefix + key), capacity, per_second, now)
+            for key, capacity, per_second in buckets
+        ]
+        wait = shortfall(levels, buckets)
+        if wait:
+            return wait
+        for (key, capacity, per_second), tokens in zip(buckets, levels):
+            # Keep the entry until the bucket would be full again
+            cache.set(self.key_prefix + key, (tokens - 1, now), int(capacity / per_second) + 1)
+        return 0
+    
+    def clear(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.RATE_LIMIT_BACKEND)()
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    The buckets ``settings.RATE_LIMITS`` configures for the view's
+    ``throttle_scope``, one per kind, each keyed by its ``get_<kind>_key``.
+    """
+    
+    # The endpoint bucket, which every caller shares, comes last
+    bucket_kinds = ('ip', 'user', 'account', 'endpoint')
+    
+    def get_ip_key(self, request):
+        return self.get_ident(request)
+    
+    def get_user_key(self, request):
+        # Anonymous requests share their IP's bucket
+        if request.user and request.user.is_authenticated:
+            return f'user-{request.user.id}'
+        return f'ip-{self.get_ident(request)}'
+    
+    def get_account_key(self, request):
+        # The account being signed in to, whichever IPs the attempts come from
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+    
+    def get_endpoint_key(self, request):
+        return 'all'
+    
+    def get_buckets(self, request, view):
+        """(key, capacity, per_second) for each bucket that applies to ``request``."""
+        scope = getattr(view, 'throttle_scope', None)
+        rates = settings.RATE_LIMITS.get(scope, {}) if scope else {}
+        buckets = []
+        for kind in self.bucket_kinds:
+            if kind not in rates:
+                continue
+            ident = getattr(self, f'get_{kind}_key')(request)
+            if ident is not None:
+                buckets.append((f'{scope}:{kind}:{ident}', *parse_rate(rates[kind])))
+        return buckets
+    
+    def allow_request(self, request, view):
+        self.retry_after = None
+        buckets = self.get_buckets(request, view)
+        if not buckets:
+            return True
+        wait = get_store().take(buckets)
+        if wait:
+            self.retry_after = wait
+            return False
+        return True
+    
+    def wait(self):
+        return self.retry_after
+
+
+RATE_LIMITED = [TokenBucketThrottle]
@@ -5,6 +5,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from dayflow.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -13,6 +14,9 @@ urlpatterns = [
     path('api/attendance/', include('attendance.urls')),
     path('api/leaves/', include('leaves.urls')),
     path('api/payroll/', include('payroll.urls')),
+    path('api/audit/', include('audit.urls')),
+    path('api/profiling/', include('profiling.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files in development
@@ -0,0 +1,124 @@
+"""
+The employee profile behind the current request.
+
+Views used to repeat ``Employee.objects.get(user=request.user)`` with their
+own 404 handling, sometimes several times per request. The profile is now
+resolved at most once per request (``select_related('user')``) and kept in a
+small per-process LRU keyed by user id. Entries are dropped when the employee
+or its user is saved or deleted (see employees.signals); a version number in
+the shared cache carries that to the other worker processes, and entries also
+expire after ``CURRENT_EMPLOYEE_CACHE_TTL`` seconds.
+
+The version only reaches other processes when the ``default`` cache is
+shared by them all. With a per-process one (locmem, dummy) they would serve
+a profile changed elsewhere until it expired, so the LRU is skipped and each
+request reads the profile from the database.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from dayflow.caching import shared_cache
+from dayflow.metrics import cache_counters
+from .models import Employee
+
+VERSION_KEY = 'employees:current:{user_id}'
+
+_entries = OrderedDict()  # user id -> (version, expires at, employee or None)
+_lock = threading.Lock()
+_hits, _misses = cache_counters('current_employee')
+
+
+class EmployeeProfileMissing(NotFound):
+    default_detail = 'Employee profile not found'
+    default_code = 'employee_not_found'
+
+
+def _version(user_id):
+    return cache.get(VERSION_KEY.format(user_id=user_id), 0)
+
+
+def _load(user_id):
+    # From the primary, so a lagging replica cannot put a stale profile in the cache
+    return Employee.objects.using(router.db_for_write(Employee)).select_related('user').filter(user_id=user_id).first()
+
+
+def get_employee(user_id):
+    """The employee (with its user) for ``user_id``, or None; callers get their own copy."""
+    if not shared_cache():
+        return _load(user_id)
+    version = _version(user_id)
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is not None and entry[0] == version and entry[1] > now:
+            _entries.move_to_end(user_id)
+            _hits.inc()
+            return copy.deepcopy(entry[2])
+    
+    _misses.inc()
+    employee = _load(user_id)
+    with _lock:
+        _entries[user_id] = (version, now + settings.CURRENT_EMPLOYEE_CACHE_TTL, employee)
+        _entries.move_to_end(user_id)
+        while len(_entries) > settings.CURRENT_EMPLOYEE_CACHE_SIZE:
+            _entries.popitem(last=False)
+    return copy.deepcopy(employee)
+
+
+def invalidate(user_id):
+    """Drop the cached profile for ``user_id`` here and, via the version, in other processes."""
+    with _lock:
+        _entries.pop(user_id, None)
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def get_request_employee(request):
+    """The current user's employee, looked up at most once per request (None without a profile)."""
+    request = getattr(request, '_request', request)
+    if not hasattr(request, '_current_employee'):
+        user = request.user
+        request._current_employee = get_employee(user.id) if user.is_authenticated else None
+    return request._current_employee
+
+
+class CurrentEmployeeMixin:
+    """
+    View helpers for the requesting user's own employee profile. Both getters
+    raise ``EmployeeProfileMissing``, answered as a 404 ``{'error': ...}``.
+    """
+    
+    def get_current_employee_pk(self):
+        """Primary key only - read from the token claims, so no query."""
+        employee_pk = self.request.user.employee_pk
+        if employee_pk is None:
+            raise EmployeeProfileMissing()
+        return employee_pk
+    
+    def get_current_employee(self):
+        """The full profile, with its user."""
+        employee = get_request_employee(self.request)
+        if employee is None:
+            raise EmployeeProfileMissing()
+        return employee
+    
+    def handle_exception(self, exc):
+        if isinstance(exc, EmployeeProfileMissing):
+            return Response({'error': str(exc.detail)}, status=status.HTTP_404_NOT_FOUND)
+        return super().handle_exception(exc)
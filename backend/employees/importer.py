@@ -0,0 +1,275 @@
+"""
+Bulk employee onboarding from CSV or NDJSON.
+
+The whole file is validated before anything is written: one query finds
+emails that are already taken, one query resolves managers, login id
+serials are reserved in blocks per prefix, temporary passwords are hashed
+in a process pool (before the transaction opens) and users and employees
+go in with ``bulk_create``.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.db import transaction
+from rest_framework import serializers
+
+from accounts.models import LoginIdSequence, User
+from . import orgchart
+from .models import Employee
+
+REPORT_COLUMNS = ['row', 'status', 'email', 'login_id', 'password', 'employee_id', 'errors']
+HASH_CHUNK_SIZE = 50
+
+
+class ImportFileError(Exception):
+    """The uploaded file could not be read as CSV or NDJSON."""
+
+
+class EmployeeImportRowSerializer(serializers.ModelSerializer):
+    """One import row; the same fields as EmployeeCreateSerializer, managers given by email."""
+    
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=100)
+    last_name = serializers.CharField(max_length=100)
+    role = serializers.ChoiceField(choices=['employee', 'hr', 'admin'], default='employee')
+    manager_email = serializers.EmailField(required=False, allow_blank=True)
+    
+    class Meta:
+        model = Employee
+        fields = [
+            'email', 'first_name', 'last_name', 'role',
+            'department', 'position', 'employment_type', 'hire_date',
+            'phone', 'address', 'company_name', 'location', 'manager_email',
+            'date_of_birth', 'gender', 'marital_status'
+        ]
+    
+    def validate_email(self, value):
+        # Uniqueness is checked for the whole file at once (see EmployeeImport.validate)
+        return value.lower()
+    
+    def validate_manager_email(self, value):
+        return value.lower()
+
+
+class TemporaryPasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with a reduced work factor for generated onboarding passwords.
+    
+    Those passwords are long and random, so the work factor adds little, and
+    the hashes share the pbkdf2_sha256 format: Django re-hashes them with the
+    full iteration count on first login (which must change them anyway).
+    """
+    
+    iterations = settings.EMPLOYEE_IMPORT_HASH_ITERATIONS
+
+
+def _hash_passwords(passwords):
+    hasher = TemporaryPasswordHasher()
+    return [make_password(password, hasher=hasher) for password in passwords]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _hash_pool():
+    """The hashing pool, started on first use and kept for the life of the process."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: a fork would copy this process's threads (audit writer,
+            # thumbnails) and its open database connections into the workers
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.EMPLOYEE_IMPORT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return _pool
+
+
+def _forget_pool():
+    global _pool, _pool_lock
+    _pool, _pool_lock = None, threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pool)
+
+
+def hash_passwords(passwords):
+    """Hash in the process pool; small batches are not worth the round trip."""
+    global _pool
+    if len(passwords) <= HASH_CHUNK_SIZE:
+        return _hash_passwords(passwords)
+    chunks = [passwords[i:i + HASH_CHUNK_SIZE] for i in range(0, len(passwords), HASH_CHUNK_SIZE)]
+    pool = _hash_pool()
+    try:
+        return [hashed for chunk in pool.map(_hash_passwords, chunks) for hashed in chunk]
+    except BrokenProcessPool:
+        # A worker died; start a new pool next time and finish this batch here
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        return _hash_passwords(passwords)
+
+
+def allocate_login_ids(names):
+    """
+    Login ids for ``[(first_name, last_name), ...]`` in order, reserving one
+    block of serials per prefix instead of allocating row by row.
+    """
+    prefixes = [User.login_id_prefix(first_name, last_name) for first_name, last_name in names]
+    next_serial = LoginIdSequence.reserve_many(Counter(prefixes))
+    
+    login_ids = []
+    for prefix in prefixes:
+        login_ids.append(LoginIdSequence.format(prefix, next_serial[prefix]))
+        next_serial[prefix] += 1
+    return login_ids
+
+
+def read_rows(uploaded, file_format):
+    """Rows as dicts from a CSV (header row) or NDJSON (one object per line) upload."""
+    try:
+        text = io.TextIOWrapper(uploaded, encoding='utf-8-sig', newline='')
+        if file_format == 'csv':
+            return [
+                {key.strip(): (value or '').strip() for key, value in row.items() if key}
+                for row in csv.DictReader(text)
+            ]
+        if file_format == 'ndjson':
+            rows = [json.loads(line) for line in text if line.strip()]
+            if not all(isinstance(row, dict) for row in rows):
+                raise ImportFileError('Every NDJSON line must be a JSON object')
+            return rows
+    except (UnicodeDecodeError, csv.Error, json.JSONDecodeError) as exc:
+        raise ImportFileError(f'Could not read {file_format.upper()} file: {exc}')
+    raise ImportFileError("Format must be 'csv' or 'ndjson'")
+
+
+class EmployeeImport:
+    """Validate and create a batch of employees, collecting a per-row report."""
+    
+    def __init__(self, rows, first_row=1):
+        self.rows = rows
+        self.first_row = first_row
+        self.valid = []  # (row number, validated data)
+        self.managers = {}
+        self.report = []
+    
+    @classmethod
+    def from_file(cls, uploaded, file_format=None):
+        if file_format is None:
+            name = (getattr(uploaded, 'name', '') or '').lower()
+            file_format = 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'csv'
+        # CSV row numbers count the header line so they match what a spreadsheet shows
+        return cls(read_rows(uploaded, file_format), first_row=2 if file_format == 'csv' else 1)
+    
+    def validate(self):
+        row_serializer = EmployeeImportRowSerializer()
+        candidates = []
+        for number, row in enumerate(self.rows, start=self.first_row):
+            # Blank optional columns fall back to the model defaults
+            row = {key: value for key, value in row.items() if value not in ('', None)}
+            try:
+                candidates.append((number, row_serializer.run_validation(row)))
+            except serializers.ValidationError as exc:
+                self._fail(number, str(row.get('email', '')), exc.detail)
+        
+        emails = Counter(data['email'] for _, data in candidates)
+        existing = set(User.objects.filter(email__in=list(emails)).values_list('email', flat=True))
+        manager_emails = {data['manager_email'] for _, data in candidates if data.get('manager_email')}
+        self.managers = dict(
+            User.objects.filter(email__in=manager_emails).values_list('email', 'id')
+        )
+        importing = set(emails) - existing
+        
+        for number, data in candidates:
+            email = data['email']
+            manager_email = data.get('manager_email')
+            if emails[email] > 1:
+                self._fail(number, email, {'email': ['Email appears more than once in this file.']})
+            elif email in existing:
+                self._fail(number, email, {'email': ['A user with this email already exists.']})
+            elif manager_email and manager_email not in self.managers and manager_email not in importing:
+                self._fail(number, email, {'manager_email': ['No user with this email.']})
+            else:
+                self.valid.append((number, data))
+        return self
+    
+    def _fail(self, number, email, errors):
+        self.report.append({
+            'row': number, 'status': 'error', 'email': email,
+            'errors': json.dumps(errors, default=str),
+        })
+    
+    def create(self):
+        """Insert every valid row; returns the created employees."""
+        if not self.valid:
+            return []
+        # Hashing is the slow part: do it before the transaction holds any locks
+        passwords = [User.generate_password(settings.EMPLOYEE_IMPORT_PASSWORD_LENGTH) for _ in self.valid]
+        return self._insert(passwords, hash_passwords(passwords))
+    
+    @transaction.atomic
+    def _insert(self, passwords, hashed):
+        login_ids = allocate_login_ids([(data['first_name'], data['last_name']) for _, data in self.valid])
+        
+        users = User.objects.bulk_create([
+            User(
+                email=data.pop('email'),
+                first_name=data.pop('first_name'),
+                last_name=data.pop('last_name'),
+                role=data.pop('role'),
+                login_id=login_id,
+                password=password_hash,
+                must_change_password=True,
+            )
+            for (_, data), login_id, password_hash in zip(self.valid, login_ids, hashed)
+        ], batch_size=1000)
+        
+        # Managers may be hired in the same file
+        self.managers.update({user.email: user.id for user in users})
+        employees = Employee.objects.bulk_create([
+            Employee(
+                user=user,
+                employee_id=user.login_id,
+                manager_id=self.managers.get(data.pop('manager_email', None) or None),
+                **data
+            )
+            for (_, data), user in zip(self.valid, users)
+        ], batch_size=1000)
+        transaction.on_commit(orgchart.invalidate)
+        
+        for (number, _), user, password in zip(self.valid, users, passwords):
+            self.report.append({
+                'row': number, 'status': 'created', 'email': user.email,
+                'login_id': user.login_id, 'password': password, 'employee_id': user.login_id,
+            })
+        return employees
+    
+    def summary(self):
+        created = sum(1 for line in self.report if line['status'] == 'created')
+        return {
+            'rows': len(self.rows),
+            'valid': len(self.valid),
+            'created': created,
+            'errors': sum(1 for line in self.report if line['status'] == 'error'),
+        }
+    
+    def report_csv(self):
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(sorted(self.report, key=lambda line: line['row']))
+        return output.getvalue()
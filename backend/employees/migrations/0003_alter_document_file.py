@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:54
+
+import filestore.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0002_employee_about_me_employee_bank_account_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="document",
+            name="file",
+            field=models.FileField(
+                storage=filestore.storage.get_blob_storage, upload_to="documents/"
+            ),
+        ),
+    ]
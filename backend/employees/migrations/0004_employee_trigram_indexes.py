@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:57
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_user_trigram_indexes"),
+        ("employees", "0003_alter_document_file"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("employee_id"),
+                    name="gin_trgm_ops",
+                ),
+                name="employee_id_upper_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("position"),
+                    name="gin_trgm_ops",
+                ),
+                name="employee_position_upper_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("department"),
+                    name="gin_trgm_ops",
+                ),
+                name="employee_dept_upper_trgm",
+            ),
+        ),
+    ]
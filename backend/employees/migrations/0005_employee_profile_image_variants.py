@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0004_employee_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="employee",
+            name="profile_image_variants",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:11
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0005_employee_profile_image_variants"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["skills"], name="employee_skills_gin"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["certifications"], name="employee_certifications_gin"
+            ),
+        ),
+    ]
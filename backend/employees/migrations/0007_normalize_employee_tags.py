@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:20
+
+from django.db import migrations
+
+TAG_FIELDS = ("skills", "certifications")
+
+
+def normalize(tags):
+    if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+        return tags
+    normalized = []
+    for tag in tags:
+        tag = tag.strip().lower()
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
+
+
+def normalize_employee_tags(apps, schema_editor):
+    Employee = apps.get_model("employees", "Employee")
+
+    changed = []
+    for employee in Employee.objects.only(*TAG_FIELDS).iterator():
+        values = [getattr(employee, field) for field in TAG_FIELDS]
+        normalized = [normalize(value) for value in values]
+        if normalized != values:
+            for field, value in zip(TAG_FIELDS, normalized):
+                setattr(employee, field, value)
+            changed.append(employee)
+    Employee.objects.bulk_update(changed, TAG_FIELDS, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0006_employee_skill_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_employee_tags, migrations.RunPython.noop),
+    ]
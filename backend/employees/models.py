@@ -1,8 +1,45 @@
 """
 Models for employee profiles and documents.
 """
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.conf import settings
+from filestore.storage import get_blob_storage
+
+
+class EmployeeQuerySet(models.QuerySet):
+    """QuerySet helpers for employee listings."""
+    
+    def with_attendance_status(self, date=None):
+        """
+        Annotate ``today_status`` ('leave', 'present' or 'absent') in the main
+        query instead of running two lookups per employee.
+        """
+        from attendance.models import Attendance
+        from django.utils import timezone
+        
+        date = date or timezone.now().date()
+        day = Attendance.objects.filter(employee=models.OuterRef('pk'), date=date)
+        
+        return self.annotate(
+            today_status=models.Case(
+                models.When(models.Exists(day.filter(status='on_leave')), then=models.Value('leave')),
+                models.When(models.Exists(day.filter(check_in__isnull=False)), then=models.Value('present')),
+                default=models.Value('absent'),
+                output_field=models.CharField(),
+            )
+        )
+
+
+def normalize_tags(tags):
+    """Trimmed, lower-cased and de-duplicated, so skill search can match exactly."""
+    normalized = []
+    for tag in tags:
+        tag = tag.strip().lower()
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
 
 
 class Employee(models.Model):
@@ -92,49 +129,89 @@ class Employee(models.Model):
     
     # Media
     profile_image = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    # Resized copies rendered in the background: {size label: {format: storage name}}
+    profile_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = EmployeeQuerySet.as_manager()
+    
     class Meta:
         ordering = ['employee_id']
+        indexes = [
+            # Trigram indexes for employee search (see employees.search)
+            GinIndex(OpClass(Upper('employee_id'), name='gin_trgm_ops'), name='employee_id_upper_trgm'),
+            GinIndex(OpClass(Upper('position'), name='gin_trgm_ops'), name='employee_position_upper_trgm'),
+            GinIndex(OpClass(Upper('department'), name='gin_trgm_ops'), name='employee_dept_upper_trgm'),
+            # Containment (@>) and any-of (?|) lookups for skill search (see employees.skills)
+            GinIndex(fields=['skills'], name='employee_skills_gin'),
+            GinIndex(fields=['certifications'], name='employee_certifications_gin'),
+        ]
     
     def __str__(self):
         return f"{self.employee_id} - {self.user.full_name}"
     
+    # Fields whose changes reshape the org chart (see employees.signals)
+    ORG_CHART_FIELDS = ('manager_id', 'department', 'position', 'employee_id')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_org_values = tuple(instance.__dict__.get(f) for f in cls.ORG_CHART_FIELDS)
+        instance._loaded_profile_image = instance.__dict__.get('profile_image')
+        instance._loaded_tags = instance.tag_values()
+        return instance
+    
+    def org_chart_changed(self):
+        """Whether this save moves the employee in (or into) the org chart."""
+        loaded = getattr(self, '_loaded_org_values', None)
+        return loaded is None or loaded != tuple(self.__dict__.get(f) for f in self.ORG_CHART_FIELDS)
+    
+    def tag_values(self):
+        # Copies, so in-place edits of the lists still show up as changes
+        return tuple(list(self.__dict__.get(f) or []) for f in ('skills', 'certifications'))
+    
+    def tags_changed(self):
+        """Whether this save changes the skills or certifications that were loaded."""
+        loaded = getattr(self, '_loaded_tags', None)
+        return loaded is None or loaded != self.tag_values()
+    
+    def profile_image_changed(self):
+        """Whether this save stores a different profile image than was loaded."""
+        return (self.profile_image.name or None) != (getattr(self, '_loaded_profile_image', None) or None)
+    
     def save(self, *args, **kwargs):
         if not self.employee_id and self.user:
             # Sync with User's login_id
             self.employee_id = self.user.login_id
+        for field in ('skills', 'certifications'):
+            value = getattr(self, field)
+            if isinstance(value, list) and all(isinstance(tag, str) for tag in value):
+                setattr(self, field, normalize_tags(value))
         super().save(*args, **kwargs)
     
     def get_attendance_status(self):
         """Get today's attendance status for dashboard display."""
         from attendance.models import Attendance
-        from leaves.models import LeaveRequest
         from django.utils import timezone
         
         today = timezone.now().date()
         
-        # Check if on approved leave
-        on_leave = LeaveRequest.objects.filter(
-            employee=self,
-            status='approved',
-            start_date__lte=today,
-            end_date__gte=today
-        ).exists()
-        
-        if on_leave:
-            return 'leave'  # Orange dot
-        
-        # Check if checked in today
+        # Approved leave is materialized into attendance, so one lookup covers both
         attendance = Attendance.objects.filter(
             employee=self,
             date=today
-        ).first()
+        ).only('status', 'check_in').first()
+        
+        if attendance is None:
+            return 'absent'  # Yellow dot
+        
+        if attendance.status == 'on_leave':
+            return 'leave'  # Orange dot
         
-        if attendance and attendance.check_in:
+        if attendance.check_in:
             return 'present'  # Green dot
         
         return 'absent'  # Yellow dot
@@ -154,7 +231,7 @@ class Document(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='documents')
     document_type = models.CharField(max_length=20, choices=DOCUMENT_TYPE_CHOICES)
     title = models.CharField(max_length=200)
-    file = models.FileField(upload_to='documents/')
+    file = models.FileField(upload_to='documents/', storage=get_blob_storage)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
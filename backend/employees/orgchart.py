@@ -0,0 +1,163 @@
+"""
+Org chart queries over the ``Employee.manager`` hierarchy.
+
+Subtrees and management chains are walked with a recursive CTE, so each
+lookup is a single query regardless of depth. Serialized results are
+cached under a version number that is bumped whenever a reporting line
+or a name changes (see employees.signals).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from dayflow.metrics import cache_counters
+from .models import Employee
+
+VERSION_KEY = 'orgchart:version'
+_hits, _misses = cache_counters('org_chart')
+
+# Guards against cycles (A manages B manages A) in hand-edited data
+MAX_DEPTH = 64
+
+
+def _tables():
+    from accounts.models import User
+    return Employee._meta.db_table, User._meta.db_table
+
+
+def _node(row):
+    employee_id, code, user_id, manager_id, first_name, last_name, department, position, depth = row
+    return {
+        'id': employee_id,
+        'employee_id': code,
+        'user_id': user_id,
+        'manager': manager_id,
+        'full_name': f"{first_name} {last_name}",
+        'department': department,
+        'position': position,
+        'depth': depth,
+    }
+
+
+def _fetch(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [_node(row) for row in cursor.fetchall()]
+
+
+def subtree_rows(employee_pk, max_depth=MAX_DEPTH):
+    """Flat rows for ``employee_pk`` and everyone below them, in one query."""
+    employee_table, user_table = _tables()
+    return _fetch(f"""
+        WITH RECURSIVE tree (id, user_id, depth) AS (
+            SELECT id, user_id, 0 FROM {employee_table} WHERE id = %s
+            UNION ALL
+            SELECT e.id, e.user_id, t.depth + 1
+            FROM {employee_table} e JOIN tree t ON e.manager_id = t.user_id
+            WHERE t.depth < %s
+        )
+        SELECT e.id, e.employee_id, e.user_id, e.manager_id, u.first_name, u.last_name,
+               e.department, e.position, t.depth
+        FROM tree t
+        JOIN {employee_table} e ON e.id = t.id
+        JOIN {user_table} u ON u.id = e.user_id
+        ORDER BY t.depth, e.employee_id
+    """, [employee_pk, max_depth])
+
+
+def chain_rows(employee_pk, max_depth=MAX_DEPTH):
+    """The employee followed by each manager up to the top, in one query."""
+    employee_table, user_table = _tables()
+    return _fetch(f"""
+        WITH RECURSIVE chain (id, manager_id, depth) AS (
+            SELECT id, manager_id, 0 FROM {employee_table} WHERE id = %s
+            UNION ALL
+            SELECT e.id, e.manager_id, c.depth + 1
+            FROM {employee_table} e JOIN chain c ON e.user_id = c.manager_id
+            WHERE c.depth < %s
+        )
+        SELECT e.id, e.employee_id, e.user_id, e.manager_id, u.first_name, u.last_name,
+               e.department, e.position, c.depth
+        FROM chain c
+        JOIN {employee_table} e ON e.id = c.id
+        JOIN {user_table} u ON u.id = e.user_id
+        ORDER BY c.depth
+    """, [employee_pk, max_depth])
+
+
+def all_rows():
+    """Every employee as a flat row (depth is filled in when the tree is built)."""
+    rows = Employee.objects.order_by('employee_id').values_list(
+        'id', 'employee_id', 'user_id', 'manager_id', 'user__first_name', 'user__last_name',
+        'department', 'position'
+    )
+    return [_node((*row, None)) for row in rows]
+
+
+def build_tree(rows, root_ids=None):
+    """
+    Nest flat rows under their managers. Without ``root_ids``, anyone whose
+    manager is not in ``rows`` becomes a root.
+    """
+    by_user = {row['user_id']: dict(row, reports=[]) for row in rows}
+    roots = []
+    for node in by_user.values():
+        parent = by_user.get(node['manager'])
+        is_root = node['id'] in root_ids if root_ids is not None else parent is None
+        if is_root or parent is None:
+            roots.append(node)
+        else:
+            parent['reports'].append(node)
+    
+    # Assign depths top-down (the full-tree query does not compute them)
+    stack = [(node, 0) for node in roots]
+    while stack:
+        node, depth = stack.pop()
+        node['depth'] = depth
+        stack.extend((child, depth + 1) for child in node['reports'])
+    return roots
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidate():
+    """Drop every cached org chart by moving to a new version."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def _cached(name, build):
+    key = f"orgchart:v{_version()}:{name}"
+    result = cache.get(key)
+    if result is None:
+        _misses.inc()
+        result = build()
+        cache.set(key, result, settings.ORG_CHART_CACHE_TTL)
+    else:
+        _hits.inc()
+    return result
+
+
+def org_chart():
+    """The whole organization as a forest of nested nodes."""
+    return _cached('all', lambda: build_tree(all_rows()))
+
+
+def subtree(employee_pk):
+    """Nested subtree rooted at ``employee_pk``."""
+    def build():
+        roots = build_tree(subtree_rows(employee_pk), root_ids={employee_pk})
+        return roots[0] if roots else None
+    return _cached(f'subtree:{employee_pk}', build)
+
+
+def management_chain(employee_pk):
+    """The employee and their managers, nearest first."""
+    return _cached(f'chain:{employee_pk}', lambda: chain_rows(employee_pk))
@@ -0,0 +1,88 @@
+"""
+Employee search: trigram-ranked matching on PostgreSQL with a prefix
+autocomplete for pickers.
+
+GIN trigram indexes on UPPER() of User (first_name, last_name, email)
+and Employee (employee_id, position, department) back the icontains /
+istartswith matches, and plain trigram indexes on the name columns back
+the word-similarity operator, so neither needs a sequential scan.
+"""
+from django.db import connection
+from django.db.models import Q, Value
+from django.db.models.functions import Concat, Greatest
+
+SEARCH_FIELDS = [
+    'user__first_name',
+    'user__last_name',
+    'user__email',
+    'employee_id',
+    'position',
+    'department',
+]
+
+# Names are where typos happen; these also get word-similarity matching
+FUZZY_FIELDS = ['user__first_name', 'user__last_name']
+
+
+def _uses_trigrams():
+    return connection.vendor == 'postgresql'
+
+
+def search_employees(queryset, term):
+    """Filter ``queryset`` to employees matching ``term``, best matches first."""
+    term = term.strip()
+    if not term:
+        return queryset
+    
+    matches = Q()
+    for field in SEARCH_FIELDS:
+        matches |= Q(**{f'{field}__icontains': term})
+    
+    if not _uses_trigrams():
+        return queryset.filter(matches)
+    
+    from django.contrib.postgres.search import TrigramWordSimilarity
+    
+    # Typo tolerance: "jhon smtih" still finds John Smith
+    for field in FUZZY_FIELDS:
+        matches |= Q(**{f'{field}__trigram_word_similar': term})
+    
+    rank = Greatest(
+        TrigramWordSimilarity(term, Concat('user__first_name', Value(' '), 'user__last_name')),
+        TrigramWordSimilarity(term, 'user__email'),
+        TrigramWordSimilarity(term, 'employee_id'),
+        TrigramWordSimilarity(term, 'position'),
+    )
+    return queryset.filter(matches).annotate(search_rank=rank).order_by('-search_rank', 'employee_id')
+
+
+def autocomplete_employees(queryset, prefix, limit=10):
+    """Lightweight prefix matches for pickers, as plain dicts from a single query."""
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    
+    matches = (
+        Q(user__first_name__istartswith=prefix) |
+        Q(user__last_name__istartswith=prefix) |
+        Q(user__email__istartswith=prefix) |
+        Q(employee_id__istartswith=prefix)
+    )
+    rows = queryset.filter(matches).order_by(
+        'user__first_name', 'user__last_name'
+    ).values(
+        'id', 'employee_id', 'user_id', 'user__first_name', 'user__last_name',
+        'department', 'position'
+    )[:limit]
+    
+    return [
+        {
+            'id': row['id'],
+            'employee_id': row['employee_id'],
+            'user_id': row['user_id'],
+            'full_name': f"{row['user__first_name']} {row['user__last_name']}",
+            'department': row['department'],
+            'position': row['position'],
+        }
+        for row in rows
+    ]
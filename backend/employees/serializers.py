@@ -3,7 +3,9 @@ Serializers for employee management.
 """
 from rest_framework import serializers
 from accounts.serializers import UserSerializer
-from .models import Employee, Document
+from dayflow.serializers import SparseFieldsetsMixin
+from .models import Employee, Document, normalize_tags
+from .thumbnails import variant_urls
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -15,8 +17,8 @@ class DocumentSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'uploaded_at']
 
 
-class EmployeeSerializer(serializers.ModelSerializer):
-    """Serializer for employee profiles."""
+class EmployeeSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """Serializer for employee profiles (supports ?fields= and ?expand=manager)."""
     
     user = UserSerializer(read_only=True)
     documents = DocumentSerializer(many=True, read_only=True)
@@ -24,6 +26,7 @@ class EmployeeSerializer(serializers.ModelSerializer):
     attendance_status = serializers.SerializerMethodField()
     login_id = serializers.CharField(source='user.login_id', read_only=True)
     manager_name = serializers.SerializerMethodField()
+    profile_image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Employee
@@ -39,21 +42,59 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'about_me', 'job_passion', 'interests', 'skills', 'certifications',
             # Emergency
             'emergency_contact_name', 'emergency_contact_phone',
-            'profile_image', 'documents', 'attendance_status',
+            'profile_image', 'profile_image_variants', 'documents', 'attendance_status',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'employee_id', 'login_id', 'attendance_status', 'created_at', 'updated_at']
+        read_only_fields = [
+            'id', 'employee_id', 'login_id', 'profile_image_variants', 'attendance_status',
+            'created_at', 'updated_at'
+        ]
+        expandable_fields = {
+            'manager': ('accounts.serializers.UserSerializer', {'read_only': True}),
+        }
     
     def get_full_name(self, obj):
         return obj.user.full_name
     
     def get_attendance_status(self, obj):
+        # Listings annotate the status in the main query (Employee.objects.with_attendance_status)
+        if hasattr(obj, 'today_status'):
+            return obj.today_status
         return obj.get_attendance_status()
     
     def get_manager_name(self, obj):
         if obj.manager:
             return obj.manager.full_name
         return None
+    
+    def get_profile_image_variants(self, obj):
+        return variant_urls(obj.profile_image_variants, self.context.get('request'))
+
+
+class EmployeeDirectorySerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
+    """Compact employee card for directory pages and nested ?expand=employee."""
+    
+    full_name = serializers.SerializerMethodField()
+    attendance_status = serializers.SerializerMethodField()
+    profile_image_variants = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Employee
+        fields = [
+            'id', 'employee_id', 'full_name', 'department', 'position',
+            'location', 'profile_image', 'profile_image_variants', 'attendance_status'
+        ]
+        read_only_fields = fields
+    
+    def get_full_name(self, obj):
+        return obj.user.full_name
+    
+    def get_attendance_status(self, obj):
+        # Only directory listings annotate the status; nested cards skip it
+        return getattr(obj, 'today_status', None)
+    
+    def get_profile_image_variants(self, obj):
+        return variant_urls(obj.profile_image_variants, self.context.get('request'))
 
 
 class EmployeeCreateSerializer(serializers.ModelSerializer):
@@ -120,6 +161,18 @@ class EmployeeUpdateSerializer(serializers.ModelSerializer):
             'about_me', 'job_passion', 'interests', 'skills', 'certifications',
             'emergency_contact_name', 'emergency_contact_phone', 'profile_image'
         ]
+    
+    def _clean_tags(self, value):
+        if not isinstance(value, list) or not all(isinstance(tag, str) for tag in value):
+            raise serializers.ValidationError("Must be a list of strings.")
+        # Skill search matches exact strings, so keep the lists tidy
+        return normalize_tags(value)
+    
+    def validate_skills(self, value):
+        return self._clean_tags(value)
+    
+    def validate_certifications(self, value):
+        return self._clean_tags(value)
 
 
 class EmployeePrivateInfoSerializer(serializers.ModelSerializer):
@@ -0,0 +1,62 @@
+"""
+Signal handlers for employee management.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from . import current, orgchart, skills, thumbnails
+from .models import Employee
+
+
+@receiver(pre_save, sender=Employee)
+def employee_saving(sender, instance, **kwargs):
+    if not instance._state.adding and instance.profile_image_changed():
+        # Read before the save overwrites them: this instance may predate the variants being attached
+        instance._replaced_variants = Employee.objects.filter(pk=instance.pk).values_list(
+            'profile_image_variants', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, created, **kwargs):
+    if created or instance.org_chart_changed():
+        transaction.on_commit(orgchart.invalidate)
+    if instance.tags_changed():
+        transaction.on_commit(skills.invalidate)
+    if instance.profile_image_changed():
+        replaced = getattr(instance, '_replaced_variants', None) or instance.profile_image_variants
+        instance._replaced_variants = None
+        if replaced:
+            Employee.objects.filter(pk=instance.pk).update(profile_image_variants={})
+            instance.profile_image_variants = {}
+            thumbnails.discard_variants(replaced)
+        if instance.profile_image:
+            thumbnails.schedule_variants(instance)
+    instance._loaded_org_values = tuple(instance.__dict__.get(f) for f in Employee.ORG_CHART_FIELDS)
+    instance._loaded_profile_image = instance.profile_image.name
+    instance._loaded_tags = instance.tag_values()
+    transaction.on_commit(lambda: current.invalidate(instance.user_id))
+
+
+@receiver(post_delete, sender=Employee)
+def employee_deleted(sender, instance, **kwargs):
+    thumbnails.discard_variants(instance.profile_image_variants)
+    transaction.on_commit(orgchart.invalidate)
+    transaction.on_commit(skills.invalidate)
+    transaction.on_commit(lambda: current.invalidate(instance.user_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    # Cached current-employee profiles carry their user (names, role)
+    transaction.on_commit(lambda: current.invalidate(instance.pk))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, **kwargs):
+    # Org chart nodes carry the names
+    if instance.name_changed():
+        transaction.on_commit(orgchart.invalidate)
+    instance._loaded_names = tuple(instance.__dict__.get(f) for f in instance.NAME_FIELDS)
@@ -0,0 +1,115 @@
+"""
+Skill and certification search with facet counts.
+
+``Employee.skills`` and ``certifications`` are jsonb arrays of strings with
+GIN indexes, so "has all of" (``@>``) and "has any of" (``?|``) filters are
+index lookups. Tags are stored and queried lower-cased (``models.normalize_tags``),
+so matching ignores case. Facet counts come from one grouped query over the
+unnested arrays and are cached until a profile's skills change (see
+employees.signals).
+"""
+import json
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from dayflow.metrics import cache_counters
+from .models import Employee, normalize_tags
+
+TAG_FIELDS = ('skills', 'certifications')
+FACETS_KEY = 'employees:skill-facets'
+_hits, _misses = cache_counters('skill_facets')
+
+
+def _uses_jsonb():
+    return connection.vendor == 'postgresql'
+
+
+def parse_tags(value):
+    """'Python, AWS' -> ['python', 'aws']"""
+    return normalize_tags((value or '').split(','))
+
+
+def filter_by_tags(queryset, field, tags, match='all'):
+    """Employees whose ``field`` list holds all (or any) of ``tags``."""
+    if field not in TAG_FIELDS:
+        raise ValueError(f'Cannot filter by {field!r}')
+    if not tags:
+        return queryset
+    
+    if _uses_jsonb():
+        if match == 'any':
+            return queryset.filter(**{f'{field}__has_any_keys': tags})
+        return queryset.filter(**{f'{field}__contains': tags})
+    
+    # Other backends cannot test array containment; match each tag's JSON string in the stored text
+    conditions = [Q(**{f'{field}__icontains': json.dumps(tag)}) for tag in tags]
+    return queryset.filter(reduce(operator.or_ if match == 'any' else operator.and_, conditions))
+
+
+def _tag_counts(field):
+    """{tag: {department: employees}} for one field."""
+    counts = {}
+    if _uses_jsonb():
+        table = Employee._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT tag, e.department, COUNT(DISTINCT e.id)
+                FROM {table} e
+                CROSS JOIN LATERAL jsonb_array_elements_text(
+                    CASE WHEN jsonb_typeof(e.{field}) = 'array' THEN e.{field} ELSE '[]'::jsonb END
+                ) AS tag
+                GROUP BY tag, e.department
+            """)
+            for tag, department, count in cursor.fetchall():
+                counts.setdefault(tag, {})[department] = count
+        return counts
+    
+    for department, values in Employee.objects.values_list('department', field).iterator():
+        for tag in set(values if isinstance(values, list) else []):
+            by_department = counts.setdefault(tag, {})
+            by_department[department] = by_department.get(department, 0) + 1
+    return counts
+
+
+def compute_facets():
+    """Per-tag totals and department breakdowns, most common first."""
+    facets = {}
+    for field in TAG_FIELDS:
+        facets[field] = sorted(
+            (
+                {'name': tag, 'count': sum(by_department.values()), 'by_department': by_department}
+                for tag, by_department in _tag_counts(field).items()
+            ),
+            key=lambda facet: (-facet['count'], facet['name'].lower())
+        )
+    return facets
+
+
+def get_facets(department=None):
+    """Cached facets, optionally narrowed to one department."""
+    facets = cache.get(FACETS_KEY)
+    if facets is None:
+        _misses.inc()
+        facets = compute_facets()
+        cache.set(FACETS_KEY, facets, settings.SKILL_FACETS_CACHE_TTL)
+    else:
+        _hits.inc()
+    if not department:
+        return facets
+    
+    narrowed = {}
+    for field, entries in facets.items():
+        narrowed[field] = [
+            {'name': entry['name'], 'count': entry['by_department'][department]}
+            for entry in entries if department in entry['by_department']
+        ]
+        narrowed[field].sort(key=lambda facet: (-facet['count'], facet['name'].lower()))
+    return narrowed
+
+
+def invalidate():
+    cache.delete(FACETS_KEY)
@@ -1,3 +1,216 @@
-from django.test import TestCase
+import csv
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from accounts.models import LoginIdSequence, User
+from dayflow.testing import api_client, assert_query_budget, make_employee
+from . import current
+from .importer import allocate_login_ids
+from .models import Employee
+from .thumbnails import VARIANT_DIR, delete_variants
+
+
+class EmployeeQueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr, _ = make_employee('hr@example.com', 'Sarah', 'Johnson', role='hr', department='hr')
+        cls.user, cls.employee = make_employee('john@example.com', 'John', 'Doe', manager=cls.hr, skills=['Python'])
+        for index in range(8):
+            make_employee(f'dev{index}@example.com', 'Dev', f'Number{index}', manager=cls.user, skills=['Python'])
+    
+    def test_list(self):
+        client = api_client(self.hr)
+        for params in ({}, {'department': 'engineering'}, {'skills': 'python'}):
+            with self.subTest(params=params):
+                response = client.get('/api/employees/', params)
+                self.assertEqual(response.status_code, 200)
+                assert_query_budget(response)
+    
+    def test_directory(self):
+        response = api_client(self.user).get('/api/employees/directory/')
+        self.assertEqual(response.status_code, 200)
+        assert_query_budget(response)
+    
+    def test_retrieve_and_me(self):
+        client = api_client(self.user)
+        for path in (f'/api/employees/{self.employee.pk}/', '/api/employees/me/'):
+            with self.subTest(path=path):
+                response = client.get(path)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['id'], self.employee.pk)
+                assert_query_budget(response)
+
+
+class CurrentEmployeeTests(TestCase):
+
+    def setUp(self):
+        current.clear()
+        self.addCleanup(current.clear)
+        self.user, self.employee = make_employee('john@example.com', 'John', 'Doe')
+    
+    def test_changes_from_other_processes_show_without_a_shared_cache(self):
+        current.get_employee(self.user.pk)
+        # A write that only another process would have seen invalidated
+        Employee.objects.filter(pk=self.employee.pk).update(position='Lead')
+        self.assertEqual(current.get_employee(self.user.pk).position, 'Lead')
+    
+    def test_shared_cache_serves_from_the_lru(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}):
+            current.get_employee(self.user.pk)
+            with self.assertNumQueries(0):
+                self.assertEqual(current.get_employee(self.user.pk).pk, self.employee.pk)
+            
+            current.invalidate(self.user.pk)
+            with self.assertNumQueries(1):
+                current.get_employee(self.user.pk)
+
+
+class SkillSearchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.hr, _ = make_employee('hr@example.com', 'Sarah', 'Johnson', role='hr', department='hr')
+        self.user, self.employee = make_employee('john@example.com', 'John', 'Doe', skills=[' Python', 'AWS', 'python'])
+        self.client = api_client(self.hr)
+    
+    def test_tags_are_normalized_on_save(self):
+        self.employee.refresh_from_db()
+        self.assertEqual(self.employee.skills, ['python', 'aws'])
+    
+    def test_search_ignores_case(self):
+        for params in ({'skills': 'PYTHON,aws'}, {'skills': 'Ruby, Python', 'match': 'any'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/employees/', params)
+                self.assertEqual([employee['id'] for employee in response.data['results']], [self.employee.pk])
+    
+    def test_facets_follow_skill_changes(self):
+        facets = self.client.get('/api/employees/skills/facets/').data
+        self.assertEqual([facet['name'] for facet in facets['skills']], ['aws', 'python'])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.skills = ['Python', 'Go']
+            self.employee.save()
+        facets = self.client.get('/api/employees/skills/facets/').data
+        self.assertEqual([facet['name'] for facet in facets['skills']], ['go', 'python'])
+
+
+class OrgChartCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.hr, self.hr_employee = make_employee('hr@example.com', 'Sarah', 'Johnson', role='hr', department='hr')
+        self.user, self.employee = make_employee('john@example.com', 'John', 'Doe', manager=self.hr)
+        self.client = api_client(self.hr)
+    
+    def chart(self):
+        response = self.client.get('/api/employees/org-chart/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+    
+    def test_reporting_line_changes_show(self):
+        [root] = self.chart()
+        self.assertEqual([node['full_name'] for node in root['reports']], ['John Doe'])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.manager = None
+            self.employee.save()
+        self.assertEqual(len(self.chart()), 2)
+    
+    def test_renames_show(self):
+        self.chart()
+        user = User.objects.get(pk=self.user.pk)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name = 'Jonathan'
+            user.save()
+        [root] = self.chart()
+        self.assertEqual(root['reports'][0]['full_name'], 'Jonathan Doe')
+    
+    def test_chain(self):
+        response = self.client.get(f'/api/employees/{self.employee.pk}/chain/')
+        self.assertEqual([node['full_name'] for node in response.data], ['John Doe', 'Sarah Johnson'])
+
+
+class AllocateLoginIdsTests(TestCase):
+
+    def test_blocks_follow_existing_serials(self):
+        User.objects.create_user(email='john@example.com', password=None, first_name='John', last_name='Doe')
+        prefix = User.login_id_prefix('John', 'Doe')
+        other = User.login_id_prefix('Priya', 'Patel')
+        
+        login_ids = allocate_login_ids([('Joe', 'Dorsey'), ('Priya', 'Patel'), ('John', 'Dodd')])
+        self.assertEqual(login_ids, [f'{prefix}0002', f'{other}0001', f'{prefix}0003'])
+        self.assertEqual(LoginIdSequence.objects.get(prefix=prefix).last_value, 3)
+        
+        # Sign-ups after the import carry on from the block
+        user = User.objects.create_user(email='jo@example.com', password=None, first_name='Jo', last_name='Donne')
+        self.assertEqual(user.login_id, f'{prefix}0004')
+
+
+class DeleteVariantsTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+    
+    def variants(self, digest):
+        return {'thumb': {'webp': default_storage.save(f'{VARIANT_DIR}/{digest}_64.webp', ContentFile(b'webp'))}}
+    
+    def test_shared_variants_are_kept(self):
+        shared = self.variants('a' * 20)
+        make_employee('john@example.com', 'John', 'Doe', profile_image_variants=shared)
+        replaced = {**self.variants('b' * 20), 'card': shared['thumb']}
+        
+        delete_variants(replaced)
+        self.assertFalse(default_storage.exists(replaced['thumb']['webp']))
+        self.assertTrue(default_storage.exists(shared['thumb']['webp']))
+
+
+class EmployeeImportTests(TestCase):
+
+    CSV = (
+        'email,first_name,last_name,department,position,hire_date\n'
+        'ann@example.com,Ann,Lee,engineering,Developer,2024-01-01\n'
+        'john@example.com,John,Again,sales,Account Executive,2024-01-01\n'
+    )
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr, _ = make_employee('hr@example.com', 'Sarah', 'Johnson', role='hr', department='hr')
+        make_employee('john@example.com', 'John', 'Doe')
+    
+    def upload(self, **data):
+        file = SimpleUploadedFile('employees.csv', self.CSV.encode())
+        return api_client(self.hr).post('/api/employees/import/', {'file': file, **data}, format='multipart')
+    
+    def test_report_is_returned_once(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['created'], response.data['errors']), (1, 1))
+        self.assertEqual(response['Cache-Control'], 'no-store')
+        
+        created, failed = csv.DictReader(response.data['report'].splitlines())
+        self.assertEqual((created['status'], failed['status']), ('created', 'error'))
+        self.assertTrue(self.client.login(email='ann@example.com', password=created['password']))
+        self.assertTrue(Employee.objects.filter(user__email='ann@example.com', department='engineering').exists())
+    
+    def test_dry_run_creates_nothing(self):
+        response = self.upload(dry_run='true')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['valid'], 1)
+        self.assertFalse(User.objects.filter(email='ann@example.com').exists())
+        self.assertEqual([row['status'] for row in csv.DictReader(response.data['report'].splitlines())], ['error'])
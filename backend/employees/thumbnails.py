@@ -0,0 +1,143 @@
+"""
+Profile image variants.
+
+After a profile image is uploaded, resized WebP and JPEG variants are
+rendered with Pillow in a small worker pool, off the request path. Each
+variant is named after a hash of its bytes, so its URL never changes
+meaning and can be served with ``Cache-Control: immutable``. When the image
+is replaced or removed, the old variants are deleted once no employee
+refers to them.
+"""
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIR = 'profiles/variants'
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails'
+            )
+    return _executor
+
+
+def _encode(image, image_format, options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def render_variants(source):
+    """Render every configured size and format; returns {size: {format: storage name}}."""
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGBA' if 'A' in original.getbands() else 'RGB')
+        
+        variants = {}
+        for label, size in settings.PROFILE_IMAGE_VARIANTS.items():
+            image = ImageOps.fit(original, (size, size), Image.Resampling.LANCZOS)
+            variants[label] = {}
+            for extension, (image_format, options) in FORMATS.items():
+                frame = image.convert('RGB') if image_format == 'JPEG' else image
+                data = _encode(frame, image_format, options)
+                digest = hashlib.sha256(data).hexdigest()[:20]
+                name = f"{VARIANT_DIR}/{digest}_{size}.{extension}"
+                # Same bytes, same name: nothing to write if it already exists
+                if not default_storage.exists(name):
+                    name = default_storage.save(name, ContentFile(data))
+                variants[label][extension] = name
+        return variants
+
+
+def generate_variants(employee_pk, source_name):
+    """Render variants for ``source_name`` and attach them to the employee."""
+    from .models import Employee
+    
+    try:
+        with default_storage.open(source_name, 'rb') as source:
+            variants = render_variants(source)
+    except Exception:
+        logger.exception("Could not render profile image variants for employee %s", employee_pk)
+        return
+    finally:
+        close_old_connections()
+    
+    try:
+        # Only attach if the image has not been replaced in the meantime
+        attached = Employee.objects.filter(pk=employee_pk, profile_image=source_name).update(
+            profile_image_variants=variants
+        )
+        if not attached:
+            delete_variants(variants)
+    finally:
+        close_old_connections()
+
+
+def delete_variants(variants):
+    """Delete the stored files of ``variants`` that no employee refers to any more."""
+    from .models import Employee
+    
+    names = {name for formats in variants.values() for name in formats.values()}
+    for name in sorted(names):
+        # Names are content hashes: an employee with the same image shares the files
+        if not Employee.objects.filter(profile_image_variants__icontains=name).exists():
+            default_storage.delete(name)
+
+
+def _delete_variants_in_worker(variants):
+    try:
+        delete_variants(variants)
+    except Exception:
+        logger.exception("Could not delete profile image variants")
+    finally:
+        close_old_connections()
+
+
+def discard_variants(variants):
+    """Queue deletion of replaced ``variants`` once the current transaction commits."""
+    if variants:
+        transaction.on_commit(lambda: _get_executor().submit(_delete_variants_in_worker, variants))
+
+
+def schedule_variants(employee):
+    """Queue variant generation once the current transaction commits."""
+    source_name = employee.profile_image.name
+    employee_pk = employee.pk
+    transaction.on_commit(
+        lambda: _get_executor().submit(generate_variants, employee_pk, source_name)
+    )
+
+
+def variant_urls(variants, request=None):
+    """Map stored variant names to URLs (absolute when a request is given, like ImageField)."""
+    def url(name):
+        location = default_storage.url(name)
+        return request.build_absolute_uri(location) if request is not None else location
+    
+    return {
+        label: {extension: url(name) for extension, name in formats.items()}
+        for label, formats in (variants or {}).items()
+    }
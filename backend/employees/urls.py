@@ -1,9 +1,10 @@
 """
 URL patterns for employees module.
 """
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EmployeeViewSet, DocumentUploadView
+from .views import EmployeeViewSet, EmployeeMeAsyncView, DocumentUploadView
 
 router = DefaultRouter()
 router.register('', EmployeeViewSet, basename='employee')
@@ -12,3 +13,7 @@ urlpatterns = [
     path('<int:employee_id>/documents/upload/', DocumentUploadView.as_view(), name='upload_document'),
     path('', include(router.urls)),
 ]
+
+if settings.ASYNC_READ_VIEWS:
+    # Ahead of the viewset's `me` action (see dayflow.async_views)
+    urlpatterns.insert(0, path('me/', EmployeeMeAsyncView.as_view(), name='employee-me'))
@@ -1,36 +1,64 @@
 """
 Views for employee management.
 """
+import os
+from django.conf import settings
 from rest_framework import viewsets, generics, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from accounts.permissions import IsAdminOrHR, IsOwnerOrAdminHR
+from accounts.policies import allows, visible
+from dayflow import metrics
+from dayflow.async_views import AsyncReadView, json_response
+from dayflow.routers import ReplicaReadsMixin
+from dayflow.throttling import RATE_LIMITED
+from filestore.responses import serve_file
 from .models import Employee, Document
+from .importer import EmployeeImport, ImportFileError
+from .search import search_employees, autocomplete_employees
+from . import orgchart, skills
 from .serializers import (
     EmployeeSerializer, 
     EmployeeCreateSerializer,
     EmployeeUpdateSerializer,
+    EmployeeDirectorySerializer,
     DocumentSerializer
 )
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+def select_requested_relations(request, queryset):
+    """Join, prefetch and annotate only what the fields ``request`` asks for need."""
+    if EmployeeSerializer.includes(request, 'manager_name') or EmployeeSerializer.expands(request, 'manager'):
+        queryset = queryset.select_related('manager')
+    if EmployeeSerializer.includes(request, 'documents'):
+        queryset = queryset.prefetch_related('documents')
+    if EmployeeSerializer.includes(request, 'attendance_status'):
+        queryset = queryset.with_attendance_status()
+    return queryset
+
+
+class EmployeeViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     """ViewSet for employee CRUD operations."""
     
-    queryset = Employee.objects.select_related('user').prefetch_related('documents')
+    queryset = Employee.objects.select_related('user')
     permission_classes = [IsAuthenticated]
+    replica_actions = ('list', 'directory')
+    query_budget = {'list': 3, 'directory': 2, 'retrieve': 2, 'me': 2}
+    throttle_scope = None  # set per action (see dayflow.throttling)
     
     def get_serializer_class(self):
         if self.action == 'create':
             return EmployeeCreateSerializer
         if self.action in ['update', 'partial_update']:
             return EmployeeUpdateSerializer
+        if self.action == 'directory':
+            return EmployeeDirectorySerializer
         return EmployeeSerializer
     
     def get_permissions(self):
-        if self.action in ['create', 'destroy']:
+        if self.action in ['create', 'destroy', 'org_chart', 'import_employees']:
             return [IsAuthenticated(), IsAdminOrHR()]
         if self.action in ['update', 'partial_update']:
             return [IsAuthenticated(), IsOwnerOrAdminHR()]
@@ -38,30 +66,38 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        # Admin and HR see all employees
-        if user.role in ['admin', 'hr']:
-            return self.queryset
-        # Employees only see their own profile
-        return self.queryset.filter(user=user)
+        queryset = self.queryset
+        if self.action in ['list', 'retrieve']:
+            queryset = self.with_requested_relations(queryset)
+        # Admin and HR see all employees, employees only their own profile
+        return visible(queryset, user)
     
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        
-        # Filter options
-        department = request.query_params.get('department')
-        employment_type = request.query_params.get('employment_type')
-        search = request.query_params.get('search')
+    def with_requested_relations(self, queryset):
+        return select_requested_relations(self.request, queryset)
+    
+    def filter_listing(self, queryset):
+        """
+        Apply the list filters: department, employment_type, search and
+        skills / certifications (comma separated, match=all|any).
+        """
+        params = self.request.query_params
+        department = params.get('department')
+        employment_type = params.get('employment_type')
+        search = params.get('search')
+        match = 'any' if params.get('match') == 'any' else 'all'
         
         if department:
             queryset = queryset.filter(department=department)
         if employment_type:
             queryset = queryset.filter(employment_type=employment_type)
+        for field in skills.TAG_FIELDS:
+            queryset = skills.filter_by_tags(queryset, field, skills.parse_tags(params.get(field)), match)
         if search:
-            queryset = queryset.filter(
-                models.Q(user__first_name__icontains=search) |
-                models.Q(user__last_name__icontains=search) |
-                models.Q(employee_id__icontains=search)
-            )
+            queryset = search_employees(queryset, search)
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_listing(self.get_queryset())
         
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -75,8 +111,8 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     def me(self, request):
         """Get current user's employee profile."""
         try:
-            employee = Employee.objects.get(user=request.user)
-            serializer = EmployeeSerializer(employee)
+            employee = self.with_requested_relations(self.queryset).get(user_id=request.user.id)
+            serializer = EmployeeSerializer(employee, context=self.get_serializer_context())
             return Response(serializer.data)
         except Employee.DoesNotExist:
             return Response(
@@ -84,6 +120,97 @@ class EmployeeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
     
+    @action(detail=False, methods=['get'])
+    def directory(self, request):
+        """Compact directory listing: names, roles and status without private data."""
+        queryset = self.filter_listing(self.get_queryset()).only(
+            'id', 'employee_id', 'department', 'position', 'location',
+            'profile_image', 'profile_image_variants', 'user', 'user__first_name', 'user__last_name'
+        ).with_attendance_status()
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """Fast prefix matches for pickers such as the manager field."""
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            limit = 10
+        queryset = self.get_queryset()
+        return Response(autocomplete_employees(queryset, request.query_params.get('q', ''), limit))
+    
+    @action(detail=False, methods=['get'], url_path='skills/facets')
+    def skill_facets(self, request):
+        """How many employees list each skill and certification, per department."""
+        return Response(skills.get_facets(request.query_params.get('department')))
+    
+    @action(detail=False, methods=['get'], url_path='org-chart')
+    def org_chart(self, request):
+        """The whole organization as nested reporting lines - Admin/HR only."""
+        return Response(orgchart.org_chart())
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser],
+            throttle_classes=RATE_LIMITED, throttle_scope='employee_import')
+    def import_employees(self, request):
+        """
+        Bulk onboarding from a CSV or NDJSON ``file`` - Admin/HR only.
+        Valid rows are created, invalid ones reported; ``dry_run=true`` only validates.
+        The response carries the report CSV with the temporary passwords, which is not kept.
+        """
+        uploaded = request.FILES.get('file')
+        if uploaded is None:
+            return Response(
+                {'error': 'No file uploaded'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            batch = EmployeeImport.from_file(uploaded, request.data.get('format') or None)
+        except ImportFileError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if len(batch.rows) > settings.EMPLOYEE_IMPORT_MAX_ROWS:
+            return Response(
+                {'error': f'Imports are limited to {settings.EMPLOYEE_IMPORT_MAX_ROWS} rows'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        batch.validate()
+        dry_run = str(request.data.get('dry_run', '')).lower() in ['1', 'true', 'yes']
+        if not dry_run:
+            batch.create()
+        
+        summary = batch.summary()
+        if dry_run:
+            response_status = status.HTTP_200_OK
+        elif summary['created']:
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        # The report holds the temporary passwords: returned once, never stored
+        report = batch.report_csv()
+        metrics.export_bytes.labels('import_report').inc(len(report.encode()))
+        response = Response({'dry_run': dry_run, **summary, 'report': report}, status=response_status)
+        response['Cache-Control'] = 'no-store'
+        return response
+    
+    @action(detail=True, methods=['get'])
+    def subtree(self, request, pk=None):
+        """Everyone reporting (directly or indirectly) to this employee."""
+        employee = self.get_object()
+        return Response(orgchart.subtree(employee.pk))
+    
+    @action(detail=True, methods=['get'])
+    def chain(self, request, pk=None):
+        """This employee's chain of command, nearest manager first."""
+        employee = self.get_object()
+        return Response(orgchart.management_chain(employee.pk))
+    
     @action(detail=True, methods=['get'])
     def documents(self, request, pk=None):
         """Get employee documents."""
@@ -91,6 +218,34 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         documents = employee.documents.all()
         serializer = DocumentSerializer(documents, many=True)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'], url_path=r'documents/(?P<document_id>\d+)/download',
+            throttle_classes=RATE_LIMITED, throttle_scope='export')
+    def download_document(self, request, pk=None, document_id=None):
+        """Download an employee document (supports Range and If-None-Match)."""
+        employee = self.get_object()
+        document = employee.documents.filter(id=document_id).first()
+        if document is None:
+            return Response(
+                {'error': 'Document not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        extension = os.path.splitext(document.file.name)[1]
+        return serve_file(request, document.file, filename=f"{document.title}{extension}", kind='document')
+
+
+class EmployeeMeAsyncView(AsyncReadView):
+    """Async version of EmployeeViewSet.me."""
+    
+    query_budget = 2
+    
+    async def get(self, request):
+        queryset = select_requested_relations(request, Employee.objects.select_related('user'))
+        try:
+            employee = await queryset.aget(user_id=request.user.id)
+        except Employee.DoesNotExist:
+            return json_response({'error': 'Employee profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        return json_response(EmployeeSerializer(employee, context={'request': request}).data)
 
 
 class DocumentUploadView(generics.CreateAPIView):
@@ -105,7 +260,7 @@ class DocumentUploadView(generics.CreateAPIView):
             employee = Employee.objects.get(id=employee_id)
             
             # Check permission
-            if request.user.role not in ['admin', 'hr'] and employee.user != request.user:
+            if not allows(request.user, employee, write=True):
                 return Response(
                     {'error': 'Permission denied'},
                     status=status.HTTP_403_FORBIDDEN
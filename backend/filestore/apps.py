@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class FilestoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "filestore"
+    
+    def ready(self):
+        from . import signals
+        
+        signals.connect_blob_models()
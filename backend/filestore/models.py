@@ -0,0 +1,20 @@
+"""
+Models for content-addressed file storage.
+"""
+from django.db import models
+
+
+class Blob(models.Model):
+    """A unique stored file, shared by every record that uploaded the same bytes."""
+    
+    name = models.CharField(max_length=255, unique=True, help_text="Storage name (derived from the SHA-256)")
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
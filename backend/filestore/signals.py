@@ -0,0 +1,76 @@
+"""
+Release content-addressed files when the records referencing them are
+deleted, or when a record's file is replaced or cleared.
+"""
+from django.apps import apps
+from django.db.models import FileField
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from .storage import ContentAddressedStorage
+
+_blob_fields = {}
+
+
+def blob_fields(model):
+    """FileFields on ``model`` backed by content-addressed storage (memoized per class)."""
+    if model not in _blob_fields:
+        _blob_fields[model] = [
+            field for field in model._meta.concrete_fields
+            if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+        ]
+    return _blob_fields[model]
+
+
+def _stored_name(instance, field):
+    # Read from __dict__: deferred fields are missing there, and reading them would cost a query
+    value = instance.__dict__.get(field.attname)
+    if isinstance(value, FieldFile):
+        if not value._committed:
+            return None
+        value = value.name
+    return value or None
+
+
+@receiver(post_delete)
+def release_blobs(sender, instance, **kwargs):
+    for field in blob_fields(sender):
+        field_file = getattr(instance, field.attname)
+        if field_file:
+            field_file.delete(save=False)
+
+
+def remember_blobs(sender, instance, **kwargs):
+    """Note the stored file names, so a save can tell which ones it replaces."""
+    instance._stored_blobs = {field.attname: _stored_name(instance, field) for field in blob_fields(sender)}
+
+
+def find_replaced_blobs(sender, instance, **kwargs):
+    stored = getattr(instance, '_stored_blobs', {})
+    replaced = []
+    for field in blob_fields(sender):
+        old = stored.get(field.attname)
+        if not old or field.attname not in instance.__dict__:
+            continue
+        current = instance.__dict__[field.attname]
+        # A new upload holds a reference of its own, even when it has the same content
+        uploaded = isinstance(current, FieldFile) and not current._committed
+        if uploaded or _stored_name(instance, field) != old:
+            replaced.append((field, old))
+    instance._replaced_blobs = replaced
+
+
+def release_replaced_blobs(sender, instance, **kwargs):
+    for field, name in getattr(instance, '_replaced_blobs', ()):
+        field.storage.delete(name)
+    instance._replaced_blobs = []
+    remember_blobs(sender, instance)
+
+
+def connect_blob_models():
+    """Track replaced files on every model with a content-addressed FileField."""
+    for model in apps.get_models():
+        if blob_fields(model):
+            post_init.connect(remember_blobs, sender=model, dispatch_uid=f'filestore-init-{model._meta.label}')
+            pre_save.connect(find_replaced_blobs, sender=model, dispatch_uid=f'filestore-pre-{model._meta.label}')
+            post_save.connect(release_replaced_blobs, sender=model, dispatch_uid=f'filestore-post-{model._meta.label}')
@@ -0,0 +1,136 @@
+"""
+Content-addressed storage backend.
+
+Files are stored once under a name derived from their SHA-256 and shared
+between every record that uploads the same bytes. A ``Blob`` row keeps the
+reference count; the file is removed when the last reference is deleted
+(once that transaction commits).
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.functional import LazyObject
+
+BLOB_PREFIX = 'blobs'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Filesystem storage that deduplicates files by content hash."""
+    
+    def blob_name(self, digest, original_name):
+        """Storage name for a digest: blobs/ab/cd/<sha256><ext>."""
+        extension = os.path.splitext(original_name)[1].lower()
+        return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+    
+    @staticmethod
+    def digest(name):
+        """The SHA-256 encoded in a storage name, or None for files stored elsewhere."""
+        if not name or not name.startswith(f"{BLOB_PREFIX}/"):
+            return None
+        return os.path.splitext(os.path.basename(name))[0]
+    
+    def get_available_name(self, name, max_length=None):
+        # Names are chosen by content in _save(); identical content may share a name
+        return name
+    
+    def _stage(self, content):
+        """Copy the content to a temporary file in chunks, hashing it on the way."""
+        staging_dir = self.path(os.path.join(BLOB_PREFIX, 'tmp'))
+        os.makedirs(staging_dir, exist_ok=True)
+        
+        sha = hashlib.sha256()
+        size = 0
+        fd, staged_path = tempfile.mkstemp(dir=staging_dir)
+        try:
+            with os.fdopen(fd, 'wb') as staged:
+                for chunk in content.chunks(settings.FILESTORE_CHUNK_SIZE):
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    sha.update(chunk)
+                    size += len(chunk)
+                    staged.write(chunk)
+        except BaseException:
+            os.remove(staged_path)
+            raise
+        return staged_path, sha.hexdigest(), size
+    
+    def _save(self, name, content):
+        from .models import Blob
+        
+        # The upload handler has already hashed files that arrived over HTTP
+        digest = getattr(content, 'sha256', None)
+        if digest and hasattr(content, 'temporary_file_path'):
+            staged_path, size = content.temporary_file_path(), content.size
+        else:
+            staged_path, digest, size = self._stage(content)
+        
+        blob_name = self.blob_name(digest, name)
+        full_path = self.path(blob_name)
+        
+        with transaction.atomic():
+            blob, created = Blob.objects.select_for_update().get_or_create(
+                name=blob_name,
+                defaults={'sha256': digest, 'size': size, 'ref_count': 1}
+            )
+            if not created:
+                Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+            
+            if os.path.exists(full_path):
+                # Already stored once - drop the duplicate bytes
+                if os.path.exists(staged_path):
+                    os.remove(staged_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                file_move_safe(staged_path, full_path, allow_overwrite=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(full_path, self.file_permissions_mode)
+        
+        return blob_name
+    
+    def delete(self, name):
+        """Drop one reference; the file goes away with the last one."""
+        from .models import Blob
+        
+        if self.digest(name) is None:
+            return super().delete(name)
+        
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(name=name).first()
+            if blob is None or blob.ref_count == 0:
+                return
+            Blob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+            if blob.ref_count > 1:
+                return
+        # Only once the count is committed: a rollback would bring the reference back, pointing at nothing
+        transaction.on_commit(lambda: self._remove_unreferenced(name))
+    
+    def _remove_unreferenced(self, name):
+        from .models import Blob
+        
+        # The row stays locked until the file is gone, so an upload of the same bytes
+        # either takes its reference first or waits and stores the file anew
+        with transaction.atomic():
+            blob = Blob.objects.select_for_update().filter(name=name, ref_count=0).first()
+            if blob is None:
+                return
+            blob.delete()
+            super().delete(name)
+
+
+class DefaultBlobStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = ContentAddressedStorage()
+
+
+blob_storage = DefaultBlobStorage()
+
+
+def get_blob_storage():
+    """Callable used by FileField(storage=...) so migrations stay storage-agnostic."""
+    return blob_storage
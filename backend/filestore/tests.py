@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from dayflow.testing import make_employee
+from employees.models import Document
+from .models import Blob
+
+
+class BlobRefcountTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        _, self.employee = make_employee('john@example.com', 'John', 'Doe')
+    
+    def upload(self, content, name='file.pdf'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Document.objects.create(
+                employee=self.employee, document_type='other', title=name, file=ContentFile(content, name=name)
+            )
+    
+    def refs(self):
+        return {blob.name: blob.ref_count for blob in Blob.objects.all()}
+    
+    def stored(self, name):
+        return Document._meta.get_field('file').storage.exists(name)
+    
+    def test_same_content_is_stored_once(self):
+        first = self.upload(b'contract', 'a.pdf')
+        second = self.upload(b'contract', 'b.pdf')
+        
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertEqual(self.refs(), {first.file.name: 2})
+        self.assertEqual(os.path.splitext(second.file.name)[1], '.pdf')
+    
+    def test_last_delete_removes_the_file(self):
+        first = self.upload(b'contract')
+        second = self.upload(b'contract')
+        name = first.file.name
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.refs(), {name: 1})
+        self.assertTrue(self.stored(name))
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self.refs(), {})
+        self.assertFalse(self.stored(name))
+    
+    def test_upload_before_the_unlink_keeps_the_file(self):
+        document = self.upload(b'contract')
+        name = document.file.name
+        
+        with self.captureOnCommitCallbacks() as callbacks:
+            document.delete()
+        again = self.upload(b'contract')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.refs(), {name: 1})
+        self.assertTrue(self.stored(again.file.name))
+    
+    def test_rolled_back_delete_keeps_the_file(self):
+        document = self.upload(b'contract')
+        
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Document.objects.get(pk=document.pk).delete()
+            raise RuntimeError
+        self.assertEqual(self.refs(), {document.file.name: 1})
+        self.assertTrue(self.stored(document.file.name))
+    
+    def test_replacing_releases_the_previous_file(self):
+        document = Document.objects.get(pk=self.upload(b'old').pk)
+        shared = self.upload(b'new')
+        old_name = document.file.name
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            document.file = ContentFile(b'new', name='new.pdf')
+            document.save()
+        self.assertEqual(self.refs(), {shared.file.name: 2})
+        self.assertFalse(self.stored(old_name))
+        
+        # Uploading the same bytes again takes a reference and drops the old one
+        with self.captureOnCommitCallbacks(execute=True):
+            document.file = ContentFile(b'new', name='again.pdf')
+            document.save()
+        self.assertEqual(self.refs(), {shared.file.name: 2})
+    
+    def test_saving_other_fields_keeps_the_reference(self):
+        document = Document.objects.get(pk=self.upload(b'contract').pk)
+        
+        document.title = 'Renamed'
+        document.save()
+        self.assertEqual(self.refs(), {document.file.name: 1})
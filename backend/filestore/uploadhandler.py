@@ -0,0 +1,49 @@
+"""
+Upload handler that streams files to disk while hashing them.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Uploaded file is too large.'
+    default_code = 'upload_too_large'
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream each uploaded file to a temporary file in chunks, computing its
+    SHA-256 as it arrives so the storage backend does not read it again.
+    Oversized requests are refused from the Content-Length header, before
+    any body is read.
+    """
+    
+    chunk_size = settings.FILESTORE_CHUNK_SIZE
+    
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > settings.FILESTORE_MAX_UPLOAD_SIZE:
+            raise UploadTooLarge()
+        # Returning None lets the default multipart parsing continue
+    
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.received = 0
+    
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        # Chunked requests have no Content-Length, so enforce the limit here too
+        if self.received > settings.FILESTORE_MAX_UPLOAD_SIZE:
+            raise UploadTooLarge()
+        self.sha256.update(raw_data)
+        super().receive_data_chunk(raw_data, start)
+    
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        return file
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("employees", "0002_employee_about_me_employee_bank_account_and_more"),
+        ("leaves", "0002_leaverequest_attachment_leavetype_category_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="leaverequest",
+            index=models.Index(
+                fields=["status", "created_at"], name="leave_status_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:54
+
+import filestore.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("leaves", "0003_leaverequest_leave_status_created_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="leaverequest",
+            name="attachment",
+            field=models.FileField(
+                blank=True,
+                help_text="Attachment for sick leave certificate, etc.",
+                null=True,
+                storage=filestore.storage.get_blob_storage,
+                upload_to="leave_attachments/",
+            ),
+        ),
+    ]
@@ -1,9 +1,11 @@
 """
 Models for Time Off / Leave management.
 """
+from datetime import timedelta
 from django.db import models
 from django.conf import settings
 from employees.models import Employee
+from filestore.storage import get_blob_storage
 
 
 class LeaveType(models.Model):
@@ -95,7 +97,7 @@ class LeaveRequest(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     reason = models.TextField(blank=True)
-    attachment = models.FileField(upload_to='leave_attachments/', blank=True, null=True,
+    attachment = models.FileField(upload_to='leave_attachments/', storage=get_blob_storage, blank=True, null=True,
                                   help_text="Attachment for sick leave certificate, etc.")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     reviewed_by = models.ForeignKey(
@@ -112,10 +114,20 @@ class LeaveRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='leave_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.employee_id} - {self.leave_type.name} ({self.start_date} to {self.end_date})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so state changes can be detected on save
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
     @property
     def total_days(self):
         """Calculate total leave days requested."""
@@ -123,6 +135,52 @@ class LeaveRequest(models.Model):
             return (self.end_date - self.start_date).days + 1
         return 0
     
+    def working_dates(self):
+        """Dates covered by the request that fall on a working day (Mon-Fri)."""
+        current = self.start_date
+        while current <= self.end_date:
+            if current.weekday() < 5:
+                yield current
+            current += timedelta(days=1)
+    
+    def materialize_attendance(self):
+        """
+        Write ``on_leave`` attendance rows for every working day covered.
+        Days that already have a check-in are left untouched.
+        """
+        from attendance.models import Attendance
+        
+        days = list(self.working_dates())
+        # Turn existing rows without a check-in (e.g. marked absent) into leave, keeping their status
+        Attendance.objects.filter(
+            employee_id=self.employee_id,
+            date__in=days,
+            check_in__isnull=True,
+            leave_request__isnull=True
+        ).update(status_before_leave=models.F('status'), status='on_leave', leave_request=self)
+        
+        Attendance.objects.bulk_create(
+            [
+                Attendance(employee_id=self.employee_id, date=day, status='on_leave', leave_request=self)
+                for day in days
+            ],
+            ignore_conflicts=True
+        )
+    
+    def clear_attendance(self):
+        """Undo ``materialize_attendance``: delete the rows it created and restore the ones it converted."""
+        records = self.attendance_records.all()
+        records.filter(check_in__isnull=True, status_before_leave='').delete()
+        records.filter(check_in__isnull=True).update(
+            status=models.F('status_before_leave'), status_before_leave='', leave_request=None
+        )
+        # Days the employee checked in anyway get the status their check-in earns
+        for record in records.filter(check_in__isnull=False):
+            record.status = record.status_for_check_in()
+            record.status_before_leave = ''
+            record.leave_request = None
+            record.save(update_fields=['status', 'status_before_leave', 'leave_request', 'updated_at'])
+    
     def clean(self):
         from django.core.exceptions import ValidationError
         if self.end_date < self.start_date:
@@ -135,6 +193,7 @@ class LeaveRequest(models.Model):
         self.reviewed_by = user
         self.reviewed_at = timezone.now()
         self.save()
+        self.materialize_attendance()
         
         # Update leave allocation
         year = self.start_date.year
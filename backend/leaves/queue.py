@@ -0,0 +1,61 @@
+"""
+Pending-approvals queue: cached aggregate counts for the HR dashboard badges.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from dayflow.metrics import cache_counters
+from .models import LeaveRequest
+
+PENDING_COUNTS_KEY = 'leaves:pending:counts'
+_hits, _misses = cache_counters('pending_counts')
+
+
+def pending_queryset():
+    """Pending requests, oldest first."""
+    return LeaveRequest.objects.filter(status='pending').order_by('created_at', 'id')
+
+
+def compute_pending_counts():
+    """Aggregate pending requests by leave type and department in a single query."""
+    rows = LeaveRequest.objects.filter(status='pending').values(
+        'leave_type_id', 'leave_type__name', 'employee__department'
+    ).annotate(count=Count('id')).order_by()
+    
+    by_type = {}
+    by_department = {}
+    total = 0
+    for row in rows:
+        total += row['count']
+        leave_type = by_type.setdefault(row['leave_type_id'], {
+            'leave_type': row['leave_type_id'],
+            'leave_type_name': row['leave_type__name'],
+            'count': 0,
+        })
+        leave_type['count'] += row['count']
+        department = row['employee__department']
+        by_department[department] = by_department.get(department, 0) + row['count']
+    
+    return {
+        'total': total,
+        'by_type': sorted(by_type.values(), key=lambda item: item['leave_type_name']),
+        'by_department': by_department,
+    }
+
+
+def refresh_pending_counts():
+    """Recompute the counts and store them; called whenever a request changes state."""
+    counts = compute_pending_counts()
+    cache.set(PENDING_COUNTS_KEY, counts, settings.LEAVE_QUEUE_COUNTS_TTL)
+    return counts
+
+
+def get_pending_counts():
+    """Serve the counts from cache, rebuilding them only after an eviction."""
+    counts = cache.get(PENDING_COUNTS_KEY)
+    if counts is None:
+        _misses.inc()
+        counts = refresh_pending_counts()
+    else:
+        _hits.inc()
+    return counts
@@ -2,6 +2,8 @@
 Serializers for leave management.
 """
 from rest_framework import serializers
+from dayflow.refcache import CachedPrimaryKeyRelatedField, leave_types
+from dayflow.serializers import SparseFieldsetsMixin
 from django.utils import timezone
 from .models import LeaveType, LeaveBalance, LeaveRequest
 
@@ -25,7 +27,7 @@ class LeaveBalanceSerializer(serializers.ModelSerializer):
         fields = ['id', 'leave_type', 'leave_type_name', 'year', 'total_days', 'used_days', 'remaining_days']
 
 
-class LeaveRequestSerializer(serializers.ModelSerializer):
+class LeaveRequestSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for leave requests."""
     
     employee_name = serializers.SerializerMethodField()
@@ -39,10 +41,18 @@ class LeaveRequestSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'employee', 'employee_id', 'employee_name', 
             'leave_type', 'leave_type_name', 'start_date', 'end_date',
-            'total_days', 'reason', 'status', 'reviewed_by', 'reviewed_by_name',
+            'total_days', 'reason', 'attachment', 'status', 'reviewed_by', 'reviewed_by_name',
             'review_notes', 'reviewed_at', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'employee', 'status', 'reviewed_by', 'review_notes', 'reviewed_at', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'employee', 'attachment', 'status', 'reviewed_by', 'review_notes', 'reviewed_at', 'created_at', 'updated_at']
+        expandable_fields = {
+            'employee': ('employees.serializers.EmployeeDirectorySerializer', {'read_only': True}),
+        }
+        related_fields = {
+            'employee__user': ['employee', 'employee_id', 'employee_name'],
+            'leave_type': ['leave_type_name'],
+            'reviewed_by': ['reviewed_by_name'],
+        }
     
     def get_employee_name(self, obj):
         return obj.employee.user.full_name
@@ -74,9 +84,12 @@ class LeaveApprovalSerializer(serializers.Serializer):
 class LeaveRequestCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating leave requests."""
     
+    # Validated against the cached leave types, without a query
+    leave_type = CachedPrimaryKeyRelatedField(reference=leave_types)
+    
     class Meta:
         model = LeaveRequest
-        fields = ['leave_type', 'start_date', 'end_date', 'reason']
+        fields = ['leave_type', 'start_date', 'end_date', 'reason', 'attachment']
     
     def validate(self, attrs):
         start_date = attrs.get('start_date')
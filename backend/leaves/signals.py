@@ -0,0 +1,25 @@
+"""
+Signal handlers for leave management.
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import LeaveRequest
+from .queue import refresh_pending_counts
+
+
+def _touches_queue(instance):
+    return 'pending' in (instance.status, getattr(instance, '_loaded_status', None))
+
+
+@receiver(post_save, sender=LeaveRequest)
+def leave_request_saved(sender, instance, **kwargs):
+    # Recompute after commit so the cached counts never see uncommitted state
+    if _touches_queue(instance):
+        transaction.on_commit(refresh_pending_counts)
+
+
+@receiver(post_delete, sender=LeaveRequest)
+def leave_request_deleted(sender, instance, **kwargs):
+    if _touches_queue(instance):
+        transaction.on_commit(refresh_pending_counts)
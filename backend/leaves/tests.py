@@ -1,3 +1,156 @@
+from datetime import date, datetime, timedelta
+
+from django.core.cache import caches
 from django.test import TestCase
+from django.utils import timezone
+
+from attendance.models import Attendance
+from dayflow.testing import api_client, assert_query_budget, make_employee
+from .models import LeaveBalance, LeaveRequest, LeaveType
+
+# Monday to Sunday
+WEEK = [date(2026, 3, 2 + offset) for offset in range(7)]
+
+
+class LeaveQueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr, _ = make_employee('hr@example.com', 'Sarah', 'Johnson', role='hr', department='hr')
+        cls.user, cls.employee = make_employee('john@example.com', 'John', 'Doe', manager=cls.hr)
+        cls.leave_types = [LeaveType.objects.create(name=name, days_allowed=10) for name in ('PTO', 'Sick')]
+        for index in range(5):
+            _, employee = make_employee(f'dev{index}@example.com', 'Dev', f'Number{index}', manager=cls.user)
+            for leave_type in cls.leave_types:
+                LeaveRequest.objects.create(
+                    employee=employee, leave_type=leave_type, start_date=WEEK[index], end_date=WEEK[index]
+                )
+                LeaveBalance.objects.create(employee=employee, leave_type=leave_type, year=2026, total_days=10)
+        for leave_type in cls.leave_types:
+            LeaveRequest.objects.create(
+                employee=cls.employee, leave_type=leave_type, start_date=WEEK[0], end_date=WEEK[1]
+            )
+            LeaveBalance.objects.create(employee=cls.employee, leave_type=leave_type, year=2026, total_days=10)
+    
+    def setUp(self):
+        for alias in ('default', 'reference'):
+            caches[alias].clear()
+    
+    def test_request_list(self):
+        for user in (self.hr, self.user):
+            response = api_client(user).get('/api/leaves/requests/')
+            self.assertEqual(response.status_code, 200)
+            assert_query_budget(response)
+    
+    def test_balance(self):
+        response = api_client(self.user).get('/api/leaves/balance/')
+        self.assertEqual(response.status_code, 200)
+        assert_query_budget(response)
+    
+    def test_pending_queue(self):
+        client = api_client(self.hr)
+        cold = client.get('/api/leaves/pending/queue/')
+        self.assertEqual(cold.status_code, 200)
+        self.assertEqual(cold.data['count'], 12)
+        assert_query_budget(cold)
+        
+        warm = client.get('/api/leaves/pending/queue/', {'department': 'engineering'})
+        assert_query_budget(warm, 2)
+    
+    def test_pending_queue_filters(self):
+        client = api_client(self.hr)
+        response = client.get('/api/leaves/pending/queue/', {'leave_type': self.leave_types[0].pk})
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual(client.get('/api/leaves/pending/queue/', {'department': 'sales'}).data['count'], 0)
+    
+    def test_pending_queue_rejects_malformed_filters(self):
+        client = api_client(self.hr)
+        for params in ({'leave_type': 'x'}, {'department': 'x'}):
+            with self.subTest(params=params):
+                response = client.get('/api/leaves/pending/queue/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.data)
+    
+    def test_counts_follow_reviews(self):
+        client = api_client(self.hr)
+        self.assertEqual(client.get('/api/leaves/pending/counts/').data['total'], 12)
+        
+        leave_request = LeaveRequest.objects.filter(employee=self.employee).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(f'/api/leaves/requests/{leave_request.pk}/reject/')
+        self.assertEqual(response.status_code, 200)
+        counts = client.get('/api/leaves/pending/counts/').data
+        self.assertEqual(counts['total'], 11)
+        self.assertEqual(counts['by_department'], {'engineering': 11})
+
+
+class LeaveAttendanceRoundTripTests(TestCase):
 
-# Create your tests here.
+    def setUp(self):
+        for alias in ('default', 'reference'):
+            caches[alias].clear()
+        self.hr, _ = make_employee('hr@example.com', 'Sarah', 'Johnson', role='hr', department='hr')
+        self.user, self.employee = make_employee('john@example.com', 'John', 'Doe', manager=self.hr)
+        self.leave_type = LeaveType.objects.create(name='PTO', days_allowed=10)
+        # Monday to Sunday of next week: leave that has not started yet
+        today = timezone.localdate()
+        self.week = [today + timedelta(days=7 - today.weekday() + offset) for offset in range(7)]
+        monday, tuesday, wednesday, _, _, saturday, _ = self.week
+        self.record(monday, status='absent')
+        self.record(tuesday, status='half_day')
+        self.record(wednesday, check_in=timezone.make_aware(datetime(wednesday.year, wednesday.month, wednesday.day, 10)))
+        self.record(saturday, status='absent')
+        self.leave_request = LeaveRequest.objects.create(
+            employee=self.employee, leave_type=self.leave_type, start_date=monday, end_date=self.week[-1]
+        )
+    
+    def record(self, day, **fields):
+        Attendance.objects.create(employee=self.employee, date=day, **fields)
+    
+    def statuses(self):
+        return dict(Attendance.objects.filter(employee=self.employee).values_list('date', 'status'))
+    
+    def approve(self):
+        response = api_client(self.hr).post(f'/api/leaves/requests/{self.leave_request.pk}/approve/')
+        self.assertEqual(response.status_code, 200)
+    
+    def cancel(self):
+        return api_client(self.user).post(f'/api/leaves/requests/{self.leave_request.pk}/cancel/')
+    
+    def used_days(self):
+        return LeaveBalance.objects.get(employee=self.employee, leave_type=self.leave_type).used_days
+    
+    def test_approve_covers_working_days_without_check_in(self):
+        self.approve()
+        
+        monday, tuesday, wednesday, thursday, friday, saturday, _ = self.week
+        self.assertEqual(self.statuses(), {
+            monday: 'on_leave', tuesday: 'on_leave', wednesday: 'late',
+            thursday: 'on_leave', friday: 'on_leave', saturday: 'absent',
+        })
+        self.assertEqual(self.used_days(), 7)
+    
+    def test_cancel_restores_attendance(self):
+        before = self.statuses()
+        self.approve()
+        self.assertEqual(self.cancel().status_code, 200)
+        
+        self.assertEqual(self.statuses(), before)
+        self.assertFalse(Attendance.objects.filter(leave_request__isnull=False).exists())
+        self.assertEqual(self.used_days(), 0)
+    
+    def test_started_leave_cannot_be_cancelled(self):
+        self.approve()
+        LeaveRequest.objects.filter(pk=self.leave_request.pk).update(start_date=timezone.localdate())
+        on_leave = self.statuses()
+        
+        self.assertEqual(self.cancel().status_code, 400)
+        self.assertEqual(self.statuses(), on_leave)
+        self.assertEqual(self.used_days(), 7)
+    
+    def test_cancelled_leave_cannot_be_approved(self):
+        self.assertEqual(self.cancel().status_code, 200)
+        
+        response = api_client(self.hr).post(f'/api/leaves/requests/{self.leave_request.pk}/approve/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Attendance.objects.filter(status='on_leave').exists())
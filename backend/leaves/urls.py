@@ -1,21 +1,30 @@
 """
 URL patterns for leaves module.
 """
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     LeaveTypeViewSet,
     LeaveBalanceView,
+    LeaveBalanceAsyncView,
     LeaveRequestViewSet,
     PendingLeaveRequestsView,
+    PendingLeaveQueueView,
+    PendingLeaveCountsView,
 )
 
 router = DefaultRouter()
 router.register('types', LeaveTypeViewSet, basename='leave-type')
 router.register('requests', LeaveRequestViewSet, basename='leave-request')
 
+# Async version under ASGI (see dayflow.async_views)
+balance_view = LeaveBalanceAsyncView if settings.ASYNC_READ_VIEWS else LeaveBalanceView
+
 urlpatterns = [
-    path('balance/', LeaveBalanceView.as_view(), name='leave_balance'),
+    path('balance/', balance_view.as_view(), name='leave_balance'),
     path('pending/', PendingLeaveRequestsView.as_view(), name='pending_leaves'),
+    path('pending/queue/', PendingLeaveQueueView.as_view(), name='pending_leave_queue'),
+    path('pending/counts/', PendingLeaveCountsView.as_view(), name='pending_leave_counts'),
     path('', include(router.urls)),
 ]
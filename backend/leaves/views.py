@@ -1,15 +1,27 @@
 """
 Views for leave management.
 """
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 from rest_framework import viewsets, generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
-from accounts.permissions import IsAdminOrHR
+from rest_framework.exceptions import ParseError
+from accounts.permissions import HasRowAccess, IsAdminOrHR
+from accounts.policies import visible
+from dayflow.routers import ReplicaReadsMixin
+from dayflow.async_views import AsyncReadView, json_response
+from dayflow.refcache import ReferenceViewSetMixin, leave_types
+from dayflow.throttling import RATE_LIMITED
+from filestore.responses import serve_file
+from employees.current import CurrentEmployeeMixin
 from employees.models import Employee
 from .models import LeaveType, LeaveBalance, LeaveRequest
+from .queue import pending_queryset, get_pending_counts
 from .serializers import (
     LeaveTypeSerializer,
     LeaveBalanceSerializer,
@@ -19,12 +31,16 @@ from .serializers import (
 )
 
 
-class LeaveTypeViewSet(viewsets.ModelViewSet):
+class LeaveTypeViewSet(ReferenceViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for leave types - Admin/HR only for write operations."""
     
     queryset = LeaveType.objects.filter(is_active=True)
     serializer_class = LeaveTypeSerializer
     permission_classes = [IsAuthenticated]
+    reference = leave_types
+    
+    def reference_rows(self):
+        return [leave_type for leave_type in leave_types.all() if leave_type.is_active]
     
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -32,29 +48,55 @@ class LeaveTypeViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated()]
 
 
-class LeaveBalanceView(generics.ListAPIView):
+class LeaveBalanceView(ReplicaReadsMixin, generics.ListAPIView):
     """Get leave balances for current employee."""
     
     serializer_class = LeaveBalanceSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
     
     def get_queryset(self):
         year = self.request.query_params.get('year', timezone.now().year)
         
-        try:
-            employee = Employee.objects.get(user=self.request.user)
-            return LeaveBalance.objects.filter(employee=employee, year=year)
-        except Employee.DoesNotExist:
+        employee_pk = self.request.user.employee_pk
+        if employee_pk is None:
             return LeaveBalance.objects.none()
+        return LeaveBalance.objects.filter(employee_id=employee_pk, year=year).select_related('leave_type')
+
+
+class LeaveBalanceAsyncView(AsyncReadView):
+    """Async version of LeaveBalanceView (same page format)."""
+    
+    use_replica = True
+    query_budget = 1
+    
+    async def get(self, request):
+        year = request.GET.get('year', timezone.now().year)
+        
+        balances = []
+        employee_pk = request.user.employee_pk
+        if employee_pk is not None:
+            queryset = LeaveBalance.objects.filter(employee_id=employee_pk, year=year).select_related('leave_type')
+            balances = [balance async for balance in queryset]
+        
+        # One balance per leave type and year, so this is always a single page
+        return json_response({
+            'count': len(balances),
+            'next': None,
+            'previous': None,
+            'results': LeaveBalanceSerializer(balances, many=True).data
+        })
 
 
-class LeaveRequestViewSet(viewsets.ModelViewSet):
+class LeaveRequestViewSet(ReplicaReadsMixin, CurrentEmployeeMixin, viewsets.ModelViewSet):
     """ViewSet for leave requests."""
     
-    queryset = LeaveRequest.objects.select_related('employee__user', 'leave_type', 'reviewed_by')
-    permission_classes = [IsAuthenticated]
+    queryset = LeaveRequest.objects.all()
+    permission_classes = [IsAuthenticated, HasRowAccess]
     pagination_class = None
-
+    query_budget = {'list': 1, 'retrieve': 1}
+    throttle_scope = None  # set per action (see dayflow.throttling)
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return LeaveRequestCreateSerializer
@@ -62,17 +104,10 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        queryset = self.queryset
-        with open('debug_leaves.log', 'a') as f:
-            f.write(f"DEBUG LEAVES: User {user.email}, Role {user.role}, Total Count {queryset.count()}\n")
+        queryset = LeaveRequestSerializer.select_related_for(self.request, self.queryset)
         
-        # Admin/HR see all requests
-        if user.role not in ['admin', 'hr']:
-            try:
-                employee = Employee.objects.get(user=user)
-                queryset = queryset.filter(employee=employee)
-            except Employee.DoesNotExist:
-                return LeaveRequest.objects.none()
+        # Admin/HR see all requests, managers also their direct reports', employees their own
+        queryset = visible(queryset, user)
         
         # Apply filters
         status_filter = self.request.query_params.get('status')
@@ -80,22 +115,13 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
         
         if status_filter:
             queryset = queryset.filter(status=status_filter)
-        if employee_id and user.role in ['admin', 'hr']:
+        if employee_id:
             queryset = queryset.filter(employee__employee_id=employee_id)
         
-        with open('debug_leaves.log', 'a') as f:
-            f.write(f"DEBUG LEAVES END: User {user.email}, Count {queryset.count()}\n")
-
         return queryset
     
     def create(self, request, *args, **kwargs):
-        try:
-            employee = Employee.objects.get(user=request.user)
-        except Employee.DoesNotExist:
-            return Response(
-                {'error': 'Employee profile not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        employee = self.get_current_employee()
         
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -136,9 +162,9 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
                 {'error': f'Only pending requests can be approved. Current status: {leave_request.status}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
+        
         # Prevent self-approval
-        if leave_request.employee.user == request.user:
+        if leave_request.employee_id == request.user.employee_pk:
             return Response(
                 {'error': 'You cannot approve your own leave request'},
                 status=status.HTTP_403_FORBIDDEN
@@ -147,22 +173,26 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
         serializer = LeaveApprovalSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        leave_request.status = 'approved'
-        leave_request.reviewed_by = request.user
-        leave_request.review_notes = serializer.validated_data.get('review_notes', '')
-        leave_request.reviewed_at = timezone.now()
-        leave_request.save()
-        
-        # Update leave balance
-        year = leave_request.start_date.year
-        balance, _ = LeaveBalance.objects.get_or_create(
-            employee=leave_request.employee,
-            leave_type=leave_request.leave_type,
-            year=year,
-            defaults={'total_days': leave_request.leave_type.days_allowed}
-        )
-        balance.used_days += leave_request.total_days
-        balance.save()
+        with transaction.atomic():
+            leave_request.status = 'approved'
+            leave_request.reviewed_by_id = request.user.id
+            leave_request.review_notes = serializer.validated_data.get('review_notes', '')
+            leave_request.reviewed_at = timezone.now()
+            leave_request.save()
+            
+            # Mark the covered working days as on leave in attendance
+            leave_request.materialize_attendance()
+            
+            # Update leave balance
+            year = leave_request.start_date.year
+            balance, _ = LeaveBalance.objects.get_or_create(
+                employee_id=leave_request.employee_id,
+                leave_type_id=leave_request.leave_type_id,
+                year=year,
+                defaults={'total_days': leave_types.get(leave_request.leave_type_id).days_allowed}
+            )
+            balance.used_days += leave_request.total_days
+            balance.save()
         
         return Response({
             'message': 'Leave request approved',
@@ -179,9 +209,9 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
                 {'error': 'Only pending requests can be rejected'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
+        
         # Prevent self-rejection (for consistency)
-        if leave_request.employee.user == request.user:
+        if leave_request.employee_id == request.user.employee_pk:
             return Response(
                 {'error': 'You cannot reject your own leave request'},
                 status=status.HTTP_403_FORBIDDEN
@@ -191,7 +221,7 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         leave_request.status = 'rejected'
-        leave_request.reviewed_by = request.user
+        leave_request.reviewed_by_id = request.user.id
         leave_request.review_notes = serializer.validated_data.get('review_notes', '')
         leave_request.reviewed_at = timezone.now()
         leave_request.save()
@@ -201,27 +231,55 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
             'leave_request': LeaveRequestSerializer(leave_request).data
         })
     
+    @action(detail=True, methods=['get'], throttle_classes=RATE_LIMITED, throttle_scope='export')
+    def attachment(self, request, pk=None):
+        """Download the request's attachment (supports Range and If-None-Match)."""
+        leave_request = self.get_object()
+        if not leave_request.attachment:
+            return Response(
+                {'error': 'This request has no attachment'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return serve_file(request, leave_request.attachment, kind='leave_attachment')
+    
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """Cancel a leave request (by employee)."""
         leave_request = self.get_object()
         
-        # Only pending requests can be cancelled
-        if leave_request.status != 'pending':
+        # Only pending or approved requests can be cancelled
+        if leave_request.status not in ['pending', 'approved']:
             return Response(
-                {'error': 'Only pending requests can be cancelled'},
+                {'error': 'Only pending or approved requests can be cancelled'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # Only owner can cancel
-        if leave_request.employee.user != request.user:
+        if leave_request.employee_id != request.user.employee_pk:
             return Response(
                 {'error': 'You can only cancel your own requests'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        leave_request.status = 'cancelled'
-        leave_request.save()
+        # Days already taken stay taken: their balance and attendance are not rewritten
+        if leave_request.status == 'approved' and leave_request.start_date <= timezone.localdate():
+            return Response(
+                {'error': 'Approved leave cannot be cancelled once it has started'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        with transaction.atomic():
+            if leave_request.status == 'approved':
+                # Give the days back and drop the materialized attendance rows
+                leave_request.clear_attendance()
+                LeaveBalance.objects.filter(
+                    employee=leave_request.employee,
+                    leave_type=leave_request.leave_type,
+                    year=leave_request.start_date.year
+                ).update(used_days=Greatest(F('used_days') - leave_request.total_days, 0))
+            
+            leave_request.status = 'cancelled'
+            leave_request.save()
         
         return Response({
             'message': 'Leave request cancelled',
@@ -229,13 +287,52 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
         })
 
 
-class PendingLeaveRequestsView(generics.ListAPIView):
+class PendingLeaveRequestsView(ReplicaReadsMixin, generics.ListAPIView):
     """List all pending leave requests - Admin/HR only."""
     
     serializer_class = LeaveRequestSerializer
     permission_classes = [IsAuthenticated, IsAdminOrHR]
     
     def get_queryset(self):
-        return LeaveRequest.objects.filter(status='pending').select_related(
-            'employee__user', 'leave_type'
+        return LeaveRequestSerializer.select_related_for(
+            self.request, LeaveRequest.objects.filter(status='pending')
         )
+
+
+class PendingLeaveQueueView(ReplicaReadsMixin, generics.ListAPIView):
+    """Paginated pending-approvals queue (oldest first) with badge counts - Admin/HR only."""
+    
+    serializer_class = LeaveRequestSerializer
+    permission_classes = [IsAuthenticated, IsAdminOrHR]
+    query_budget = 3  # the page and its count, plus the badge counts when their cache is cold
+    
+    def get_queryset(self):
+        queryset = LeaveRequestSerializer.select_related_for(self.request, pending_queryset())
+        
+        department = self.request.query_params.get('department')
+        leave_type = self.request.query_params.get('leave_type')
+        
+        if department:
+            if department not in dict(Employee.DEPARTMENT_CHOICES):
+                raise ParseError({'error': f'Unknown department: {department}'})
+            queryset = queryset.filter(employee__department=department)
+        if leave_type:
+            if not leave_type.isdigit():
+                raise ParseError({'error': 'leave_type must be a leave type id'})
+            queryset = queryset.filter(leave_type_id=leave_type)
+        
+        return queryset
+    
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['counts'] = get_pending_counts()
+        return response
+
+
+class PendingLeaveCountsView(APIView):
+    """Pending request counts by leave type and department, served from cache - Admin/HR only."""
+    
+    permission_classes = [IsAuthenticated, IsAdminOrHR]
+    
+    def get(self, request):
+        return Response(get_pending_counts())
@@ -2,6 +2,8 @@
 Serializers for payroll management with percentage-based salary and templates.
 """
 from rest_framework import serializers
+from dayflow.refcache import CachedPrimaryKeyRelatedField, salary_templates
+from dayflow.serializers import SparseFieldsetsMixin
 from .models import SalaryStructure, SalaryTemplate, PaySlip
 
 
@@ -13,7 +15,7 @@ class SalaryTemplateSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class SalaryStructureSerializer(serializers.ModelSerializer):
+class SalaryStructureSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for salary structure."""
     
     employee_name = serializers.SerializerMethodField()
@@ -51,6 +53,13 @@ class SalaryStructureSerializer(serializers.ModelSerializer):
             'effective_from', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        expandable_fields = {
+            'employee': ('employees.serializers.EmployeeDirectorySerializer', {'read_only': True}),
+        }
+        related_fields = {
+            'employee__user': ['employee', 'employee_id', 'employee_name'],
+            'template': ['template_name', 'basic_salary', 'hra', 'lta', 'gross_salary', 'pf_employee_deduction', 'pf_employer_contribution', 'total_deductions', 'net_salary', 'salary_breakdown'],
+        }
     
     def get_employee_name(self, obj):
         return obj.employee.user.full_name
@@ -62,6 +71,9 @@ class SalaryStructureSerializer(serializers.ModelSerializer):
 class SalaryStructureCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating/updating salary structure."""
     
+    # Validated against the cached templates, without a query
+    template = CachedPrimaryKeyRelatedField(reference=salary_templates, required=False, allow_null=True)
+    
     class Meta:
         model = SalaryStructure
         fields = [
@@ -82,7 +94,7 @@ class SalaryStructureCreateSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class PaySlipSerializer(serializers.ModelSerializer):
+class PaySlipSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """Serializer for payslips."""
     
     employee_name = serializers.SerializerMethodField()
@@ -101,6 +113,12 @@ class PaySlipSerializer(serializers.ModelSerializer):
             'status', 'payment_date', 'notes', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        expandable_fields = {
+            'employee': ('employees.serializers.EmployeeDirectorySerializer', {'read_only': True}),
+        }
+        related_fields = {
+            'employee__user': ['employee', 'employee_id', 'employee_name'],
+        }
     
     def get_employee_name(self, obj):
         return obj.employee.user.full_name
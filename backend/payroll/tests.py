@@ -1,3 +1,39 @@
+from datetime import date
+from decimal import Decimal
+
 from django.test import TestCase
 
-# Create your tests here.
+from dayflow.testing import api_client, assert_query_budget, make_employee
+from .models import PaySlip
+
+
+class PaySlipQueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr, _ = make_employee('hr@example.com', 'Sarah', 'Johnson', role='hr', department='hr')
+        cls.user, cls.employee = make_employee('john@example.com', 'John', 'Doe', manager=cls.hr)
+        employees = [cls.employee] + [
+            make_employee(f'dev{index}@example.com', 'Dev', f'Number{index}', manager=cls.user)[1]
+            for index in range(5)
+        ]
+        for employee in employees:
+            for month in (1, 2):
+                PaySlip.objects.create(
+                    employee=employee, pay_period_start=date(2026, month, 1), pay_period_end=date(2026, month, 28),
+                    monthly_wage=Decimal('50000'), basic_salary=Decimal('25000'), gross_salary=Decimal('50000'),
+                    total_deductions=Decimal('2000'), net_salary=Decimal('48000'),
+                )
+    
+    def test_list(self):
+        for user, count in ((self.hr, 12), (self.user, 2)):
+            response = api_client(user).get('/api/payroll/payslips/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], count)
+            assert_query_budget(response)
+    
+    def test_retrieve(self):
+        payslip = PaySlip.objects.filter(employee=self.employee).first()
+        response = api_client(self.user).get(f'/api/payroll/payslips/{payslip.pk}/')
+        self.assertEqual(response.status_code, 200)
+        assert_query_budget(response)
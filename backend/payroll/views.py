@@ -1,6 +1,9 @@
 """
 Views for payroll management.
 """
+import time
+
+from django.db.models import Count, Q
 from django.utils import timezone
 from rest_framework import viewsets, generics, status
 from rest_framework.views import APIView
@@ -8,6 +11,12 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from accounts.permissions import IsAdminOrHR, ReadOnlyForEmployee
+from accounts.policies import visible
+from dayflow import metrics
+from dayflow.routers import ReplicaReadsMixin
+from dayflow.refcache import ReferenceViewSetMixin, salary_templates
+from dayflow.throttling import RATE_LIMITED
+from employees.current import CurrentEmployeeMixin
 from employees.models import Employee
 from .models import SalaryStructure, SalaryTemplate, PaySlip
 from .serializers import (
@@ -19,17 +28,18 @@ from .serializers import (
 )
 
 
-class SalaryTemplateViewSet(viewsets.ModelViewSet):
+class SalaryTemplateViewSet(ReferenceViewSetMixin, viewsets.ModelViewSet):
     """ViewSet for salary templates - Admin/HR only."""
     queryset = SalaryTemplate.objects.all()
     serializer_class = SalaryTemplateSerializer
     permission_classes = [IsAuthenticated, IsAdminOrHR]
+    reference = salary_templates
 
 
-class SalaryStructureViewSet(viewsets.ModelViewSet):
+class SalaryStructureViewSet(CurrentEmployeeMixin, viewsets.ModelViewSet):
     """ViewSet for salary structures - Admin/HR for write, read-only for employees."""
     
-    queryset = SalaryStructure.objects.select_related('employee__user', 'template')
+    queryset = SalaryStructure.objects.all()
     permission_classes = [IsAuthenticated, ReadOnlyForEmployee]
     
     def get_serializer_class(self):
@@ -39,57 +49,47 @@ class SalaryStructureViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
+        queryset = SalaryStructureSerializer.select_related_for(self.request, self.queryset)
         
         # Employees only see their own salary
         if user.role not in ['admin', 'hr']:
-            try:
-                employee = Employee.objects.get(user=user)
-                return self.queryset.filter(employee=employee)
-            except Employee.DoesNotExist:
-                return SalaryStructure.objects.none()
+            return visible(queryset, user)
         
         # Apply filters for Admin/HR
         employee_id = self.request.query_params.get('employee_id')
         employee_pk = self.request.query_params.get('employee')
         
         if employee_id:
-            return self.queryset.filter(employee__employee_id=employee_id)
+            return queryset.filter(employee__employee_id=employee_id)
         if employee_pk:
-            return self.queryset.filter(employee__id=employee_pk)
+            return queryset.filter(employee__id=employee_pk)
             
-        return self.queryset
+        return queryset
     
     @action(detail=False, methods=['get'])
     def my_salary(self, request):
         """Get current user's salary structure."""
-        try:
-            employee = Employee.objects.get(user=request.user)
-            salary = SalaryStructure.objects.filter(employee=employee, is_active=True).first()
-            if salary:
-                return Response(SalaryStructureSerializer(salary).data)
-            return Response({'message': 'No salary structure found'}, status=status.HTTP_404_NOT_FOUND)
-        except Employee.DoesNotExist:
-            return Response({'error': 'Employee profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        salary = SalaryStructure.objects.filter(employee_id=self.get_current_employee_pk(), is_active=True).first()
+        if salary:
+            return Response(SalaryStructureSerializer(salary).data)
+        return Response({'message': 'No salary structure found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class PaySlipViewSet(viewsets.ModelViewSet):
+class PaySlipViewSet(ReplicaReadsMixin, CurrentEmployeeMixin, viewsets.ModelViewSet):
     """ViewSet for payslips - Admin/HR for write, read-only for employees."""
     
-    queryset = PaySlip.objects.select_related('employee__user')
+    queryset = PaySlip.objects.all()
     serializer_class = PaySlipSerializer
     permission_classes = [IsAuthenticated, ReadOnlyForEmployee]
+    replica_actions = ('list', 'my_payslips')
+    query_budget = {'list': 2, 'retrieve': 1}
     
     def get_queryset(self):
         user = self.request.user
-        queryset = self.queryset
+        queryset = PaySlipSerializer.select_related_for(self.request, self.queryset)
         
         # Employees only see their own payslips
-        if user.role not in ['admin', 'hr']:
-            try:
-                employee = Employee.objects.get(user=user)
-                queryset = queryset.filter(employee=employee)
-            except Employee.DoesNotExist:
-                return PaySlip.objects.none()
+        queryset = visible(queryset, user)
         
         # Apply filters
         year = self.request.query_params.get('year')
@@ -103,7 +103,7 @@ class PaySlipViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(pay_period_start__month=month)
         if status_filter:
             queryset = queryset.filter(status=status_filter)
-        if employee_id and user.role in ['admin', 'hr']:
+        if employee_id:
             queryset = queryset.filter(employee__employee_id=employee_id)
         
         return queryset
@@ -111,13 +111,9 @@ class PaySlipViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def my_payslips(self, request):
         """Get current user's payslips."""
-        try:
-            employee = Employee.objects.get(user=request.user)
-            payslips = PaySlip.objects.filter(employee=employee).order_by('-pay_period_start')
-            serializer = PaySlipSerializer(payslips, many=True)
-            return Response(serializer.data)
-        except Employee.DoesNotExist:
-            return Response({'error': 'Employee profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        payslips = PaySlip.objects.filter(employee_id=self.get_current_employee_pk()).order_by('-pay_period_start')
+        serializer = PaySlipSerializer(payslips, many=True)
+        return Response(serializer.data)
     
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsAdminOrHR])
     def mark_paid(self, request, pk=None):
@@ -136,6 +132,8 @@ class GeneratePaySlipsView(APIView):
     """Generate payslips for a pay period - Admin/HR only."""
     
     permission_classes = [IsAuthenticated, IsAdminOrHR]
+    throttle_classes = RATE_LIMITED
+    throttle_scope = 'payslip_generation'
     
     def post(self, request):
         serializer = GeneratePaySlipSerializer(data=request.data)
@@ -144,6 +142,7 @@ class GeneratePaySlipsView(APIView):
         pay_period_start = serializer.validated_data['pay_period_start']
         pay_period_end = serializer.validated_data['pay_period_end']
         employee_ids = serializer.validated_data.get('employee_ids', [])
+        started = time.perf_counter()
         
         # Get employees with active salary structures
         if employee_ids:
@@ -167,10 +166,11 @@ class GeneratePaySlipsView(APIView):
             # Get salary structure
             try:
                 salary = SalaryStructure.objects.get(employee=employee, is_active=True)
-                # Check for template
-                if not salary.template:
+                # Check for template (templates come from the reference cache)
+                if not salary.template_id:
                     skipped.append(f"{employee.employee_id} (No Template)")
                     continue
+                salary.template = salary_templates.get(salary.template_id)
             except SalaryStructure.DoesNotExist:
                 skipped.append(employee.employee_id)
                 continue
@@ -184,14 +184,18 @@ class GeneratePaySlipsView(APIView):
                     working_days += 1
                 current += timedelta(days=1)
             
-            # Count actual days worked from attendance
+            # Count days worked and unpaid leave from attendance (leave is materialized there)
             from attendance.models import Attendance
-            days_worked = Attendance.objects.filter(
+            attendance = Attendance.objects.filter(
                 employee=employee,
                 date__gte=pay_period_start,
-                date__lte=pay_period_end,
-                status__in=['present', 'late']
-            ).count()
+                date__lte=pay_period_end
+            ).aggregate(
+                days_worked=Count('id', filter=Q(status__in=['present', 'late'])),
+                unpaid_leave_days=Count(
+                    'id', filter=Q(status='on_leave', leave_request__leave_type__is_paid=False)
+                ),
+            )
             
             # Use computed properties from salary structure
             payslip = PaySlip.objects.create(
@@ -212,11 +216,14 @@ class GeneratePaySlipsView(APIView):
                 total_deductions=salary.total_deductions,
                 net_salary=salary.net_salary,
                 working_days=working_days,
-                days_worked=days_worked,
+                days_worked=attendance['days_worked'],
+                unpaid_leave_days=attendance['unpaid_leave_days'],
                 status='processed'
             )
             generated.append(payslip.employee.employee_id)
         
+        metrics.payroll_run_seconds.observe(time.perf_counter() - started)
+        metrics.payslips_generated.inc(len(generated))
         return Response({
             'message': f'Generated {len(generated)} payslips',
             'generated': generated,
@@ -0,0 +1,20 @@
+"""
+Admin configuration for profiling module.
+"""
+from django.contrib import admin
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'method', 'path', 'status_code', 'duration_ms', 'query_count', 'user_email']
+    list_filter = ['method', 'view_name']
+    search_fields = ['path', 'user_email']
+    exclude = ['stacks']
+    
+    # Profiles are recorded by the middleware only
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,146 @@
+"""
+On-demand profiling of single requests, for admins.
+
+An admin obtains a short-lived signed token (POST /api/profiling/token/)
+and sends it with the request to profile, in an ``X-Dayflow-Profile``
+header or a ``_profile`` query parameter. That request runs under the
+sampling profiler (profiling.sampler) with its SQL timeline recorded; the
+result is stored as a ``RequestProfile`` and its id returned in an
+``X-Profile-Id`` response header.
+
+Requests without a token pay a header lookup and nothing else; with
+``PROFILING_ENABLED`` off the middleware is not loaded at all. Under ASGI
+the samples include whatever else the event loop ran meanwhile.
+"""
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signing import BadSignature, TimestampSigner
+from rest_framework.exceptions import AuthenticationFailed
+
+from accounts.authentication import get_cached_user
+from dayflow import sqlstats
+from .models import RequestProfile
+from .sampler import Sampler
+
+HEADER = 'HTTP_X_DAYFLOW_PROFILE'
+QUERY_PARAM = '_profile'
+_signer = TimestampSigner(salt='dayflow.profiling')
+
+
+def issue_token(user):
+    """A token that profiles requests sent with it, for ``PROFILING_TOKEN_MAX_AGE`` seconds."""
+    return _signer.sign(str(user.pk))
+
+
+def _wanted(request):
+    return HEADER in request.META or f'{QUERY_PARAM}=' in request.META.get('QUERY_STRING', '')
+
+
+def _requested_by(request):
+    """The active admin whose valid token came with ``request``, or None."""
+    token = request.META.get(HEADER) or request.GET.get(QUERY_PARAM)
+    if not token:
+        return None
+    try:
+        pk = _signer.unsign(token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+        # Kept out of the request's query stats, like storing the profile
+        with sqlstats.record():
+            user = get_cached_user(int(pk))
+    except (BadSignature, AuthenticationFailed, ValueError):
+        return None
+    if not user.is_active or user.role != 'admin':
+        return None
+    return user
+
+
+def _path(request):
+    """The request path and query, without the token."""
+    params = request.GET.copy()
+    params.pop(QUERY_PARAM, None)
+    return f'{request.path}?{params.urlencode()}' if params else request.path
+
+
+class ProfilingMiddleware:
+    """Profile requests that carry an admin's profiling token (see module docs)."""
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Sync views then run on a worker thread, which has to be sampled too
+            self.process_view = self._process_view
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user = _requested_by(request) if _wanted(request) else None
+        if user is None:
+            return self.get_response(request)
+        sampler, started = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            seconds = time.perf_counter() - started
+            sampler.stop()
+        return self.store(request, response, user, sampler, started, seconds)
+    
+    async def __acall__(self, request):
+        user = await sync_to_async(_requested_by)(request) if _wanted(request) else None
+        if user is None:
+            return await self.get_response(request)
+        sampler, started = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            seconds = time.perf_counter() - started
+            await sync_to_async(sampler.stop)()
+        return await sync_to_async(self.store)(request, response, user, sampler, started, seconds)
+    
+    async def _process_view(self, request, view_func, view_args, view_kwargs):
+        sampler = getattr(request, 'profiler', None)
+        if sampler is not None and not iscoroutinefunction(view_func):
+            # Thread-sensitive calls of a request all run on one thread, the view's included
+            await sync_to_async(lambda: sampler.threads.add(threading.get_ident()))()
+    
+    def begin(self, request):
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            stats.timeline = []
+        request.profiler = Sampler(settings.PROFILING_SAMPLE_INTERVAL).start()
+        return request.profiler, time.perf_counter()
+    
+    def store(self, request, response, user, sampler, started, seconds):
+        stats = getattr(request, 'query_stats', None)
+        timeline = [
+            {'start_ms': round((at - started) * 1000, 3), 'duration_ms': round(duration * 1000, 3), 'sql': sql}
+            for at, duration, sql in getattr(stats, 'timeline', None) or ()
+        ]
+        match = getattr(request, 'resolver_match', None)
+        # Recorded apart, so profiling does not show up in the request's own query stats
+        with sqlstats.record():
+            profile = RequestProfile.objects.create(
+                method=request.method,
+                path=_path(request)[:2048],
+                view_name=match.view_name if match is not None else '',
+                status_code=response.status_code,
+                duration_ms=seconds * 1000,
+                user_id=user.pk,
+                user_email=user.email,
+                sample_interval_ms=sampler.interval * 1000,
+                sample_count=sampler.samples,
+                stacks=sampler.folded(),
+                query_count=len(timeline),
+                sql_ms=sum(query['duration_ms'] for query in timeline),
+                sql_timeline=timeline,
+            )
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
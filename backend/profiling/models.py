@@ -0,0 +1,50 @@
+"""
+Models for stored request profiles.
+"""
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class RequestProfile(models.Model):
+    """
+    One profiled request: its sampled call stacks in folded form (one
+    ``frame;frame;frame count`` line per distinct stack, as read by
+    flamegraph.pl and speedscope) and the queries it ran, in order.
+    """
+    
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    # Plain columns rather than a foreign key, like the audit trail
+    user_id = models.BigIntegerField(null=True, blank=True)
+    user_email = models.CharField(max_length=254, blank=True)
+    sample_interval_ms = models.FloatField()
+    sample_count = models.PositiveIntegerField(default=0)
+    stacks = models.TextField(blank=True)
+    query_count = models.PositiveIntegerField(default=0)
+    sql_ms = models.FloatField(default=0)
+    # [{start_ms, duration_ms, sql}], start_ms from the start of the request
+    sql_timeline = models.JSONField(default=list)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+    
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms) at {self.created_at:%Y-%m-%d %H:%M}"
+    
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            RequestProfile.prune(settings.PROFILING_MAX_STORED)
+    
+    @classmethod
+    def prune(cls, keep):
+        """Delete all but the ``keep`` most recent profiles."""
+        cutoff = cls.objects.order_by('-id').values_list('id', flat=True)[keep:keep + 1]
+        if cutoff:
+            cls.objects.filter(id__lte=cutoff[0]).delete()
@@ -0,0 +1,76 @@
+"""
+A sampling profiler for single requests.
+
+A background thread wakes every ``interval`` seconds, reads the current
+frame of each target thread (``sys._current_frames``) and counts the call
+stack it finds. The request itself runs untouched - no trace or profile
+hooks - so what is measured is close to what runs unprofiled, and the
+counts times the interval approximate the time spent in each stack.
+"""
+import os
+import sys
+import threading
+from collections import Counter
+
+from django.conf import settings
+
+_labels = {}
+
+
+def _label(code):
+    """``function (file:line)`` for a code object, with paths under the project made relative."""
+    try:
+        return _labels[code]
+    except KeyError:
+        filename = code.co_filename
+        base = str(settings.BASE_DIR)
+        if filename.startswith(base):
+            filename = os.path.relpath(filename, base)
+        else:
+            # Library code: keep the path from the package down
+            filename = filename.rsplit('site-packages' + os.sep, 1)[-1]
+        label = _labels[code] = f'{code.co_qualname} ({filename}:{code.co_firstlineno})'
+        return label
+
+
+class Sampler:
+    """
+    Samples the threads in ``threads`` (idents; more can be added while it
+    runs) between ``start()`` and ``stop()``. ``stacks`` counts the folded
+    stacks, outermost call first.
+    """
+    
+    def __init__(self, interval):
+        self.interval = interval
+        self.threads = {threading.get_ident()}
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='dayflow-profiler', daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+    
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in tuple(self.threads):
+                frame = frames.get(ident)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            del frames
+    
+    def folded(self):
+        """The samples as folded stacks: one ``frame;frame;... count`` line each, heaviest first."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
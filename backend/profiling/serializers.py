@@ -0,0 +1,25 @@
+"""
+Serializers for stored request profiles.
+"""
+from rest_framework import serializers
+from .models import RequestProfile
+
+
+class RequestProfileSerializer(serializers.ModelSerializer):
+    """Profile summary for listings; the stacks are downloaded separately."""
+    
+    class Meta:
+        model = RequestProfile
+        fields = [
+            'id', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'user_id', 'user_email',
+            'sample_interval_ms', 'sample_count', 'query_count', 'sql_ms', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class RequestProfileDetailSerializer(RequestProfileSerializer):
+    """Profile with its SQL timeline."""
+    
+    class Meta(RequestProfileSerializer.Meta):
+        fields = RequestProfileSerializer.Meta.fields + ['sql_timeline']
+        read_only_fields = fields
@@ -0,0 +1,14 @@
+"""
+URL patterns for profiling module.
+"""
+from django.urls import path
+from .views import (
+    ProfilingTokenView, RequestProfileListView, RequestProfileDetailView, RequestProfileDownloadView,
+)
+
+urlpatterns = [
+    path('token/', ProfilingTokenView.as_view(), name='profiling_token'),
+    path('profiles/', RequestProfileListView.as_view(), name='request_profiles'),
+    path('profiles/<int:pk>/', RequestProfileDetailView.as_view(), name='request_profile'),
+    path('profiles/<int:pk>/download/', RequestProfileDownloadView.as_view(), name='request_profile_download'),
+]
@@ -0,0 +1,84 @@
+"""
+Views for request profiling: tokens, and the stored profiles.
+"""
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from accounts.permissions import IsAdmin
+from .middleware import issue_token
+from .models import RequestProfile
+from .serializers import RequestProfileSerializer, RequestProfileDetailSerializer
+
+
+class ProfilingTokenView(APIView):
+    """
+    Issue a profiling token - Admin only. Requests sent with it in an
+    X-Dayflow-Profile header (or a _profile query parameter) are profiled.
+    """
+    
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def post(self, request):
+        if not settings.PROFILING_ENABLED:
+            return Response(
+                {'error': 'Profiling is disabled on this server'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            'token': issue_token(request.user),
+            'header': 'X-Dayflow-Profile',
+            'expires_in': settings.PROFILING_TOKEN_MAX_AGE,
+        })
+
+
+class RequestProfileListView(generics.ListAPIView):
+    """
+    Stored profiles, newest first - Admin only.
+    Filters: view_name, path (prefix), min_ms.
+    """
+    
+    serializer_class = RequestProfileSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get_queryset(self):
+        queryset = RequestProfile.objects.defer('stacks', 'sql_timeline')
+        params = self.request.query_params
+        if params.get('view_name'):
+            queryset = queryset.filter(view_name=params['view_name'])
+        if params.get('path'):
+            queryset = queryset.filter(path__startswith=params['path'])
+        try:
+            min_ms = float(params.get('min_ms', ''))
+        except ValueError:
+            min_ms = None
+        if min_ms is not None:
+            queryset = queryset.filter(duration_ms__gte=min_ms)
+        return queryset
+
+
+class RequestProfileDetailView(generics.RetrieveAPIView):
+    """A stored profile with its SQL timeline - Admin only."""
+    
+    queryset = RequestProfile.objects.defer('stacks')
+    serializer_class = RequestProfileDetailSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+
+class RequestProfileDownloadView(generics.RetrieveAPIView):
+    """
+    The sampled stacks of a profile in folded form - Admin only. Open it in
+    speedscope, or render it with flamegraph.pl.
+    """
+    
+    queryset = RequestProfile.objects.all()
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def retrieve(self, request, *args, **kwargs):
+        profile = self.get_object()
+        response = HttpResponse(profile.stacks, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.pk}.folded"'
+        response['Cache-Control'] = 'no-store'
+        return response
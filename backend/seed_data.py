@@ -1,6 +1,8 @@
 """
 Seed data for Dayflow HRMS with new model fields.
 Run with: python seed_data.py
+
+For large volumes use: python manage.py generate_data --employees N --days N
 """
 import os
 import sys
@@ -20,6 +22,7 @@ from employees.models import Employee
 from attendance.models import Attendance
 from leaves.models import LeaveType, LeaveAllocation, LeaveRequest
 from payroll.models import SalaryStructure, SalaryTemplate
+from dayflow.datagen import ATTENDANCE_FIELDS, attendance_rows, write_rows
 
 
 def create_seed_data():
@@ -331,7 +334,7 @@ def create_seed_data():
             
             created_employees.append(employee)
             print(f"  Created employee: {user.full_name} (Login ID: {user.login_id})")
-
+    
     # Create Sample Leave Requests
     print("Creating sample leave requests...")
     
@@ -345,7 +348,7 @@ def create_seed_data():
     # Helper to get day of week
     def is_weekend(d):
         return d.weekday() >= 5
-
+    
     for emp in created_employees:
         # Create 3-5 leave requests per employee
         for _ in range(random.randint(3, 5)):
@@ -389,102 +392,37 @@ def create_seed_data():
                 lr.reviewed_by = hr_user
                 lr.reviewed_at = timezone.now() - timedelta(days=2)
                 lr.save()
+                lr.materialize_attendance()
                 
                 # Update allocation (using global import)
                 alloc = LeaveAllocation.objects.filter(employee=emp, leave_type=lt, year=start_date.year).first()
                 if alloc:
                     alloc.used_days += lr.total_days
                     alloc.save()
-                    
+            
             elif status_val == 'rejected':
                 lr.review_notes = "Manpower shortage"
                 lr.reviewed_by = hr_user
                 lr.reviewed_at = timezone.now() - timedelta(days=2)
                 lr.save()
-                
+    
     print("  Created sample leave requests.")
-
+    
     # Create sample attendance records for last 30 days
     print("Creating sample attendance history...")
-    end_date = timezone.now().date()
+    end_date = timezone.localdate()
     start_date = end_date - timedelta(days=30)
     
-    # Include HR and Admin in attendance generation if they have employee records
-    all_employees = list(Employee.objects.all())
-    
-    
-    current_date = start_date
-    while current_date <= end_date:
-        # Skip weekends (Saturday and Sunday)
-        if current_date.weekday() >= 5:
-            current_date += timedelta(days=1)
-            continue
-            
-        for emp in all_employees:
-            # 90% chance of being present
-            if random.random() < 0.9:
-                # Randomize check-in between 8:45 AM and 9:30 AM
-                hour_in = 8
-                minute_in = random.randint(45, 59)
-                if random.random() > 0.5:
-                    hour_in = 9
-                    minute_in = random.randint(0, 30)
-                
-                check_in = timezone.now().replace(
-                    year=current_date.year, month=current_date.month, day=current_date.day,
-                    hour=hour_in, minute=minute_in, second=0, microsecond=0
-                )
-                
-                # Randomize check-out between 5:30 PM and 7:00 PM
-                hour_out = 17 # 5 PM
-                minute_out = random.randint(30, 59)
-                if random.random() > 0.3:
-                    hour_out = 18 # 6 PM
-                    minute_out = random.randint(0, 59)
-                
-                check_out = timezone.now().replace(
-                    year=current_date.year, month=current_date.month, day=current_date.day,
-                    hour=hour_out, minute=minute_out, second=0, microsecond=0
-                )
-                
-                # Calculate work hours
-                duration = check_out - check_in
-                work_hours = round(Decimal(duration.total_seconds() / 3600), 2)
-                
-                # If today, maybe haven't checked out yet? 
-                # For demo purposes, let's say everyone has checked out except a few if it's today
-                is_today = (current_date == end_date)
-                
-                if is_today and random.random() > 0.8:
-                     Attendance.objects.get_or_create(
-                        employee=emp,
-                        date=current_date,
-                        defaults={
-                            'check_in': check_in,
-                            'status': 'present'
-                        }
-                    )
-                else:
-                    Attendance.objects.get_or_create(
-                        employee=emp,
-                        date=current_date,
-                        defaults={
-                            'check_in': check_in,
-                            'check_out': check_out,
-                            'status': 'present'
-                        }
-                    )
-            elif random.random() < 0.05:
-                # Mark as absent/leave occasionally
-                Attendance.objects.get_or_create(
-                    employee=emp,
-                    date=current_date,
-                    defaults={
-                        'status': 'leave' if random.random() > 0.5 else 'absent'
-                    }
-                )
-
-        current_date += timedelta(days=1)
+    # Include HR and Admin in attendance generation if they have employee records,
+    # and keep days that already have a record (approved leave, earlier runs)
+    employee_ids = list(Employee.objects.values_list('id', flat=True))
+    existing = set(Attendance.objects.filter(date__gte=start_date).values_list('employee_id', 'date'))
+    rows = (
+        row for row in attendance_rows(employee_ids, start_date, end_date)
+        if (row[0], row[1]) not in existing
+    )
+    created = write_rows(Attendance, ATTENDANCE_FIELDS, rows)
+    print(f"  Created {created} attendance records.")
     
     print("\nSeed data created successfully!")
     print("\n" + "="*50)
@@ -21,28 +21,43 @@ api.interceptors.request.use(
     (error) => Promise.reject(error)
 )
 
+// Refresh tokens are single-use (each refresh rotates them), so concurrent 401s
+// share one refresh request instead of each spending the same token
+let refreshPromise = null
+
+const refreshTokens = () => {
+    if (!refreshPromise) {
+        const refreshToken = localStorage.getItem('refresh_token')
+        refreshPromise = axios
+            .post(`${API_BASE_URL}/auth/token/refresh/`, { refresh: refreshToken })
+            .then((response) => {
+                const { access, refresh } = response.data
+                localStorage.setItem('access_token', access)
+                if (refresh) {
+                    localStorage.setItem('refresh_token', refresh)
+                }
+                return access
+            })
+            .finally(() => {
+                refreshPromise = null
+            })
+    }
+    return refreshPromise
+}
+
 // Response interceptor to handle token refresh
 api.interceptors.response.use(
     (response) => response,
     async (error) => {
         const originalRequest = error.config
 
-        if (error.response?.status === 401 && !originalRequest._retry) {
+        if (error.response?.status === 401 && !originalRequest._retry && localStorage.getItem('refresh_token')) {
             originalRequest._retry = true
 
             try {
-                const refreshToken = localStorage.getItem('refresh_token')
-                if (refreshToken) {
-                    const response = await axios.post(`${API_BASE_URL}/auth/token/refresh/`, {
-                        refresh: refreshToken,
-                    })
-
-                    const { access } = response.data
-                    localStorage.setItem('access_token', access)
-
-                    originalRequest.headers.Authorization = `Bearer ${access}`
-                    return api(originalRequest)
-                }
+                const access = await refreshTokens()
+                originalRequest.headers.Authorization = `Bearer ${access}`
+                return api(originalRequest)
             } catch (refreshError) {
                 localStorage.removeItem('access_token')
                 localStorage.removeItem('refresh_token')